@@ -0,0 +1,283 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+from settings import get_setting
+from catalog import extract_asin, category_file, load_products, save_products
+from freshness import carry_over_details, index_by_key, mark_details_scraped
+
+try:
+    import zstandard # Optional: smaller and faster than gzip when installed
+except ImportError:
+    zstandard = None
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+COLOR_WARNING = "\033[93m" # Yellow
+COLOR_ERROR = "\033[91m"   # Red
+COLOR_STEP = "\033[96m"    # Cyan
+
+ARCHIVE_FOLDER = "archive"
+INDEX_FILE = "index.jsonl"
+DEFAULT_MAX_MB = 512
+DEFAULT_MAX_AGE_DAYS = 60
+# Eviction frees space down to this share of the size cap, so the index isn't rewritten on every store once full
+EVICT_TO_FRACTION = 0.9
+
+class HtmlArchive:
+    """
+    Compressed, content-addressed store of fetched pages.
+    Each distinct page body is stored once under objects/<sha[:2]>/<sha>.<ext>;
+    index.jsonl records every fetch (URL, ASIN, kind, category, page, fetch time)
+    and points at the body by its SHA-256. Old or least recently used bodies are
+    evicted once the archive grows past its size cap.
+    """
+
+    def __init__(self, root=ARCHIVE_FOLDER, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 86400 if max_age_days else None
+        self.entries = []
+        self.object_sizes = {} # sha -> compressed size on disk
+        self.last_access = {}  # sha -> last time it was stored or read
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+        self._load_index()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.root, INDEX_FILE)
+
+    def _object_path(self, sha):
+        for ext in (".zst", ".gz"):
+            path = os.path.join(self.root, "objects", sha[:2], sha + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # A torn last line from an interrupted run
+                self.entries.append(entry)
+                sha = entry["sha256"]
+                self.object_sizes[sha] = entry.get("size", 0)
+                self.last_access[sha] = max(self.last_access.get(sha, 0), entry.get("accessed_at", entry["fetched_at"]))
+
+    def total_bytes(self):
+        return sum(self.object_sizes.values())
+
+    def store(self, url, html_content, kind, category=None, page=None, asin=None):
+        """Archives one fetched page and returns its content hash."""
+        data = html_content.encode('utf-8')
+        sha = hashlib.sha256(data).hexdigest()
+        now = time.time()
+        with self._lock:
+            if sha not in self.object_sizes or self._object_path(sha) is None:
+                folder = os.path.join(self.root, "objects", sha[:2])
+                os.makedirs(folder, exist_ok=True)
+                if zstandard:
+                    path, blob = os.path.join(folder, sha + ".zst"), zstandard.ZstdCompressor(level=10).compress(data)
+                else:
+                    path, blob = os.path.join(folder, sha + ".gz"), gzip.compress(data, compresslevel=6)
+                with open(path, 'wb') as f:
+                    f.write(blob)
+                self.object_sizes[sha] = len(blob)
+            entry = {
+                "sha256": sha,
+                "url": url,
+                "asin": asin or extract_asin(url),
+                "kind": kind,
+                "category": category,
+                "page": page,
+                "fetched_at": now,
+                "size": self.object_sizes[sha],
+            }
+            self.entries.append(entry)
+            self.last_access[sha] = now
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if self.max_bytes and self.total_bytes() > self.max_bytes:
+                self._evict()
+        return sha
+
+    def load(self, sha):
+        """Returns the decompressed page body for a content hash."""
+        path = self._object_path(sha)
+        if path is None:
+            raise FileNotFoundError(f"Archived page {sha} is missing")
+        with open(path, 'rb') as f:
+            blob = f.read()
+        if path.endswith(".zst"):
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read .zst archive objects")
+            data = zstandard.ZstdDecompressor().decompress(blob)
+        else:
+            data = gzip.decompress(blob)
+        with self._lock:
+            self.last_access[sha] = time.time()
+        return data.decode('utf-8')
+
+    def latest(self, kind, category=None, key="url"):
+        """Returns the newest entry of a kind for every distinct key (url, asin or page)."""
+        newest = {}
+        for entry in self.entries:
+            if entry["kind"] != kind or (category is not None and entry.get("category") != category):
+                continue
+            value = entry.get(key)
+            if value is None:
+                continue
+            if value not in newest or entry["fetched_at"] >= newest[value]["fetched_at"]:
+                newest[value] = entry
+        return newest
+
+    def _remove_object(self, sha):
+        path = self._object_path(sha)
+        if path:
+            os.unlink(path)
+        self.object_sizes.pop(sha, None)
+        self.last_access.pop(sha, None)
+
+    def _evict(self):
+        """
+        Drops bodies past the age limit, then least recently used bodies until the archive is
+        back under EVICT_TO_FRACTION of its size cap.
+        """
+        now = time.time()
+        evicted = set()
+        if self.max_age_seconds:
+            for sha, accessed_at in list(self.last_access.items()):
+                if now - accessed_at > self.max_age_seconds:
+                    self._remove_object(sha)
+                    evicted.add(sha)
+        if self.max_bytes:
+            total = self.total_bytes()
+            if total > self.max_bytes:
+                for sha, _ in sorted(self.last_access.items(), key=lambda item: item[1]):
+                    if total <= self.max_bytes * EVICT_TO_FRACTION:
+                        break
+                    total -= self.object_sizes.get(sha, 0)
+                    self._remove_object(sha)
+                    evicted.add(sha)
+        if evicted:
+            self.entries = [e for e in self.entries if e["sha256"] not in evicted]
+            self._write_index()
+        return len(evicted)
+
+    def _write_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self.entries:
+                entry["accessed_at"] = self.last_access.get(entry["sha256"], entry["fetched_at"])
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.index_path)
+
+    def evict(self):
+        with self._lock:
+            return self._evict()
+
+    def close(self):
+        """Applies the eviction policy and rewrites the index with current access times."""
+        with self._lock:
+            if not self._evict():
+                self._write_index()
+
+def open_archive(force=False):
+    """Returns the HtmlArchive configured in config.json, or None if archiving is disabled."""
+    settings = get_setting("archive", {})
+    if not force and not settings.get("enabled"):
+        return None
+    return HtmlArchive(root=settings.get("path", ARCHIVE_FOLDER),
+                       max_bytes=int(settings.get("max_mb", DEFAULT_MAX_MB) * 1024 * 1024),
+                       max_age_days=settings.get("max_age_days", DEFAULT_MAX_AGE_DAYS))
+
+def reparse_category(archive, category):
+    """
+    Rebuilds <category>.json from archived pages without touching the network.
+    Listing data comes from the newest archived copy of every search page, details
+    and images from the newest archived product page of every ASIN, timestamped with
+    when that page was fetched. Everything else the current file has for a product
+    (newer details, posting marks) carries over as it does on a re-crawl.
+    """
+    # Imported here so archive stats/evict don't need Selenium installed
+    from scrape_products import parse_products
+    from scrape_details import parse_product_page
+
+    output_filename = category_file(category)
+    previous = {}
+    try:
+        previous = index_by_key(load_products(output_filename))
+    except FileNotFoundError:
+        pass
+    except ValueError:
+        print(f"{COLOR_WARNING}WARNING: {output_filename} is corrupted. Rebuilding from the archive only.{COLOR_RESET}", flush=True)
+
+    search_pages = archive.latest("search", category=category, key="page")
+    product_pages = archive.latest("product", key="asin")
+    if not search_pages:
+        print(f"{COLOR_WARNING}WARNING: No archived search pages for '{category}'. Nothing to rebuild.{COLOR_RESET}", flush=True)
+        return None
+
+    products_data = []
+    for page_num in sorted(search_pages):
+        entry = search_pages[page_num]
+        products = parse_products(archive.load(entry["sha256"]), scraped_at=entry["fetched_at"])
+        carry_over_details(products, previous)
+        for product in products:
+            page_entry = product_pages.get(extract_asin(product["product_url"]))
+            # A product page older than the details the file already has would only roll them back
+            if page_entry and page_entry["fetched_at"] >= product.get("details_scraped_at", 0):
+                details, image_urls = parse_product_page(archive.load(page_entry["sha256"]))
+                if details:
+                    product["product_details"] = details
+                    product.pop("details_from", None)
+                    mark_details_scraped(product, page_entry["fetched_at"])
+                if image_urls:
+                    for key in [k for k in product if k.startswith("image_url_")]:
+                        del product[key]
+                    for i, url in enumerate(image_urls[:5]):
+                        product[f"image_url_{i+1}"] = url
+            products_data.append(product)
+
+    save_products(products_data, output_filename)
+    print(f"{COLOR_SUCCESS}SUCCESS: Rebuilt {output_filename} with {len(products_data)} products from {len(search_pages)} archived search pages.{COLOR_RESET}", flush=True)
+    return len(products_data)
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the raw HTML archive of fetched Amazon pages.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    reparse_parser = subparsers.add_parser("reparse", help="Rebuild category files from archived pages")
+    reparse_parser.add_argument("categories", nargs="*", help="Categories to rebuild (default: all)")
+    subparsers.add_parser("evict", help="Apply the size cap and age limit now")
+    subparsers.add_parser("stats", help="Show archive size and contents")
+    args = parser.parse_args()
+
+    archive = open_archive(force=True)
+    if args.command == "reparse":
+        from scheduler import load_categories
+        for category in args.categories or list(load_categories()):
+            print(f"\n{COLOR_STEP}--- Reparsing '{category}' from archive ---{COLOR_RESET}", flush=True)
+            reparse_category(archive, category)
+    elif args.command == "evict":
+        print(f"{COLOR_INFO}INFO: Evicted {archive.evict()} archived pages.{COLOR_RESET}", flush=True)
+    elif args.command == "stats":
+        kinds = {}
+        for entry in archive.entries:
+            kinds[entry["kind"]] = kinds.get(entry["kind"], 0) + 1
+        print(f"{COLOR_INFO}INFO: {len(archive.entries)} fetches, {len(archive.object_sizes)} distinct pages, {archive.total_bytes() / 1024 / 1024:.1f} MB compressed.{COLOR_RESET}", flush=True)
+        for kind, count in sorted(kinds.items()):
+            print(f"{COLOR_INFO}INFO:   {kind}: {count}{COLOR_RESET}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import statistics
+import time
+import urllib.parse
+
+from selenium.webdriver.common.by import By
+
+from navigation import navigate
+from settings import get_setting
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+COLOR_WARNING = "\033[93m" # Yellow
+
+BACKEND_SELENIUM = "selenium" # Every command is an HTTP round trip to chromedriver
+BACKEND_CDP = "cdp"           # DevTools over a websocket straight to Chrome (cdp.CdpBackend)
+
+DEFAULTS = {
+    "backend": BACKEND_SELENIUM,
+}
+
+# A page with enough elements for the element-by-element read to show its round trips
+BENCHMARK_PAGE = "data:text/html," + urllib.parse.quote(
+    "<html><body><ul>" + "".join(f"<li><img src='https://example.com/{i}.jpg'></li>" for i in range(100)) + "</ul></body></html>")
+
+def backend_settings():
+    config = dict(DEFAULTS)
+    config.update(get_setting("browser_backend", {}))
+    return config
+
+class SeleniumBackend:
+    """
+    The page-level operations the scripts need from a browser: navigation, running
+    scripts, reading the page, file uploads and the document's HTTP status. This one
+    goes through chromedriver; cdp.CdpBackend has the same methods over DevTools.
+    Clicks and typing that need real input events stay on the Selenium driver.
+    """
+
+    name = BACKEND_SELENIUM
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def navigate(self, url, ready, label, deadline=None, required=False):
+        return navigate(self.driver, url, ready, label, deadline, required)
+
+    def page_source(self):
+        return self.driver.page_source
+
+    def evaluate(self, script, *args):
+        """Runs script as a function body with `arguments` and returns its value."""
+        return self.driver.execute_script(script, *args)
+
+    def evaluate_many(self, calls):
+        """Runs (script, args) pairs in order; chromedriver takes one command at a time."""
+        return [self.evaluate(script, *args) for script, args in calls]
+
+    def upload_files(self, selector, paths):
+        """Sets the files of the file input matching selector."""
+        self.driver.find_element(By.CSS_SELECTOR, selector).send_keys("\n".join(paths))
+
+    def document_status(self):
+        """HTTP status of the current page's main document (None if the browser doesn't report it)."""
+        return self.evaluate("const entry = performance.getEntriesByType('navigation')[0]; return entry && entry.responseStatus || null;")
+
+    def close(self):
+        pass # The driver belongs to the caller
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_backend(driver, kind=None):
+    """
+    Returns the configured backend (config "browser_backend") for the tab a Selenium driver
+    is on. A CDP backend that can't attach (e.g. a remote driver) falls back to Selenium.
+    """
+    kind = kind or backend_settings()["backend"]
+    if kind == BACKEND_CDP:
+        try:
+            from cdp import CdpBackend
+            return CdpBackend.attach(driver)
+        except Exception as e:
+            print(f"{COLOR_WARNING}WARNING: Could not attach to Chrome over DevTools ({e}); using Selenium.{COLOR_RESET}", flush=True)
+    return SeleniumBackend(driver)
+
+def benchmark(backend, url=BENCHMARK_PAGE, commands=200):
+    """
+    Measures one backend on the page at url: the latency of a trivial command, how many
+    commands a second it runs one after another and pipelined, and reading every image
+    source in one script. Returns the numbers as a dict.
+    """
+    backend.navigate(url, "body", "benchmark")
+    latencies = []
+    for _ in range(commands):
+        started = time.perf_counter()
+        backend.evaluate("return 1;")
+        latencies.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    backend.evaluate_many([("return arguments[0] * 2;", (i,)) for i in range(commands)])
+    pipelined = time.perf_counter() - started
+    started = time.perf_counter()
+    images = backend.evaluate("return Array.from(document.images, img => img.src);")
+    bulk_read = time.perf_counter() - started
+    return {
+        "median_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(sorted(latencies)[int(len(latencies) * 0.95) - 1] * 1000, 3),
+        "commands_per_second": round(len(latencies) / sum(latencies)),
+        "pipelined_per_second": round(commands / pipelined),
+        "bulk_read_ms": round(bulk_read * 1000, 2),
+        "images": len(images),
+    }
+
+def element_by_element_ms(driver):
+    """Reads every image source the way the scripts used to: find_elements, then one get_attribute each."""
+    started = time.perf_counter()
+    sources = [img.get_attribute("src") for img in driver.find_elements(By.TAG_NAME, "img")]
+    return round((time.perf_counter() - started) * 1000, 2), len(sources)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare command latency and throughput of the Selenium and CDP browser backends.")
+    parser.add_argument("--url", default=BENCHMARK_PAGE, help="Page to run the commands on (default: a generated page with 100 images)")
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--headful", action="store_true", help="Show the browser window")
+    args = parser.parse_args()
+
+    from scrape_details import setup_driver
+    from cdp import CdpBackend
+    driver = setup_driver(not args.headful)
+    try:
+        backends = [SeleniumBackend(driver), CdpBackend.attach(driver)]
+        for backend in backends:
+            results = benchmark(backend, args.url, args.commands)
+            print(f"{COLOR_SUCCESS}{backend.name:>8}{COLOR_RESET}  {results['median_ms']:7.3f} ms median, {results['p95_ms']:7.3f} ms p95, "
+                  f"{results['commands_per_second']:6d} commands/s, {results['pipelined_per_second']:6d} pipelined/s, "
+                  f"{results['images']} image sources in one script: {results['bulk_read_ms']} ms", flush=True)
+        elapsed, count = element_by_element_ms(driver)
+        print(f"{COLOR_INFO}INFO: The same {count} image sources element by element over Selenium: {elapsed} ms.{COLOR_RESET}", flush=True)
+        for backend in backends:
+            backend.close()
+    finally:
+        driver.quit()
+
+if __name__ == "__main__":
+    main()
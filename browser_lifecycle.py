@@ -0,0 +1,186 @@
+import os
+import time
+
+from selenium.common.exceptions import InvalidSessionIdException, NoSuchWindowException, WebDriverException
+
+from settings import get_setting
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_WARNING = "\033[93m" # Yellow
+
+DEFAULTS = {
+    "max_pages": 150,             # Restart after this many product pages...
+    "max_rss_mb": 2500,           # ...or once Chrome (browser + every child process) uses this much memory...
+    "max_renderer_rss_mb": 1200,  # ...or its renderers alone use this much
+    "check_every": 5,             # Pages between two memory checks
+    "crash_retries": 2,           # Restarts allowed for one product before its error is raised
+}
+
+# Messages of WebDriverExceptions that mean the browser (not the page) is gone
+CRASH_MARKERS = ("tab crashed", "chrome not reachable", "session deleted", "disconnected",
+                 "no such window", "target window already closed", "timed out receiving message from renderer")
+
+def lifecycle_settings():
+    config = dict(DEFAULTS)
+    config.update(get_setting("browser_recycling", {}))
+    return config
+
+def is_browser_crash(error):
+    """True if an exception means the browser or its session died rather than the page misbehaving."""
+    if isinstance(error, OSError) or type(error).__name__ in ("MaxRetryError", "ProtocolError"):
+        return True # chromedriver itself is gone
+    if not isinstance(error, WebDriverException):
+        return False
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+        return True
+    return any(marker in (error.msg or "").lower() for marker in CRASH_MARKERS)
+
+def _read_proc_tree():
+    """Returns {pid: (ppid, rss_kb, is_renderer)} for every process visible in /proc."""
+    processes = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", 'r') as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1]) # comm may contain spaces
+            rss_kb = 0
+            with open(f"/proc/{name}/status", 'r') as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss_kb = int(line.split()[1])
+                        break
+            with open(f"/proc/{name}/cmdline", 'rb') as f:
+                is_renderer = b"--type=renderer" in f.read()
+        except (OSError, IndexError, ValueError):
+            continue # Exited while we were looking
+        processes[int(name)] = (ppid, rss_kb, is_renderer)
+    return processes
+
+def chrome_memory(driver):
+    """
+    Returns (total MB, renderer MB) for the Chrome processes under the driver's chromedriver,
+    or None where that can't be measured (no /proc, or a remote driver).
+    """
+    try:
+        root = driver.service.process.pid
+    except AttributeError:
+        return None
+    if not os.path.isdir("/proc"):
+        return None
+    processes = _read_proc_tree()
+    children = {}
+    for pid, (ppid, _, _) in processes.items():
+        children.setdefault(ppid, []).append(pid)
+    total_kb, renderer_kb = 0, 0
+    stack = list(children.get(root, [])) # chromedriver's own memory doesn't grow with pages
+    while stack:
+        pid = stack.pop()
+        _, rss_kb, is_renderer = processes[pid]
+        total_kb += rss_kb
+        if is_renderer:
+            renderer_kb += rss_kb
+        stack.extend(children.get(pid, []))
+    return total_kb / 1024, renderer_kb / 1024
+
+class ManagedDriver:
+    """
+    Owns the browser of one scrape worker and replaces it before it degrades.
+    The product loop calls call(fn, ...) for each page it scrapes. A crash during
+    a page restarts the browser and retries the same page. After every page the
+    manager counts it and, every few pages, measures Chrome's memory; once a
+    threshold is passed the browser is swapped for a fresh one (launch() applies
+    the stealth setup again) before the next page, so the loop never notices.
+    """
+
+    def __init__(self, launch, release, recycle=None, config=None):
+        self.launch = launch
+        self.release = release            # Hands back a healthy browser at the end
+        self.recycle = recycle or release # Disposes of a browser being replaced
+        self.config = config or lifecycle_settings()
+        self.driver = launch()
+        self.pages = 0          # Pages on the current browser
+        self.total_pages = 0
+        self.restarts = {"pages": 0, "memory": 0, "crash": 0}
+        self.last_memory = None
+        self.page_seconds = []  # Per-page latency of the current browser
+
+    def alive(self):
+        try:
+            self.driver.current_url # Any round trip to chromedriver
+            return True
+        except Exception:
+            return False
+
+    def restart(self, reason, detail=""):
+        print(f"{COLOR_WARNING}WARNING: Restarting the browser after {self.pages} pages ({reason}{': ' + detail if detail else ''}).{COLOR_RESET}", flush=True)
+        self.restarts[reason] += 1
+        old, self.driver = self.driver, None
+        try:
+            self.recycle(old)
+        except Exception:
+            pass # A crashed browser may not even quit cleanly
+        self.driver = self.launch()
+        self.pages = 0
+        self.page_seconds = []
+
+    def call(self, fn, *args):
+        """
+        Runs fn(driver, *args) for one page. If the browser crashes (raised, or found dead
+        afterwards when fn swallowed the error) it is restarted and fn retried on the same page.
+        """
+        for attempt in range(self.config["crash_retries"] + 1):
+            started = time.monotonic()
+            try:
+                result = fn(self.driver, *args)
+                crashed = not self.alive()
+                error = None
+            except Exception as e:
+                if not is_browser_crash(e):
+                    raise
+                crashed, error = True, e
+            if not crashed:
+                self._after_page(time.monotonic() - started)
+                return result
+            if attempt == self.config["crash_retries"]:
+                if error is not None:
+                    raise error
+                return result
+            self.restart("crash", type(error).__name__ if error else "browser died")
+        return None
+
+    def _after_page(self, seconds):
+        self.pages += 1
+        self.total_pages += 1
+        self.page_seconds.append(seconds)
+        if self.pages >= self.config["max_pages"]:
+            self.restart("pages")
+            return
+        if self.pages % self.config["check_every"]:
+            return
+        memory = chrome_memory(self.driver)
+        if memory is None:
+            return
+        self.last_memory = memory
+        total_mb, renderer_mb = memory
+        if total_mb >= self.config["max_rss_mb"] or renderer_mb >= self.config["max_renderer_rss_mb"]:
+            self.restart("memory", f"{total_mb:.0f} MB, renderers {renderer_mb:.0f} MB")
+
+    def metrics(self):
+        recent = self.page_seconds[-20:]
+        return {
+            "pages": self.total_pages,
+            "pages_on_current_browser": self.pages,
+            "restarts": dict(self.restarts),
+            "memory_mb": None if self.last_memory is None else {"total": round(self.last_memory[0]), "renderers": round(self.last_memory[1])},
+            "recent_seconds_per_page": round(sum(recent) / len(recent), 2) if recent else None,
+        }
+
+    def close(self):
+        metrics = self.metrics()
+        print(f"{COLOR_INFO}INFO: Browser served {metrics['pages']} pages with {sum(metrics['restarts'].values())} restart(s) {metrics['restarts']}.{COLOR_RESET}", flush=True)
+        if self.driver is not None:
+            self.release(self.driver)
+            self.driver = None
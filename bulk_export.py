@@ -0,0 +1,166 @@
+import argparse
+import csv
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from catalog import category_file, image_url, load_products, product_key, save_products, write_atomic
+from copywriter import copy_settings, local_copy, COPY_MODE_LOCAL, COPY_MODE_PREFILTER
+from pinning import (GEMINI_API_KEY, affiliate_url, load_category_boards, load_existing_asins,
+                     rewrite_product_name_with_gemini, sanitize_image_url, summarize_product_details)
+from scoring import load_columns
+from settings import get_setting
+from variants import cluster_products, variant_settings
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+COLOR_WARNING = "\033[93m" # Yellow
+
+# Columns of Pinterest's bulk-create template, in its order; the ones we don't fill stay empty
+CSV_COLUMNS = ("Title", "Media URL", "Pinterest board", "Thumbnail", "Description", "Link", "Publish date", "Keywords")
+
+DEFAULTS = {
+    "rows_per_file": 200,     # Pinterest takes at most 200 pins per bulk-upload file
+    "output_dir": "exports",
+    "llm_workers": 4,         # Gemini calls in flight at once, for the products the local copy isn't good enough for
+}
+
+def export_settings():
+    config = dict(DEFAULTS)
+    config.update(get_setting("bulk_export", {}))
+    return config
+
+def select_products(category_boards, existing_asins, limit=None):
+    """
+    Every product that is ready to pin: eligible for posting (see scoring.CatalogColumns.eligible)
+    and with scraped details. Variants of anything already pinned or exported are skipped and only
+    the best-scoring product of each variant cluster is taken, unless one_pin_per_cluster is off.
+    Returns [(category, product)], best deal score first.
+    """
+    columns = load_columns(category_boards)
+    ready = columns.eligible(existing_asins) & columns.has_details
+    if variant_settings()["one_pin_per_cluster"] and len(columns):
+        labels = np.array(cluster_products(columns.products, with_details=False)) # Details are too alike across models
+        pinned = columns.published | columns.exported | (np.isin(columns.asin, list(existing_asins)) if existing_asins else False)
+        variant_of_pinned = np.isin(labels, labels[pinned]) & ~pinned
+        print(f"{COLOR_INFO}INFO: Skipping {int((ready & variant_of_pinned).sum())} variants of already pinned or exported products.{COLOR_RESET}", flush=True)
+        ready &= ~variant_of_pinned
+    else:
+        labels = np.arange(len(columns)) # Every product its own cluster
+
+    scores = columns.scores()
+    picked, clusters = [], set()
+    for row in columns.best(int(ready.sum()), mask=ready, scores=scores):
+        if labels[row] in clusters:
+            continue
+        clusters.add(labels[row])
+        picked.append((columns.categories[columns.category[row]], columns.products[row]))
+        if limit and len(picked) >= limit:
+            break
+    return picked
+
+def write_copy(products, config=None):
+    """
+    Title and description for every product, the same way post_pin writes them for one pin:
+    the local copy, and Gemini (several calls at once) only where the copywriting mode asks for it.
+    Returns [(title, description)] in the order of products.
+    """
+    config = config or export_settings()
+    copy_config = copy_settings()
+    use_llm = bool(GEMINI_API_KEY) and copy_config["mode"] != COPY_MODE_LOCAL
+    prefilter = copy_config["mode"] == COPY_MODE_PREFILTER
+    copies, llm_calls = [], 0
+    with ThreadPoolExecutor(max_workers=config["llm_workers"]) as llm_pool:
+        for p in products:
+            name, details = p.get("product_name", ""), p.get("product_details", "")
+            local = local_copy(name, details, copy_config)
+            title, description = local["title"], local["summary"]
+            if use_llm and not (prefilter and local["title_ok"]):
+                title = llm_pool.submit(rewrite_product_name_with_gemini, name, local["title"])
+                llm_calls += 1
+            if use_llm and not (prefilter and local["summary_ok"]):
+                cleaned = details.replace("<p>", "").replace("</p>", "\n\n").strip()
+                description = llm_pool.submit(summarize_product_details, cleaned, local["summary"])
+                llm_calls += 1
+            copies.append((title, description))
+        copies = [tuple(part if isinstance(part, str) else part.result() for part in copy) for copy in copies]
+    print(f"{COLOR_INFO}INFO: Wrote copy for {len(products)} products with {llm_calls} Gemini calls.{COLOR_RESET}", flush=True)
+    return copies
+
+def bulk_rows(picked, copies, category_boards):
+    """One bulk-upload row per product: its main image, the category's board and the affiliate link."""
+    rows = []
+    for (category, product), (title, description) in zip(picked, copies):
+        rows.append({
+            "Title": title,
+            "Media URL": sanitize_image_url(image_url(product["image_url_1"])),
+            "Pinterest board": category_boards[category],
+            "Description": description,
+            "Link": affiliate_url(product.get("product_url", "")),
+        })
+    return rows
+
+def write_chunks(rows, output_dir, rows_per_file, stamp=None):
+    """Writes the rows as CSV files of at most rows_per_file rows each; returns [(path, rows in it)]."""
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = stamp or time.strftime("%Y%m%d-%H%M%S")
+    chunks = [rows[i:i + rows_per_file] for i in range(0, len(rows), rows_per_file)]
+    written = []
+    for number, chunk in enumerate(chunks, 1):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, restval="", lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(chunk)
+        path = os.path.join(output_dir, f"pinterest_bulk_{stamp}_{number:03d}.csv")
+        write_atomic(path, buffer.getvalue())
+        written.append((path, chunk))
+    return written
+
+def mark_exported(picked, files):
+    """Records in each category's catalog which file every exported product went into."""
+    export_file = {}
+    for (category, product), path in zip(picked, files):
+        export_file.setdefault(category, {})[product_key(product)] = os.path.basename(path)
+    for category, by_key in export_file.items():
+        product_file = category_file(category)
+        all_products_data = load_products(product_file)
+        marked = 0
+        for p in all_products_data:
+            key = product_key(p)
+            if key in by_key and not p.get("published"):
+                p["exported"] = by_key.pop(key)
+                marked += 1
+        save_products(all_products_data, product_file)
+        print(f"{COLOR_SUCCESS}SUCCESS: Marked {marked} products as exported in {product_file}.{COLOR_RESET}", flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Write every ready, unpublished product as Pinterest bulk-upload CSV rows.")
+    parser.add_argument("--limit", type=int, default=None, help="Export at most this many products")
+    parser.add_argument("--output-dir", default=None, help="Folder for the CSV files (default: bulk_export.output_dir in config.json)")
+    parser.add_argument("--dry-run", action="store_true", help="Write the files but don't mark the products as exported")
+    args = parser.parse_args()
+
+    config = export_settings()
+    category_boards = load_category_boards()
+    existing_asins = load_existing_asins()
+    picked = select_products(category_boards, existing_asins, args.limit)
+    if not picked:
+        print(f"{COLOR_WARNING}WARNING: No unpublished products with details left to export.{COLOR_RESET}", flush=True)
+        return
+    print(f"{COLOR_INFO}INFO: Exporting {len(picked)} products.{COLOR_RESET}", flush=True)
+
+    copies = write_copy([product for _, product in picked], config)
+    rows = bulk_rows(picked, copies, category_boards)
+    written = write_chunks(rows, args.output_dir or config["output_dir"], config["rows_per_file"])
+    for path, chunk in written:
+        print(f"{COLOR_SUCCESS}SUCCESS: Wrote {len(chunk)} pins to {path}.{COLOR_RESET}", flush=True)
+    if not args.dry_run:
+        mark_exported(picked, [path for path, chunk in written for _ in chunk])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+import argparse
+import decimal
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import zlib
+
+from settings import get_setting, rebase_url, DEFAULT_BASE_URLS
+
+try:
+    import msgpack # Optional: binary catalog format
+except ImportError:
+    msgpack = None
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+COLOR_WARNING = "\033[93m" # Yellow
+
+# Catalogs always hold the real hosts, whichever hosts are configured to be fetched from
+# (see settings.get_base_url); a stage rebases a URL only when it navigates or downloads
+AMAZON_BASE_URL = DEFAULT_BASE_URLS["amazon"]
+AMAZON_IMAGE_PREFIX = f"{DEFAULT_BASE_URLS['amazon_images']}/images/I/"
+AMAZON_IMAGE_SUFFIX = "._SX679_.jpg"
+CATALOG_FORMATS = ("pretty", "compact", "msgpack", "sharded")
+DEFAULT_FORMAT = "compact"
+CATALOG_EXTENSIONS = {"pretty": ".json", "compact": ".json", "msgpack": ".msgpack", "sharded": ".shards"}
+MANIFEST_FILE = "manifest.json"
+DEFAULT_SHARDS = 16
+
+IMAGE_URL_PATTERN = re.compile(re.escape(AMAZON_IMAGE_PREFIX) + r"([A-Za-z0-9%+\-]+)" + re.escape(AMAZON_IMAGE_SUFFIX) + "$")
+
+def extract_asin(url):
+    """Extracts the ASIN from an Amazon product URL, or returns None."""
+    match = re.search(r"/(?:dp|gp/product)/([A-Z0-9]{10})", url or "")
+    return match.group(1) if match else None
+
+def canonical_product_url(url):
+    """Reduces an Amazon product URL to <AMAZON_BASE_URL>/dp/<ASIN>, dropping ref=/dib= tracking."""
+    asin = extract_asin(url)
+    if asin:
+        return f"{AMAZON_BASE_URL}/dp/{asin}"
+    # Not a product URL we understand; at least drop the tracking query
+    return url.split("?", 1)[0].split("/ref=", 1)[0] if url else url
+
+def canonical_image_url(url):
+    """Moves an image URL seen on the configured image host back onto the real one catalogs store."""
+    live_prefix = rebase_url(AMAZON_IMAGE_PREFIX, "amazon_images")
+    if url and url.startswith(live_prefix):
+        return AMAZON_IMAGE_PREFIX + url[len(live_prefix):]
+    return url
+
+def image_id(url):
+    """Returns the bare image ID for a standard product image URL, or None."""
+    match = IMAGE_URL_PATTERN.match(url or "")
+    return match.group(1) if match else None
+
+def image_url(value):
+    """Expands a stored image ID back to its full URL; full URLs are returned unchanged."""
+    if value and "/" not in value:
+        return f"{AMAZON_IMAGE_PREFIX}{value}{AMAZON_IMAGE_SUFFIX}"
+    return value
+
+def parse_price_paise(price):
+    """Parses a displayed price like "47,999" or "₹1,299.50" into integer paise, or returns None."""
+    if isinstance(price, int):
+        return price * 100
+    cleaned = re.sub(r"[^0-9.]", "", str(price or "")).rstrip(".")
+    if not cleaned:
+        return None
+    try:
+        return int(decimal.Decimal(cleaned) * 100)
+    except decimal.InvalidOperation:
+        return None
+
+def format_price(paise):
+    """Formats integer paise back to the Indian display form, e.g. 4799900 -> "47,999"."""
+    rupees, fraction = divmod(int(paise), 100)
+    digits = str(rupees)
+    if len(digits) > 3:
+        head, tail = digits[:-3], digits[-3:]
+        head = ",".join(re.findall(r"\d{1,2}", head[::-1]))[::-1]
+        digits = f"{head},{tail}"
+    return f"{digits}.{fraction:02d}" if fraction else digits
+
+def compact_product(product):
+    """Returns the on-disk form of a product: canonical URL and image IDs instead of image URLs."""
+    stored = {}
+    for key, value in product.items():
+        if key == "product_url":
+            value = canonical_product_url(value)
+        elif key.startswith("image_url_"):
+            value = image_id(value) or value
+        stored[key] = value
+    return stored
+
+def expand_product(stored):
+    """Returns the in-memory form of a stored product with full image URLs."""
+    product = {}
+    for key, value in stored.items():
+        if key == "product_url":
+            value = canonical_product_url(value) # Older files still carry the tracking query
+        elif key.startswith("image_url_"):
+            value = image_url(value)
+        product[key] = value
+    if "price_paise" not in product and "product_price" in product:
+        product["price_paise"] = parse_price_paise(product["product_price"]) # Files written before prices were parsed at ingest
+    return product
+
+def catalog_format():
+    fmt = get_setting("catalog_format", DEFAULT_FORMAT)
+    if fmt == "msgpack" and msgpack is None:
+        print(f"{COLOR_WARNING}WARNING: msgpack is not installed. Falling back to the compact JSON catalog format.{COLOR_RESET}", flush=True)
+        return "compact"
+    return fmt if fmt in CATALOG_FORMATS else DEFAULT_FORMAT
+
+def category_file(category, fmt=None):
+    """Returns the catalog file (or, for the sharded format, folder) a category's products are stored in."""
+    fmt = fmt or catalog_format()
+    return category + CATALOG_EXTENSIONS[fmt]
+
+def _existing_path(file_path):
+    """Falls back to another format's path so switching catalog_format doesn't lose the old catalog."""
+    if os.path.exists(file_path):
+        return file_path
+    stem, _ = os.path.splitext(file_path)
+    for ext in (".json", ".msgpack", ".shards"):
+        if os.path.exists(stem + ext):
+            return stem + ext
+    return file_path
+
+def product_key(product):
+    """The ASIN of a product, or a digest of its URL for the rare listing without one."""
+    url = product.get("product_url", "")
+    return extract_asin(url) or "url-" + hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+
+def shard_of(key, shard_count):
+    # ASINs nearly all start with "B0", so buckets come from a hash of the whole ASIN rather than its prefix
+    return zlib.crc32(key.encode('utf-8')) % shard_count
+
+def _shard_name(index):
+    return f"shard-{index:02d}.json"
+
+def _load_sharded(folder):
+    """
+    Reassembles a sharded catalog in its original order. The manifest lists every
+    product's key in catalog order; each shard lists its products in that same order,
+    so the n-th occurrence of a key in the manifest is the n-th product with it in its shard.
+    """
+    try:
+        with open(os.path.join(folder, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"{folder} has no {MANIFEST_FILE}")
+    by_key = {}
+    for index in range(manifest["shards"]):
+        path = os.path.join(folder, _shard_name(index))
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for product in json.load(f):
+                by_key.setdefault(product_key(product), []).append(product)
+    products = []
+    for key in manifest["order"]:
+        queue = by_key.get(key)
+        if not queue:
+            raise ValueError(f"{folder}: product {key} is listed in the manifest but missing from its shard")
+        products.append(queue.pop(0))
+    return products
+
+def write_atomic(path, data):
+    """
+    Replaces a file with new content without ever leaving a half-written file behind:
+    the data goes to a temp file, is fsynced, and is renamed over the target.
+    """
+    tmp_path = f"{path}.tmp"
+    mode, kwargs = ('wb', {}) if isinstance(data, bytes) else ('w', {"encoding": "utf-8"})
+    with open(tmp_path, mode, **kwargs) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    try:
+        # Persist the rename itself; not supported on every platform
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass
+
+def _write_if_changed(path, data):
+    """Writes a text file only when its content differs, so untouched shards stay untouched."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    write_atomic(path, data)
+    return True
+
+def _save_sharded(products, folder, shard_count=None):
+    """Writes a sharded catalog, rewriting only the shards (and manifest) whose content changed."""
+    shard_count = shard_count or get_setting("catalog_shards", DEFAULT_SHARDS)
+    os.makedirs(folder, exist_ok=True)
+    keys = [product_key(p) for p in products]
+    shards = [[] for _ in range(shard_count)]
+    for key, product in zip(keys, products):
+        shards[shard_of(key, shard_count)].append(product)
+
+    # Shards first, manifest last: recover_catalog() can rebuild a manifest that a crash left stale
+    changed = 0
+    for index, shard in enumerate(shards):
+        changed += _write_if_changed(os.path.join(folder, _shard_name(index)), dumps_products(shard, "compact"))
+    for name in os.listdir(folder): # Shards left over from a larger shard count
+        if name.startswith("shard-") and name not in {_shard_name(i) for i in range(shard_count)}:
+            os.unlink(os.path.join(folder, name))
+    manifest = {"shards": shard_count, "count": len(products), "order": keys}
+    changed += _write_if_changed(os.path.join(folder, MANIFEST_FILE), json.dumps(manifest, indent=1) + "\n")
+    return changed
+
+def load_products(file_path):
+    """
+    Loads a product list from a catalog file in any supported format.
+    Raises FileNotFoundError if it doesn't exist and ValueError if it can't be decoded.
+    """
+    file_path = _existing_path(file_path)
+    if os.path.isdir(file_path):
+        return [expand_product(p) for p in _load_sharded(file_path)]
+    if file_path.endswith(".msgpack"):
+        if msgpack is None:
+            raise ValueError(f"msgpack is required to read {file_path}")
+        with open(file_path, 'rb') as f:
+            try:
+                data = msgpack.unpackb(f.read(), raw=False)
+            except Exception as e:
+                raise ValueError(f"Could not decode {file_path}: {e}") from e
+    else:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"Expected a list of products in {file_path}, got {type(data).__name__}")
+    return [expand_product(p) for p in data]
+
+def dumps_products(products, fmt):
+    """Serializes products in their on-disk form; returns str for JSON formats and bytes for msgpack."""
+    stored = [compact_product(p) for p in products]
+    if fmt == "msgpack":
+        return msgpack.packb(stored, use_bin_type=True)
+    if fmt == "pretty":
+        return json.dumps(stored, indent=4, ensure_ascii=False)
+    # One product per line keeps git diffs readable without the indent overhead
+    if not stored:
+        return "[]\n"
+    return "[\n" + ",\n".join(json.dumps(p, ensure_ascii=False, separators=(',', ':')) for p in stored) + "\n]\n"
+
+def save_products(products, file_path, fmt=None):
+    """Writes a product list to a catalog file; the format follows the file extension or config.json."""
+    if fmt is None:
+        fmt = catalog_format()
+        if file_path.endswith(".msgpack"):
+            fmt = "msgpack"
+        elif file_path.endswith(".shards"):
+            fmt = "sharded"
+        elif fmt in ("msgpack", "sharded"):
+            fmt = "compact" # A .json path always gets JSON
+    if fmt == "sharded":
+        _save_sharded(products, file_path)
+        return
+    write_atomic(file_path, dumps_products(products, fmt))
+
+def append_products(products, file_path):
+    """Appends products to a catalog file, creating it if it doesn't exist."""
+    try:
+        existing = load_products(file_path)
+    except FileNotFoundError:
+        existing = []
+    save_products(existing + products, file_path)
+
+class CatalogWriter:
+    """
+    Group-commits a catalog that is updated one product at a time.
+    Callers report every change with update(); the catalog is written once every
+    every_products changes or every_seconds, whichever comes first, and on flush()
+    or leaving the with block. A crash loses at most one group of updates, never the file.
+    """
+
+    def __init__(self, file_path, every_products=None, every_seconds=None):
+        settings = get_setting("catalog_commit", {})
+        self.file_path = file_path
+        self.every_products = every_products or settings.get("every_products", 20)
+        self.every_seconds = every_seconds or settings.get("every_seconds", 30)
+        self.products = None
+        self.pending = 0
+        self.commits = 0
+        self.last_commit = time.monotonic()
+
+    def update(self, products, changes=1):
+        """Records the current product list after `changes` modifications; commits if a threshold is reached."""
+        self.products = products
+        self.pending += changes
+        if self.pending >= self.every_products or time.monotonic() - self.last_commit >= self.every_seconds:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        if self.products is not None and self.pending:
+            save_products(self.products, self.file_path)
+            self.commits += 1
+        self.pending = 0
+        self.last_commit = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+def _salvage_lines(file_path):
+    """Recovers the products of a damaged compact catalog, which stores one product per line."""
+    products = []
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip().rstrip(',')
+            if line.startswith("{"):
+                try:
+                    products.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue # The torn line
+    return products
+
+def recover_catalog(file_path):
+    """
+    Startup check for a catalog: removes temp files left by an interrupted write and,
+    if the catalog can't be read, repairs it. A compact JSON file keeps every intact
+    product line; a sharded catalog gets its manifest rebuilt from the shards.
+    Returns the number of products recovered, or None if the catalog was fine.
+    """
+    file_path = _existing_path(file_path)
+    folder = file_path if os.path.isdir(file_path) else os.path.dirname(os.path.abspath(file_path))
+    stale = [f for f in os.listdir(folder) if f.endswith(".tmp")] if os.path.isdir(file_path) else \
+            ([os.path.basename(file_path) + ".tmp"] if os.path.exists(file_path + ".tmp") else [])
+    for name in stale:
+        os.unlink(os.path.join(folder, name)) # The rename never happened, so the old file is still whole
+    if not os.path.exists(file_path):
+        return None
+    try:
+        load_products(file_path)
+        return None
+    except (ValueError, FileNotFoundError) as e: # FileNotFoundError: a shard folder without its manifest
+        print(f"{COLOR_WARNING}WARNING: {file_path} is damaged ({e}). Recovering...{COLOR_RESET}", flush=True)
+
+    if os.path.isdir(file_path):
+        products = []
+        for name in sorted(os.listdir(file_path)):
+            if name.startswith("shard-"):
+                products.extend(_salvage_lines(os.path.join(file_path, name)))
+        try:
+            with open(os.path.join(file_path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                order = json.load(f).get("order", [])
+        except (FileNotFoundError, json.JSONDecodeError):
+            order = []
+        # Keep the old order for everything it still covers; anything else goes at the end.
+        # The n-th product with a key takes the key's n-th position, as in _load_sharded().
+        positions = {}
+        for i, key in enumerate(order):
+            positions.setdefault(key, []).append(i)
+        ranked = []
+        for product in products:
+            queue = positions.get(product_key(product))
+            ranked.append((queue.pop(0) if queue else len(order), product))
+        ranked.sort(key=lambda item: item[0])
+        products = [product for _, product in ranked]
+        _save_sharded(products, file_path)
+    elif file_path.endswith(".json"):
+        products = _salvage_lines(file_path)
+        save_products(products, file_path)
+    else:
+        raise ValueError(f"Can't recover {file_path}; restore it from git")
+    print(f"{COLOR_SUCCESS}SUCCESS: Recovered {len(products)} products into {file_path}.{COLOR_RESET}", flush=True)
+    return len(products)
+
+def _catalog_bytes(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+def convert_category(category, fmt):
+    """Rewrites one category's catalog in the given format and reports size and load time."""
+    source = _existing_path(category_file(category))
+    target = category_file(category, fmt)
+    before_bytes = _catalog_bytes(source)
+    started = time.perf_counter()
+    products = load_products(source)
+    before_load = time.perf_counter() - started
+
+    save_products(products, target, fmt)
+    if source != target:
+        shutil.rmtree(source) if os.path.isdir(source) else os.unlink(source)
+    after_bytes = _catalog_bytes(target)
+    started = time.perf_counter()
+    load_products(target)
+    after_load = time.perf_counter() - started
+
+    print(f"{COLOR_SUCCESS}SUCCESS: {source} -> {target} ({len(products)} products): "
+          f"{before_bytes / 1024:.0f} KB -> {after_bytes / 1024:.0f} KB ({before_bytes / max(1, after_bytes):.1f}x), "
+          f"load {before_load * 1000:.1f} ms -> {after_load * 1000:.1f} ms{COLOR_RESET}", flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert category catalogs between on-disk product formats.")
+    parser.add_argument("categories", nargs="*", help="Categories to convert (default: all)")
+    parser.add_argument("--format", choices=CATALOG_FORMATS, default=None, help="Target format (default: catalog_format in config.json)")
+    parser.add_argument("--merged-to", metavar="FOLDER", help="Instead of converting, write each catalog as one <category>.json into FOLDER")
+    args = parser.parse_args()
+
+    from scheduler import load_categories
+    fmt = args.format or catalog_format()
+    for category in args.categories or list(load_categories()):
+        if args.merged_to:
+            # A single-file view of a (possibly sharded) catalog for consumers that want one file
+            os.makedirs(args.merged_to, exist_ok=True)
+            target = os.path.join(args.merged_to, f"{category}.json")
+            products = load_products(category_file(category))
+            save_products(products, target, "pretty" if fmt == "pretty" else "compact")
+            print(f"{COLOR_SUCCESS}SUCCESS: Wrote {len(products)} products to {target}.{COLOR_RESET}", flush=True)
+        else:
+            convert_category(category, fmt)
+
+if __name__ == "__main__":
+    main()
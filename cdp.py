@@ -0,0 +1,316 @@
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+import os
+import struct
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+from selenium.common.exceptions import JavascriptException, NoSuchElementException, TimeoutException
+
+from navigation import navigate, navigation_settings
+
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_OP_CONTINUATION, _OP_TEXT, _OP_BINARY, _OP_CLOSE, _OP_PING, _OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+# Lifecycle event driver.get waits for under each page-load strategy ("none" doesn't wait)
+_LOAD_EVENTS = {"eager": "Page.domContentEventFired", "normal": "Page.loadEventFired"}
+
+class CdpError(Exception):
+    """An error response to a DevTools command."""
+
+class WebSocket:
+    """
+    The client side of RFC 6455 over asyncio streams, as much of it as DevTools needs:
+    text messages (fragmented or not), pings and close. Chrome is on localhost, so no TLS.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, url):
+        parts = urllib.parse.urlsplit(url)
+        host, port = parts.hostname, parts.port or 80
+        reader, writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f"GET {parts.path or '/'} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        await writer.drain()
+        status = await reader.readline()
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode()).digest()).decode()
+        if b" 101 " not in status or headers.get("sec-websocket-accept") != accept:
+            writer.close()
+            raise ConnectionError(f"WebSocket handshake with {url} failed: {status.decode('latin-1').strip()}")
+        return cls(reader, writer)
+
+    async def _send_frame(self, opcode, payload):
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([0x80 | length])
+        elif length < 1 << 16:
+            header += bytes([0x80 | 126]) + struct.pack("!H", length)
+        else:
+            header += bytes([0x80 | 127]) + struct.pack("!Q", length)
+        mask = os.urandom(4) # Clients must mask every frame
+        self.writer.write(header + mask + _apply_mask(payload, mask))
+        await self.writer.drain()
+
+    async def send(self, text):
+        await self._send_frame(_OP_TEXT, text.encode("utf-8"))
+
+    async def recv(self):
+        """Returns the next text message; answers pings and raises ConnectionError once the socket closes."""
+        message = bytearray()
+        while True:
+            first, second = await self.reader.readexactly(2)
+            opcode, length = first & 0x0F, second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+            mask = await self.reader.readexactly(4) if second & 0x80 else None
+            payload = await self.reader.readexactly(length)
+            if mask:
+                payload = _apply_mask(payload, mask)
+            if opcode == _OP_PING:
+                await self._send_frame(_OP_PONG, payload)
+            elif opcode == _OP_CLOSE:
+                raise ConnectionError("DevTools closed the connection")
+            elif opcode in (_OP_TEXT, _OP_BINARY, _OP_CONTINUATION):
+                message += payload
+                if first & 0x80: # FIN
+                    return message.decode("utf-8")
+
+    async def close(self):
+        try:
+            await self._send_frame(_OP_CLOSE, struct.pack("!H", 1000))
+        except (ConnectionError, RuntimeError):
+            pass
+        self.writer.close()
+
+def _apply_mask(payload, mask):
+    """XORs payload with the 4-byte mask a whole integer at a time."""
+    repeated = (mask * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(len(payload), "big")
+
+class CdpSession:
+    """
+    One DevTools connection: numbered commands matched to their responses, and events
+    handed to listeners. Everything runs on one event loop; see CdpBackend for the
+    thread-safe blocking wrapper the scripts use.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self._ids = itertools.count(1)
+        self._pending = {} # command id -> future
+        self._listeners = {} # event method -> [callback(params)]
+        self._reader = asyncio.get_running_loop().create_task(self._read_loop())
+
+    async def _read_loop(self):
+        try:
+            while True:
+                message = json.loads(await self.websocket.recv())
+                if "id" in message:
+                    future = self._pending.pop(message["id"], None)
+                    if future is None or future.done():
+                        continue
+                    if "error" in message:
+                        future.set_exception(CdpError(message["error"].get("message", "DevTools error")))
+                    else:
+                        future.set_result(message.get("result", {}))
+                else:
+                    for callback in self._listeners.get(message.get("method"), []):
+                        callback(message.get("params", {}))
+        except Exception as e: # Closed socket, or a message we couldn't handle: nothing more will arrive
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"DevTools connection lost: {e}"))
+            self._pending.clear()
+
+    async def send(self, method, params=None, timeout=30):
+        command_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = future
+        await self.websocket.send(json.dumps({"id": command_id, "method": method, "params": params or {}}))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(command_id, None)
+
+    def on(self, method, callback):
+        self._listeners.setdefault(method, []).append(callback)
+
+    async def close(self):
+        self._reader.cancel()
+        await self.websocket.close()
+
+def _http_json(url, timeout=5):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+def page_websocket_url(debugger_address, target_id=None):
+    """The DevTools websocket of a page target (by id, else the first page) of the Chrome at debugger_address."""
+    targets = [t for t in _http_json(f"http://{debugger_address}/json/list") if t.get("type") == "page"]
+    for target in targets:
+        if target_id is None or target["id"] == target_id:
+            return target["webSocketDebuggerUrl"]
+    raise ConnectionError(f"No page target {target_id or ''} at {debugger_address}")
+
+class CdpBackend:
+    """
+    The browser backend that talks DevTools directly over a websocket instead of going
+    through chromedriver's HTTP API. It attaches to a tab of a Chrome that chromedriver
+    started (so launching, stealth and the profile stay in setup_driver) and exposes the
+    same methods as browser_backend.SeleniumBackend. The asyncio loop runs on a private
+    thread; blocking methods submit to it, and evaluate_many pipelines many commands at once.
+    It also speaks enough of the WebDriver surface (get, refresh, execute_script,
+    set_page_load_timeout) for navigation.navigate to drive it like a driver.
+    """
+
+    name = "cdp"
+
+    def __init__(self, websocket_url):
+        self.page_load_timeout = navigation_settings()["deadline_seconds"]
+        self.load_event = _LOAD_EVENTS.get(navigation_settings()["page_load_strategy"])
+        self._status = None # HTTP status of the main document
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="cdp", daemon=True)
+        self._thread.start()
+        try:
+            self._run(self._open(websocket_url))
+        except Exception:
+            self._stop_loop()
+            raise
+
+    @classmethod
+    def attach(cls, driver):
+        """Attaches to the tab a Selenium Chrome driver is currently on."""
+        address = driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+        return cls(page_websocket_url(address, driver.current_window_handle))
+
+    async def _open(self, websocket_url):
+        self.session = CdpSession(await WebSocket.connect(websocket_url))
+        self._loaded = asyncio.Event()
+        if self.load_event:
+            self.session.on(self.load_event, lambda params: self._loaded.set())
+        self.session.on("Network.responseReceived", self._on_response)
+        await asyncio.gather(self.session.send("Page.enable"), self.session.send("Network.enable"))
+        self._main_frame = (await self.session.send("Page.getFrameTree"))["frameTree"]["frame"]["id"]
+
+    def _on_response(self, params):
+        if params.get("type") == "Document" and params.get("frameId") == self._main_frame:
+            self._status = params["response"].get("status")
+
+    def _run(self, coroutine, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    def command(self, method, params=None, timeout=30):
+        """Sends one DevTools command and returns its result."""
+        return self._run(self.session.send(method, params, timeout))
+
+    # --- The browser backend interface ---
+
+    def navigate(self, url, ready, label, deadline=None, required=False):
+        return navigate(self, url, ready, label, deadline, required)
+
+    def page_source(self):
+        return self.evaluate("return document.documentElement.outerHTML;")
+
+    def evaluate(self, script, *args):
+        """Runs script as a function body with `arguments`, like Selenium's execute_script, and returns its value."""
+        return self._run(self._evaluate(script, args))
+
+    def evaluate_many(self, calls):
+        """Runs many (script, args) pairs with their commands in flight together; returns their values in order."""
+        async def run_all():
+            return await asyncio.gather(*(self._evaluate(script, args) for script, args in calls))
+        return self._run(run_all())
+
+    async def _evaluate(self, script, args):
+        expression = f"(function() {{ {script} \n}}).apply(null, {json.dumps(list(args))})"
+        result = await self.session.send("Runtime.evaluate", {"expression": expression, "returnByValue": True, "awaitPromise": True})
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise JavascriptException(details.get("exception", {}).get("description") or details.get("text", "Script error"))
+        return result.get("result", {}).get("value")
+
+    def upload_files(self, selector, paths):
+        """Sets the files of the file input matching selector."""
+        async def upload():
+            root = (await self.session.send("DOM.getDocument", {"depth": 0}))["root"]["nodeId"]
+            node = (await self.session.send("DOM.querySelector", {"nodeId": root, "selector": selector}))["nodeId"]
+            if not node:
+                raise NoSuchElementException(f"No element matches '{selector}'")
+            await self.session.send("DOM.setFileInputFiles", {"nodeId": node, "files": [os.path.abspath(p) for p in paths]})
+        self._run(upload())
+
+    def document_status(self):
+        """HTTP status of the current page's main document, from the network events (None if unknown)."""
+        return self._status
+
+    def close(self):
+        """Disconnects; the browser and its tab stay open for Selenium."""
+        try:
+            self._run(self.session.close(), timeout=5)
+        except Exception:
+            pass
+        self._stop_loop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _stop_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+
+    # --- The WebDriver surface navigation.navigate uses ---
+
+    def set_page_load_timeout(self, seconds):
+        self.page_load_timeout = seconds
+
+    def get(self, url):
+        self._load("Page.navigate", {"url": url})
+
+    def refresh(self):
+        self._load("Page.reload", {})
+
+    def _load(self, method, params):
+        async def load():
+            self._loaded.clear()
+            self._status = None
+            result = await self.session.send(method, params)
+            if result.get("errorText"):
+                raise TimeoutException(f"{params.get('url', 'reload')}: {result['errorText']}")
+            if self.load_event:
+                await asyncio.wait_for(self._loaded.wait(), self.page_load_timeout)
+        started = time.monotonic()
+        try:
+            self._run(load())
+        except asyncio.TimeoutError:
+            raise TimeoutException(f"Page load took longer than {time.monotonic() - started:.0f}s")
+
+    def execute_script(self, script, *args):
+        # Chromedriver holds scripts back while a navigation commits; here the old context can vanish mid-call
+        for attempt in range(3):
+            try:
+                return self.evaluate(script, *args)
+            except CdpError:
+                if attempt == 2:
+                    raise
+                time.sleep(0.05)
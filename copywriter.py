@@ -0,0 +1,175 @@
+import argparse
+import html
+import re
+import time
+
+from settings import get_setting
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+
+TITLE_MAX_CHARS = 60
+SUMMARY_MAX_CHARS = 150
+
+COPY_MODE_LOCAL = "local"         # Never call the LLM
+COPY_MODE_FALLBACK = "fallback"   # LLM first; local copy when there is no key or a call fails
+COPY_MODE_PREFILTER = "prefilter" # Local copy first; the LLM only for what the rules couldn't do well
+COPY_MODES = (COPY_MODE_LOCAL, COPY_MODE_FALLBACK, COPY_MODE_PREFILTER)
+
+DEFAULTS = {
+    "mode": COPY_MODE_PREFILTER,
+    "min_summary_bullets": 2, # Bullet headlines a local summary needs to be good enough to skip the LLM
+}
+
+# The same character set post_pin allows in Gemini's output
+_ALLOWED_PUNCTUATION = (',', '.', '-', '!', '?')
+
+_RAM = re.compile(r"(\d+)\s*GB\s*RAM", re.I)
+_CAPACITY = re.compile(r"(\d+(?:\.\d+)?)\s*(GB|TB)\b(?!\s*RAM)", re.I)
+_FILLER = re.compile(r"\b(?:AI\s+)?(?:Smart\s*phone|Mobile\s+Phone|Mobile)s?\b", re.I)
+_SPEC_WORDS = re.compile(r"\b(?:RAM|ROM|Storage|GB|TB|MP|mAh|Hz|5G|4G)\b|\d", re.I)
+_HEADLINE_SPLIT = re.compile(r"\s+[—–-]\s+|:\s+")
+
+def copy_settings():
+    config = dict(DEFAULTS)
+    config.update(get_setting("copywriting", {}))
+    return config
+
+def sanitize(text):
+    text = "".join(char for char in text if char.isalnum() or char.isspace() or char in _ALLOWED_PUNCTUATION)
+    return re.sub(r"\s+", " ", text).strip(" ,-")
+
+def parse_specs(product_name):
+    """
+    Pulls brand, model, RAM, storage and colour out of an Amazon listing title such as
+    'iQOO Z10R 5G (Aquamarine, 8GB RAM, 128GB Storage) | 32MP ...' or 'Apple iPhone 15 (128 GB) - Black'.
+    Missing parts are None.
+    """
+    name = html.unescape(product_name or "")
+    # The model is everything before the first bracket, separator or capacity
+    base = re.split(r"[(|,:]|\s\d+\s*(?:GB|TB)\b", name, maxsplit=1, flags=re.I)[0]
+    base = re.split(r"\s+with\s+", base, maxsplit=1, flags=re.I)[0]
+    base = sanitize(_FILLER.sub("", base))
+
+    # Variant details live in parentheses or after a trailing dash; without them, in the title's first segment
+    parts = [p.strip() for group in re.findall(r"\(([^)]*)\)", name) for p in group.split(",")]
+    trailing = re.search(r"\s-\s*([A-Za-z][A-Za-z ]{1,25})$", name)
+    if trailing:
+        parts.append(trailing.group(1).strip())
+    variant = " ".join(parts)
+    if not _CAPACITY.search(variant):
+        variant += " " + name.split("|", 1)[0]
+
+    ram = _RAM.search(variant)
+    capacities = [(float(size) * (1024 if unit.upper() == "TB" else 1), f"{size}{unit.upper()}")
+                  for size, unit in _CAPACITY.findall(_RAM.sub("", variant))]
+    storage = max(capacities)[1] if capacities else None
+    if not ram and len(capacities) > 1:
+        ram_text = min(capacities)[1] # "(Titanium Gray, 12GB, 256GB Storage)": the smaller one is RAM
+    else:
+        ram_text = f"{ram.group(1)}GB" if ram else None
+    colour = next((p for p in parts if p and not _SPEC_WORDS.search(p)), None)
+
+    words = base.split()
+    return {
+        "brand": words[0] if words else None,
+        "model": base or None,
+        "ram": ram_text,
+        "storage": storage,
+        "colour": sanitize(colour) if colour else None,
+    }
+
+def make_title(product_name, max_chars=TITLE_MAX_CHARS):
+    """
+    Builds a pin title of at most max_chars from the parsed specs: model, RAM, storage, colour.
+    Returns (title, complete); complete is False when the model had to be cut, or no variant
+    details (RAM, storage, colour) were found to tell it apart from its siblings.
+    """
+    specs = parse_specs(product_name)
+    if not specs["model"]:
+        return _truncate_words(sanitize(html.unescape(product_name or "")), max_chars), False
+    parts = [specs["model"]]
+    if specs["ram"]:
+        parts.append(f"{specs['ram']} RAM")
+    if specs["storage"]:
+        parts.append(specs["storage"])
+    if specs["colour"]:
+        parts.append(specs["colour"])
+    # Drop from the least important end until it fits
+    while len(parts) > 1 and len(", ".join(parts)) > max_chars:
+        parts.pop()
+    title = ", ".join(parts)
+    if len(title) > max_chars:
+        return _truncate_words(title, max_chars), False
+    return title, bool(specs["storage"] or specs["ram"] or specs["colour"])
+
+def _headline(bullet):
+    """The lead phrase of a bullet ('Galaxy AI - Welcome to...' -> 'Galaxy AI'), or its first sentence."""
+    pieces = _HEADLINE_SPLIT.split(bullet, maxsplit=1)
+    lead = pieces[0] if len(pieces) > 1 and len(pieces[0]) <= 80 else re.split(r"(?<=[.!?])\s", bullet, maxsplit=1)[0]
+    lead = sanitize(lead.rstrip("*"))
+    if lead.isupper():
+        lead = lead.capitalize()
+    return lead
+
+def make_summary(product_details, max_chars=SUMMARY_MAX_CHARS):
+    """
+    Builds a summary of at most max_chars from the lead phrases of the top bullets.
+    Returns (summary, bullets used).
+    """
+    bullets = [html.unescape(re.sub(r"<[^>]+>", "", b)).strip() for b in re.split(r"</p>|\n", product_details or "")]
+    headlines = [h for h in (_headline(b) for b in bullets if b) if h]
+    summary, used = "", 0
+    for headline in headlines:
+        candidate = f"{summary}, {headline}" if summary else headline
+        if len(candidate) + 1 > max_chars: # Room for the closing full stop
+            break
+        summary, used = candidate, used + 1
+    if not summary and headlines:
+        return _truncate_words(headlines[0], max_chars), 1
+    return (summary.rstrip(".") + ".") if summary else "", used
+
+def _truncate_words(text, max_chars):
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - 3].rsplit(" ", 1)[0]
+    return cut.rstrip(" ,-") + "..."
+
+def local_copy(product_name, product_details, config=None):
+    """
+    Title and summary for a pin without any network call. title_ok/summary_ok say whether
+    each is good enough to publish as is, which is what prefilter mode uses to skip the LLM.
+    """
+    config = config or copy_settings()
+    title, title_ok = make_title(product_name)
+    summary, bullets_used = make_summary(product_details)
+    return {
+        "title": title,
+        "summary": summary,
+        "title_ok": title_ok,
+        "summary_ok": bullets_used >= config["min_summary_bullets"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Preview the local pin titles and summaries for catalogued products.")
+    parser.add_argument("categories", nargs="*", help="Categories to preview (default: all)")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    from scheduler import load_categories
+    from catalog import category_file, load_products
+    for category in args.categories or list(load_categories()):
+        products = load_products(category_file(category))
+        config = copy_settings()
+        started = time.perf_counter()
+        copies = [local_copy(p.get("product_name", ""), p.get("product_details", ""), config) for p in products]
+        per_product_us = (time.perf_counter() - started) / max(1, len(products)) * 1e6
+        good = sum(c["title_ok"] and c["summary_ok"] for c in copies)
+        print(f"{COLOR_INFO}INFO: '{category}': {good}/{len(products)} products need no LLM call; {per_product_us:.0f} us per product.{COLOR_RESET}", flush=True)
+        for copy in copies[:args.limit]:
+            print(f"{COLOR_SUCCESS}{copy['title']}{COLOR_RESET}  ({len(copy['title'])})\n    {copy['summary']}  ({len(copy['summary'])})", flush=True)
+
+if __name__ == "__main__":
+    main()
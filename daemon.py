@@ -0,0 +1,332 @@
+import argparse
+import json
+import os
+import signal
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from settings import get_setting
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+COLOR_WARNING = "\033[93m" # Yellow
+COLOR_ERROR = "\033[91m"   # Red
+COLOR_STEP = "\033[96m"    # Cyan
+
+DAEMON_STATE_FILE = "daemon_state.json"
+
+DEFAULTS = {
+    "host": "127.0.0.1",
+    "port": 8780,
+    "intervals": {          # Seconds between the starts of two runs of a job; 0 disables it
+        "crawl": 30 * 86400,
+        "enrich": 86400,
+        "post": 3600,
+    },
+    "browser_max_jobs": 24,          # Recycle a browser after this many jobs...
+    "browser_max_age_seconds": 6 * 3600, # ...or once it is this old
+}
+
+def daemon_settings():
+    config = dict(DEFAULTS)
+    config.update(get_setting("daemon", {}))
+    config["intervals"] = {**DEFAULTS["intervals"], **config.get("intervals", {})}
+    return config
+
+class WarmBrowser:
+    """One browser kept open between jobs, with the bookkeeping the recycling policy needs."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.started_at = time.time()
+        self.jobs = 0
+
+    def too_old(self, max_age_seconds):
+        return time.time() - self.started_at >= max_age_seconds
+
+    def alive(self):
+        try:
+            self.driver.current_url # Any round trip to chromedriver
+            return True
+        except Exception:
+            return False
+
+class BrowserPool:
+    """
+    Idle browsers of one kind (crawl, enrich or post), handed out to jobs and
+    taken back afterwards. Browsers are recycled when they die, fail a job, or
+    reach the job-count or age limit, and are only launched when none is idle.
+    """
+
+    def __init__(self, name, launch, max_jobs, max_age_seconds):
+        self.name = name
+        self.launch = launch
+        self.max_jobs = max_jobs
+        self.max_age_seconds = max_age_seconds
+        self.idle = []
+        self.lent = {} # id(driver) -> WarmBrowser
+        self.launched = 0
+        self.recycled = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            while self.idle:
+                browser = self.idle.pop()
+                if not browser.too_old(self.max_age_seconds) and browser.alive():
+                    self.lent[id(browser.driver)] = browser
+                    return browser.driver
+                self._quit(browser) # Aged out while idle, or died
+        print(f"{COLOR_STEP}[daemon] Launching a new '{self.name}' browser...{COLOR_RESET}", flush=True)
+        browser = WarmBrowser(self.launch())
+        with self._lock:
+            self.launched += 1
+            self.lent[id(browser.driver)] = browser
+        return browser.driver
+
+    def release(self, driver, failed=False):
+        with self._lock:
+            browser = self.lent.pop(id(driver), None)
+            if browser is None:
+                return
+            browser.jobs += 1
+            worn_out = browser.jobs >= self.max_jobs or browser.too_old(self.max_age_seconds)
+            if failed or worn_out or not browser.alive():
+                self._quit(browser)
+            else:
+                self.idle.append(browser)
+
+    def reap_idle(self):
+        """Quits idle browsers past the age limit, so they don't sit on memory until their next job; returns how many."""
+        with self._lock:
+            old = [browser for browser in self.idle if browser.too_old(self.max_age_seconds)]
+            self.idle = [browser for browser in self.idle if browser not in old]
+            for browser in old:
+                self._quit(browser)
+        return len(old)
+
+    def release_all(self, failed=False):
+        for driver_id in list(self.lent):
+            self.release(self.lent[driver_id].driver, failed=failed)
+
+    def _quit(self, browser):
+        self.recycled += 1
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass # Already gone
+
+    def close(self):
+        with self._lock:
+            for browser in self.idle + list(self.lent.values()):
+                self._quit(browser)
+            self.idle, self.lent = [], {}
+
+    def metrics(self):
+        with self._lock:
+            return {"idle": len(self.idle), "in_use": len(self.lent), "launched": self.launched, "recycled": self.recycled}
+
+def _launch_post_browser():
+    import post_pin
+    driver = post_pin.setup_driver(post_pin.headless)
+    try:
+        post_pin.login_to_pinterest(driver, post_pin.PINTEREST_EMAIL, post_pin.PINTEREST_PASSWORD)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+def _launch_crawl_browser():
+    import scrape_products
+    return scrape_products.setup_driver(scrape_products.headless)
+
+def _launch_enrich_browser():
+    import scrape_details
+    return scrape_details.setup_driver(scrape_details.headless)
+
+def _run_crawl(pool):
+    import scrape_products
+    return scrape_products.main(setup_worker=pool.acquire, teardown_worker=pool.release)
+
+def _run_enrich(pool):
+    import scrape_details
+    return scrape_details.scrape_product_details(setup_worker=pool.acquire, teardown_worker=pool.release)
+
+def _run_post(pool):
+    import post_pin
+    driver = pool.acquire()
+    published = post_pin.main(driver=driver)
+    pool.release(driver) # Failures raise (timeouts as SystemExit); run_job counts them and recycles the browser
+    return published
+
+JOBS = {
+    "crawl": (_launch_crawl_browser, _run_crawl),
+    "enrich": (_launch_enrich_browser, _run_enrich),
+    "post": (_launch_post_browser, _run_post),
+}
+
+class Daemon:
+    """
+    Runs the crawl, enrichment and posting jobs on their own intervals from one
+    long-lived process, reusing warm browsers between runs. Jobs run one at a
+    time; last run times are persisted so a restart doesn't rerun everything.
+    """
+
+    def __init__(self, config=None, state_file=DAEMON_STATE_FILE):
+        self.config = config or daemon_settings()
+        self.state_file = state_file
+        self.started_at = time.time()
+        self.stop_event = threading.Event()
+        self.current_job = None
+        self.pools = {name: BrowserPool(name, launch, self.config["browser_max_jobs"], self.config["browser_max_age_seconds"])
+                      for name, (launch, _) in JOBS.items()}
+        self.stats = {name: {"runs": 0, "failures": 0, "last_started_at": None, "last_duration_seconds": None, "last_error": None}
+                      for name in JOBS}
+        self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        for name, saved in state.items():
+            if name in self.stats:
+                self.stats[name]["last_started_at"] = saved.get("last_started_at")
+
+    def _save_state(self):
+        tmp_path = self.state_file + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({name: {"last_started_at": s["last_started_at"]} for name, s in self.stats.items()}, f, indent=4)
+        os.replace(tmp_path, self.state_file)
+
+    def next_due(self, name):
+        interval = self.config["intervals"].get(name, 0)
+        if not interval:
+            return None
+        last = self.stats[name]["last_started_at"]
+        return time.time() if last is None else last + interval
+
+    def run_job(self, name):
+        pool = self.pools[name]
+        stats = self.stats[name]
+        stats["last_started_at"] = time.time()
+        self._save_state()
+        self.current_job = name
+        print(f"\n{COLOR_STEP}[daemon] Starting job '{name}'...{COLOR_RESET}", flush=True)
+        failed = False
+        try:
+            JOBS[name][1](pool)
+            stats["last_error"] = None
+        except (Exception, SystemExit) as e: # The stage scripts sys.exit() on fatal timeouts
+            failed = True
+            stats["failures"] += 1
+            stats["last_error"] = f"{type(e).__name__}: {e}"
+            print(f"{COLOR_ERROR}[daemon] Job '{name}' failed: {stats['last_error']}{COLOR_RESET}", flush=True)
+            traceback.print_exc()
+        finally:
+            pool.release_all(failed=failed) # Anything a failed job didn't give back is suspect
+            self.current_job = None
+            stats["runs"] += 1
+            stats["last_duration_seconds"] = round(time.time() - stats["last_started_at"], 1)
+        if not failed:
+            print(f"{COLOR_SUCCESS}[daemon] Job '{name}' finished in {stats['last_duration_seconds']}s.{COLOR_RESET}", flush=True)
+
+    def loop(self):
+        while not self.stop_event.is_set():
+            due = {name: self.next_due(name) for name in JOBS}
+            due = {name: at for name, at in due.items() if at is not None}
+            if not due:
+                print(f"{COLOR_WARNING}[daemon] Every job is disabled. Exiting.{COLOR_RESET}", flush=True)
+                return
+            name = min(due, key=due.get)
+            wait = due[name] - time.time()
+            if wait > 0:
+                for pool in self.pools.values():
+                    pool.reap_idle()
+                self.stop_event.wait(min(wait, 60)) # Wake up regularly so a stop is noticed quickly
+                continue
+            self.run_job(name)
+
+    def metrics(self):
+        from pacing import get_pacer
+        from navigation import get_navigation_stats
+        from pin_builder import get_pin_builder_stats
+        return {
+            "status": "running" if not self.stop_event.is_set() else "stopping",
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "current_job": self.current_job,
+            "jobs": {name: {**s, "next_due_at": self.next_due(name)} for name, s in self.stats.items()},
+            "browsers": {name: pool.metrics() for name, pool in self.pools.items()},
+            "pacing": get_pacer("amazon").metrics(),
+            "navigation": get_navigation_stats().metrics(),
+            "pin_builder": get_pin_builder_stats().metrics(),
+        }
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+
+def serve_status(daemon, host, port):
+    """Serves /health and /metrics as JSON on a background thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/health":
+                body = {"status": "ok" if not daemon.stop_event.is_set() else "stopping",
+                        "uptime_seconds": round(time.time() - daemon.started_at, 1),
+                        "current_job": daemon.current_job}
+            elif self.path == "/metrics":
+                body = daemon.metrics()
+            else:
+                self.send_error(404)
+                return
+            data = json.dumps(body, indent=2).encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass # Keep health checks out of the job logs
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Run crawl, enrichment and posting on a schedule with warm browsers.")
+    parser.add_argument("--port", type=int, default=None, help="Health/metrics port (default: daemon.port in config.json)")
+    parser.add_argument("--once", choices=list(JOBS), help="Run one job now and exit")
+    args = parser.parse_args()
+
+    config = daemon_settings()
+    daemon = Daemon(config)
+    if args.once:
+        try:
+            daemon.run_job(args.once)
+        finally:
+            daemon.close()
+        return
+
+    server = serve_status(daemon, config["host"], args.port or config["port"])
+    print(f"{COLOR_INFO}[daemon] Health and metrics on http://{config['host']}:{server.server_port}/health and /metrics{COLOR_RESET}", flush=True)
+    # SIGTERM from a service manager stops after the current job instead of killing the browsers mid-write
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop_event.set())
+    try:
+        daemon.loop()
+    except KeyboardInterrupt:
+        print(f"{COLOR_WARNING}[daemon] Interrupted. Shutting down...{COLOR_RESET}", flush=True)
+    finally:
+        daemon.stop_event.set()
+        server.shutdown()
+        daemon.close()
+        print(f"{COLOR_INFO}[daemon] Stopped.{COLOR_RESET}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import hashlib
+import math
+import time
+import zlib
+
+from settings import get_setting
+from catalog import product_key
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+
+DEFAULTS = {
+    "ttl_days": 30,                        # Details older than this are scraped again
+    "fingerprint_fields": ["product_name"], # Listing fields whose change means the details may be out of date
+}
+
+# Everything the enrichment stage adds to a product, which a re-crawl carries over
+DETAIL_KEYS = ("product_details", "details_from", "details_scraped_at", "details_fingerprint")
+# Marks the posting stage leaves on a product, which a re-crawl carries over too: whether it was
+# pinned, the bulk-upload file it went into, and the published pin its images duplicate
+POSTING_KEYS = ("published", "exported", "duplicate_of")
+
+REASON_MISSING = "missing"            # No details or no images yet
+REASON_LISTING_CHANGED = "listing_changed"
+REASON_EXPIRED = "expired"            # Older than the TTL, or never timestamped
+
+def refresh_settings():
+    config = dict(DEFAULTS)
+    config.update(get_setting("detail_refresh", {}))
+    return config
+
+def listing_fingerprint(product, fingerprint_fields=None):
+    """Short digest of the listing fields the details depend on."""
+    fields = fingerprint_fields or DEFAULTS["fingerprint_fields"]
+    data = "\x1f".join(" ".join(str(product.get(field) or "").split()).lower() for field in fields)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:12]
+
+def has_details(product):
+    return bool(product.get("product_details")) and bool(product.get("image_url_1"))
+
+def mark_details_scraped(product, scraped_at=None, fingerprint_fields=None):
+    """Records that the product's details now match its current listing."""
+    product["details_scraped_at"] = int(scraped_at or time.time())
+    product["details_fingerprint"] = product.get("listing_fingerprint") or listing_fingerprint(product, fingerprint_fields)
+
+def stamp_legacy_details(products, now=None, config=None):
+    """
+    Gives products enriched before details were timestamped a details_scraped_at spread evenly
+    over the last TTL (by a hash of their key), so they come due a few each day instead of
+    all on the first run. Returns how many products were stamped.
+    """
+    config = config or refresh_settings()
+    now = time.time() if now is None else now
+    stamped = 0
+    for product in products:
+        if has_details(product) and product.get("details_scraped_at") is None:
+            age = zlib.crc32(product_key(product).encode('utf-8')) % 10000 / 10000 * config["ttl_days"] * 86400
+            mark_details_scraped(product, now - age, config["fingerprint_fields"])
+            stamped += 1
+    return stamped
+
+def refresh_reason(product, now=None, config=None):
+    """Why a product's details need scraping (one of the REASON_* values), or None if they are fresh."""
+    config = config or refresh_settings()
+    if not has_details(product):
+        return REASON_MISSING
+    current = product.get("listing_fingerprint") or listing_fingerprint(product, config["fingerprint_fields"])
+    if product.get("details_fingerprint") and product["details_fingerprint"] != current:
+        return REASON_LISTING_CHANGED
+    scraped_at = product.get("details_scraped_at")
+    now = time.time() if now is None else now
+    if scraped_at is None or now - scraped_at > config["ttl_days"] * 86400:
+        return REASON_EXPIRED
+    return None
+
+def staleness(product, now=None, config=None):
+    """
+    Priority for re-scraping: products without details first, then changed listings,
+    then expired details by age. Fresh products score 0.
+    """
+    config = config or refresh_settings()
+    reason = refresh_reason(product, now, config)
+    if reason is None:
+        return 0.0
+    if reason == REASON_MISSING:
+        return math.inf
+    if reason == REASON_LISTING_CHANGED:
+        return 1e9
+    scraped_at = product.get("details_scraped_at")
+    now = time.time() if now is None else now
+    return 1e6 if scraped_at is None else (now - scraped_at) / 86400 # Untimestamped details predate this and go first
+
+def refresh_queue(products, now=None, config=None):
+    """Returns the products whose details need scraping, stalest first (catalog order breaks ties)."""
+    config = config or refresh_settings()
+    now = time.time() if now is None else now
+    scored = [(staleness(p, now, config), i, p) for i, p in enumerate(products)]
+    return [p for score, _, p in sorted((s for s in scored if s[0] > 0), key=lambda s: (-s[0], s[1]))]
+
+def carry_over_details(products, previous):
+    """
+    Copies details, images and posting marks from the previous catalog onto freshly crawled
+    products with the same key, so a re-crawl doesn't throw away enrichment that is still
+    valid or forget what was already pinned or exported.
+    previous is {key: [products]} (see index_by_key). Returns how many products got details.
+    """
+    carried = 0
+    for product in products:
+        candidates = previous.get(product_key(product))
+        if not candidates:
+            continue
+        old = candidates.pop(0)
+        for key in DETAIL_KEYS + POSTING_KEYS:
+            if key in old:
+                product[key] = old[key]
+        for key in [k for k in old if k.startswith("image_url_")]:
+            product[key] = old[key]
+        carried += has_details(product)
+    return carried
+
+def index_by_key(products):
+    """Groups products by key, keeping catalog order within a key."""
+    index = {}
+    for product in products:
+        index.setdefault(product_key(product), []).append(product)
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Show how fresh the product details of each category are.")
+    parser.add_argument("categories", nargs="*", help="Categories to check (default: all)")
+    args = parser.parse_args()
+
+    from scheduler import load_categories
+    from catalog import category_file, load_products
+    config = refresh_settings()
+    now = time.time()
+    for category in args.categories or list(load_categories()):
+        products = load_products(category_file(category))
+        stamped = stamp_legacy_details(products, now, config) # As the next enrich run will
+        if stamped:
+            print(f"{COLOR_INFO}INFO: '{category}': {stamped} products predate detail timestamps; the next enrich run spreads them over the TTL.{COLOR_RESET}", flush=True)
+        reasons = {}
+        for p in products:
+            reason = refresh_reason(p, now, config)
+            reasons[reason or "fresh"] = reasons.get(reason or "fresh", 0) + 1
+        summary = ", ".join(f"{count} {reason.replace('_', ' ')}" for reason, count in sorted(reasons.items()))
+        print(f"{COLOR_INFO}INFO: '{category}': {len(products)} products: {summary} (TTL {config['ttl_days']} days).{COLOR_RESET}", flush=True)
+
+if __name__ == "__main__":
+    main()
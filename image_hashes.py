@@ -0,0 +1,177 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from settings import get_setting
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_WARNING = "\033[93m" # Yellow
+
+IMAGE_HASHES_FILE = "image_hashes.json"
+
+DEFAULTS = {
+    "algorithm": "phash",      # "phash" (DCT, robust to re-encoding) or "dhash" (gradients, cheaper)
+    "duplicate_distance": 6,   # Max Hamming distance for two images to count as the same picture
+    "pin_match_fraction": 0.5, # Share of a pin's images that must match one published pin to flag it
+    "skip_duplicate_pins": True,
+}
+
+def image_settings():
+    config = dict(DEFAULTS)
+    config.update(get_setting("image_hashes", {}))
+    return config
+
+def _grayscale(path, size):
+    with Image.open(path) as img:
+        return np.asarray(img.convert("L").resize(size, Image.LANCZOS), dtype=np.float64)
+
+def _bits_to_int(bits):
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+def dhash(path):
+    """64-bit difference hash: whether each pixel of a 9x8 thumbnail is brighter than its right neighbour."""
+    pixels = _grayscale(path, (9, 8))
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+_DCT_32 = np.array([[np.cos(np.pi * (2 * x + 1) * u / 64) for x in range(32)] for u in range(32)])
+
+def phash(path):
+    """64-bit perceptual hash: low 8x8 DCT frequencies of a 32x32 thumbnail against their median."""
+    pixels = _grayscale(path, (32, 32))
+    low = (_DCT_32 @ pixels @ _DCT_32.T)[:8, :8].ravel()
+    return _bits_to_int(low > np.median(low[1:])) # The DC term would dominate the median
+
+HASHERS = {"phash": phash, "dhash": dhash}
+
+def _hash_file(job):
+    path, algorithm = job
+    try:
+        return HASHERS[algorithm](path)
+    except (OSError, ValueError):
+        return None # Unreadable or truncated download
+
+def hash_images(paths, algorithm=None, workers=None):
+    """Hashes image files in a process pool; returns one hash per path (None if it could not be read)."""
+    if Image is None:
+        print(f"{COLOR_WARNING}WARNING: Pillow is not installed. Skipping image hashing.{COLOR_RESET}", flush=True)
+        return [None] * len(paths)
+    algorithm = algorithm or image_settings()["algorithm"]
+    jobs = [(path, algorithm) for path in paths]
+    if len(jobs) <= 1:
+        return [_hash_file(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers or min(len(jobs), os.cpu_count() or 1)) as pool:
+        return list(pool.map(_hash_file, jobs))
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit hashes under Hamming distance.
+    Children are keyed by their distance to the parent, so by the triangle
+    inequality a radius search only descends into children whose key lies
+    within the radius of the query's distance to the parent.
+    """
+
+    def __init__(self):
+        self.root = None # [hash, values, {distance: child}]
+        self.size = 0
+
+    def add(self, value_hash, value):
+        self.size += 1
+        if self.root is None:
+            self.root = [value_hash, [value], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(value_hash, node[0])
+            if distance == 0:
+                node[1].append(value)
+                return
+            if distance not in node[2]:
+                node[2][distance] = [value_hash, [value], {}]
+                return
+            node = node[2][distance]
+
+    def search(self, query_hash, radius):
+        """Returns (distance, value) for every stored hash within the radius, closest first."""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(query_hash, node[0])
+            if distance <= radius:
+                found.extend((distance, value) for value in node[1])
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return sorted(found, key=lambda item: item[0])
+
+def dedupe_images(paths, hashes, max_distance):
+    """Keeps the first of every group of near-identical images; returns (kept paths, kept hashes)."""
+    kept_paths, kept_hashes = [], []
+    for path, value_hash in zip(paths, hashes):
+        if value_hash is not None and any(hamming(value_hash, h) <= max_distance for h in kept_hashes):
+            print(f"{COLOR_INFO}INFO: Dropping near-duplicate image {os.path.basename(path)}.{COLOR_RESET}", flush=True)
+            continue
+        kept_paths.append(path)
+        if value_hash is not None:
+            kept_hashes.append(value_hash)
+    return kept_paths, kept_hashes
+
+class PublishedImageIndex:
+    """Image hashes of every published pin (image_hashes.json), searchable through a BK-tree."""
+
+    def __init__(self, file_path=IMAGE_HASHES_FILE):
+        self.file_path = file_path
+        self.pins = {} # asin -> list of hashes
+        self.tree = BKTree()
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored = {}
+        for asin, hex_hashes in stored.items():
+            self._add(asin, [int(h, 16) for h in hex_hashes])
+
+    def _add(self, asin, hashes):
+        self.pins[asin] = hashes
+        for value_hash in hashes:
+            self.tree.add(value_hash, asin)
+
+    def find_matching_pin(self, hashes, max_distance, match_fraction):
+        """Returns the ASIN of a published pin sharing at least match_fraction of these images, or None."""
+        hashes = [h for h in hashes if h is not None]
+        if not hashes:
+            return None
+        matches = {}
+        for value_hash in hashes:
+            for asin in {asin for _, asin in self.tree.search(value_hash, max_distance)}:
+                matches[asin] = matches.get(asin, 0) + 1
+        for asin, count in sorted(matches.items(), key=lambda item: -item[1]):
+            if count / len(hashes) >= match_fraction:
+                return asin
+        return None
+
+    def add_pin(self, asin, hashes):
+        hashes = [h for h in hashes if h is not None]
+        if asin and hashes and asin not in self.pins:
+            self._add(asin, hashes)
+
+    def save(self):
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({asin: [f"{h:016x}" for h in hashes] for asin, hashes in self.pins.items()}, f, indent=4)
+        os.replace(tmp_path, self.file_path)
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from settings import get_setting
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+COLOR_WARNING = "\033[93m" # Yellow
+
+DEFAULTS = {
+    "width": 1000,          # Pinterest's recommended 2:3 pin size
+    "height": 1500,
+    "fit": "contain",       # "contain" scales down to fit the box; "pad" also fills it out to 2:3 with white
+    "quality": 85,
+    "cache_dir": "image_cache",
+    "cache_max_mb": 256,
+    # Expected upload processing time, added to the pin builder's upload deadline: scales with the bytes uploaded
+    "upload_bytes_per_second": 100000,
+    "min_settle_seconds": 3,
+    "max_settle_seconds": 15,
+}
+
+# Only these settings change the output image, so only these go into the cache key
+OUTPUT_SETTINGS = ("width", "height", "fit", "quality")
+
+def prep_settings():
+    config = dict(DEFAULTS)
+    config.update(get_setting("image_preprocessing", {}))
+    return config
+
+def settings_key(config):
+    """Short digest of the output settings, so changing them never serves stale cached images."""
+    relevant = {key: config[key] for key in OUTPUT_SETTINGS}
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True).encode('utf-8')).hexdigest()[:10]
+
+def cache_id(url):
+    """Returns the Amazon image ID of an image URL (size suffixes don't matter), or a digest of the URL."""
+    match = re.search(r"/images/I/([^./]+)", url or "")
+    return match.group(1) if match else hashlib.sha1((url or "").encode('utf-8')).hexdigest()[:16]
+
+def _process(job):
+    """Resizes, recompresses and strips metadata from one image; returns (bytes in, bytes out) or None."""
+    source, target, config = job
+    try:
+        with Image.open(source) as img:
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            img.thumbnail((config["width"], config["height"]), Image.LANCZOS) # Never upscales
+            if config["fit"] == "pad":
+                canvas = Image.new("RGB", (config["width"], config["height"]), "white")
+                canvas.paste(img, ((config["width"] - img.width) // 2, (config["height"] - img.height) // 2))
+                img = canvas
+            tmp_path = target + ".tmp"
+            # Saving without exif/icc_profile drops the camera and colour-profile metadata
+            img.save(tmp_path, "JPEG", quality=config["quality"], optimize=True, progressive=True)
+        os.replace(tmp_path, target)
+        return os.path.getsize(source), os.path.getsize(target)
+    except (OSError, ValueError):
+        return None
+
+def prepare_images(image_urls, temp_dir, download, workers=None):
+    """
+    Returns upload-ready local paths for a product's images, in order, plus their total size.
+    Images already in the cache under the same image ID and settings are neither downloaded
+    nor reprocessed. The rest are fetched concurrently with download(url, path) -> bool and
+    processed in a process pool. Without Pillow the raw downloads are returned as they are.
+    """
+    config = prep_settings()
+    key = settings_key(config)
+    cache_dir = os.path.abspath(config["cache_dir"]) # The browser's file input needs absolute paths
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Cached images are used as they are; the rest are downloaded concurrently
+    cached_paths, downloads = {}, []
+    for i, url in enumerate(image_urls):
+        target = os.path.join(cache_dir, f"{cache_id(url)}-{key}.jpg")
+        if Image is not None and os.path.exists(target):
+            os.utime(target) # Recently used images survive pruning
+            cached_paths[i] = target
+        else:
+            downloads.append((i, url, os.path.join(temp_dir, f"image_{i+1}.jpg"), target))
+    if downloads:
+        with ThreadPoolExecutor(max_workers=len(downloads)) as pool:
+            downloaded = list(pool.map(lambda d: download(d[1], d[2]), downloads))
+    else:
+        downloaded = []
+
+    targets, jobs = [], []
+    ok_downloads = {d[0]: d for d, ok in zip(downloads, downloaded) if ok}
+    for i in range(len(image_urls)):
+        if i in cached_paths:
+            targets.append(cached_paths[i])
+        elif i in ok_downloads:
+            _, _, raw_path, target = ok_downloads[i]
+            if Image is None:
+                targets.append(raw_path)
+            else:
+                targets.append(target)
+                jobs.append((raw_path, target, config))
+
+    cached = len(targets) - len(jobs)
+    if Image is None:
+        print(f"{COLOR_WARNING}WARNING: Pillow is not installed. Uploading images unprocessed.{COLOR_RESET}", flush=True)
+    elif jobs:
+        if len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers or min(len(jobs), os.cpu_count() or 1)) as pool:
+                results = list(pool.map(_process, jobs))
+        else:
+            results = [_process(jobs[0])]
+        for (raw_path, target, _), result in zip(jobs, results):
+            if result is None:
+                print(f"{COLOR_WARNING}WARNING: Could not process {raw_path}. Uploading it unprocessed.{COLOR_RESET}", flush=True)
+                targets[targets.index(target)] = raw_path
+        before = sum(r[0] for r in results if r)
+        after = sum(r[1] for r in results if r)
+        print(f"{COLOR_SUCCESS}SUCCESS: Processed {len(jobs)} images: {before / 1024:.0f} KB -> {after / 1024:.0f} KB.{COLOR_RESET}", flush=True)
+    if cached:
+        print(f"{COLOR_INFO}INFO: Reused {cached} preprocessed images from '{config['cache_dir']}'.{COLOR_RESET}", flush=True)
+
+    prune_cache(config)
+    return targets, sum(os.path.getsize(p) for p in targets)
+
+def upload_settle_seconds(total_bytes):
+    """How long Pinterest can be expected to take processing uploads, scaled by their size."""
+    config = prep_settings()
+    seconds = total_bytes / config["upload_bytes_per_second"]
+    return min(config["max_settle_seconds"], max(config["min_settle_seconds"], seconds))
+
+def prune_cache(config=None):
+    """Removes the least recently used cached images once the cache is over its size cap."""
+    config = config or prep_settings()
+    folder = config["cache_dir"]
+    if not os.path.isdir(folder):
+        return 0
+    entries = [os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".jpg")]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    total, removed = 0, 0
+    for path in entries:
+        total += os.path.getsize(path)
+        if total > config["cache_max_mb"] * 1024 * 1024:
+            os.unlink(path)
+            removed += 1
+    return removed
@@ -1,5 +1,7 @@
 import json
 import re # Import the re module for regex operations
+from scheduler import load_categories
+from catalog import category_file, load_products
 
 # ANSI escape codes for colors
 COLOR_RESET = "\033[0m"
@@ -14,12 +16,7 @@ def count_products(json_file_path):
     products_without_details_and_images = 0
 
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            products = json.load(f) # Load the entire JSON array
-
-        if not isinstance(products, list):
-            print(f"{COLOR_RED}Error: Expected a JSON array in {json_file_path}, but got {type(products)}{COLOR_RESET}")
-            return
+        products = load_products(json_file_path) # Load the entire product list
 
         total_products = len(products)
 
@@ -49,8 +46,8 @@ def count_products(json_file_path):
     except FileNotFoundError:
         print(f"{COLOR_RED}Error: File not found at {json_file_path}{COLOR_RESET}")
         return
-    except json.JSONDecodeError as e:
-        print(f"{COLOR_RED}Error: Could not decode JSON from {json_file_path}. Details: {e}{COLOR_RESET}")
+    except ValueError as e:
+        print(f"{COLOR_RED}Error: Could not decode {json_file_path}. Details: {e}{COLOR_RESET}")
         return
     except Exception as e:
         print(f"{COLOR_RED}An unexpected error occurred: {e}{COLOR_RESET}")
@@ -65,10 +62,7 @@ def count_products(json_file_path):
 def count_published_mobile_phones(json_file_path):
     published_count = 0
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                if '"published": true' in line:
-                    published_count += 1
+        published_count = sum(1 for product in load_products(json_file_path) if product.get("published") == True)
     except FileNotFoundError:
         print(f"{COLOR_RED}Error: File not found at {json_file_path}{COLOR_RESET}")
         return
@@ -104,8 +98,14 @@ def count_asin_entries(json_file_path):
     print(f"{COLOR_MAGENTA}Total number of ASIN entries in {json_file_path}: {COLOR_YELLOW}{asin_count}{COLOR_RESET}")
     return asin_count
 
-if __name__ == "__main__":
-    count_products('mobile_phones.json')
-    print("="*90) # Separator for better readability
-    count_published_mobile_phones('mobile_phones.json')
+def main():
+    for category in load_categories():
+        print(f"{COLOR_MAGENTA}Category: {COLOR_YELLOW}{category}{COLOR_RESET}")
+        count_products(category_file(category))
+        print("="*90) # Separator for better readability
+        count_published_mobile_phones(category_file(category))
+        print("="*90)
     count_asin_entries('asin.json')
+
+if __name__ == "__main__":
+    main()
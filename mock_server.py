@@ -0,0 +1,417 @@
+import argparse
+import hashlib
+import html
+import json
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+
+# Local stand-in for Amazon search/product pages, product images, the Pinterest
+# login and pin-builder flow and the Gemini generateContent endpoint. Pages
+# reproduce the selectors and absolute XPaths the scripts rely on, so the real
+# stages can be load-tested end to end with PINZON_*_URL pointing here.
+
+BRANDS = {
+    "Samsung": ["Galaxy M35", "Galaxy A55", "Galaxy S24", "Galaxy F15"],
+    "Apple": ["iPhone 15", "iPhone 16", "iPhone 16 Pro"],
+    "Redmi": ["Note 14", "13C", "A4"],
+    "OnePlus": ["Nord CE4", "13R", "Nord 4"],
+    "realme": ["Narzo 70", "P3 Pro", "12x"],
+    "Vivo": ["T3 Lite", "Y28s", "V40"],
+    "Motorola": ["Edge 50", "G85", "G35"],
+    "iQOO": ["Z9s", "Neo 10R"],
+    "Nothing": ["Phone (3a)", "CMF Phone 1"],
+}
+COLORS = ["Black", "Blue", "Green", "Silver", "Lavender", "Titanium"]
+STORAGE = [(4, 64), (6, 128), (8, 128), (8, 256), (12, 256)]
+FEATURES = [
+    "{brand} {model} with a {size}\" FHD+ AMOLED display and 120Hz refresh rate for smooth scrolling.",
+    "Powered by an octa-core processor with {ram} GB RAM and {storage} GB internal storage.",
+    "{mp}MP main camera with OIS and a {front}MP front camera for sharp selfies.",
+    "{battery}mAh battery with {watts}W fast charging to get you through the day.",
+    "5G ready with dual SIM, Wi-Fi 6 and Bluetooth 5.3.",
+    "IP54 splash and dust resistance with Gorilla Glass protection.",
+]
+
+def build_catalog(total, seed):
+    """Deterministically generates the mock product catalog (colour/storage variants share details and images)."""
+    rng = random.Random(seed)
+    models = [(brand, model) for brand, ms in BRANDS.items() for model in ms]
+    products = []
+    while len(products) < total:
+        brand, model = models[len(products) % len(models)]
+        generation = len(products) // len(models)
+        model_name = model if generation == 0 else f"{model} {generation + 1}G"
+        model_key = hashlib.sha1(f"{seed}:{brand}:{model_name}".encode()).hexdigest()
+        specs = {
+            "brand": brand, "model": model_name, "size": rng.choice(["6.1", "6.6", "6.7"]),
+            "mp": rng.choice([48, 50, 64, 108]), "front": rng.choice([8, 16, 32]),
+            "battery": rng.choice([4500, 5000, 6000]), "watts": rng.choice([18, 33, 67, 80]),
+        }
+        shared_images = [f"7{model_key[i * 8:i * 8 + 9]}L" for i in range(3)]
+        base_price = rng.randrange(7000, 120000, 500)
+        for ram, storage in rng.sample(STORAGE, 2):
+            for color in rng.sample(COLORS, 2):
+                if len(products) >= total:
+                    break
+                asin = "B0" + hashlib.sha1(f"{model_key}:{ram}:{storage}:{color}".encode()).hexdigest()[:8].upper()
+                bullets = [f.format(ram=ram, storage=storage, **specs) for f in FEATURES]
+                own_image = f"6{hashlib.sha1(asin.encode()).hexdigest()[:9]}L"
+                products.append({
+                    "asin": asin,
+                    "name": f"{brand} {model_name} ({color}, {ram}GB RAM, {storage}GB Storage) | {specs['mp']}MP Camera | {specs['battery']}mAh Battery",
+                    "price": base_price + (storage // 128) * 2000,
+                    "bullets": bullets,
+                    "images": [own_image] + shared_images,
+                })
+    return products
+
+class XPathTree:
+    """
+    Builds HTML in which given absolute XPaths resolve to given elements.
+    Missing lower-index siblings are filled with empty elements so that
+    e.g. div[49] really is the 49th div child.
+    """
+
+    def __init__(self, tag="body"):
+        self.tag = tag
+        self.attrs = ""
+        self.content = ""
+        self.children = {} # (tag, index) -> XPathTree
+
+    def add(self, path, attrs="", content=""):
+        node = self
+        for step in path.strip("/").split("/"):
+            match = re.match(r"([a-z0-9]+)(?:\[(\d+)\])?$", step)
+            tag, index = match.group(1), int(match.group(2) or 1)
+            node = node.children.setdefault((tag, index), XPathTree(tag))
+        node.attrs += attrs
+        node.content += content
+        return node
+
+    def render(self):
+        parts = [f"<{self.tag}{self.attrs}>"]
+        tags = []
+        for tag, _ in self.children:
+            if tag not in tags:
+                tags.append(tag)
+        for tag in tags:
+            highest = max(index for t, index in self.children if t == tag)
+            for index in range(1, highest + 1):
+                child = self.children.get((tag, index))
+                parts.append(child.render() if child else f"<{tag}></{tag}>")
+        parts.append(self.content)
+        if self.tag not in ("input", "img"):
+            parts.append(f"</{self.tag}>")
+        return "".join(parts)
+
+def png_bytes(width, height, key):
+    """Encodes a simple two-colour block pattern derived from key as a PNG."""
+    digest = hashlib.sha256(key.encode()).digest()
+    color_a, color_b = digest[0:3], digest[3:6]
+    bands = 2 + digest[6] % 6
+    half = width // 2
+    rows = [b"\x00" + color_a * half + color_b * (width - half), b"\x00" + color_b * half + color_a * (width - half)]
+    raw = b"".join(rows[(y * bands // height) % 2] for y in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b""))
+
+@lru_cache(maxsize=512)
+def cached_image(width, image_id):
+    return png_bytes(width, width, image_id)
+
+class MockState:
+    """Configuration, catalog and counters shared by all request handlers."""
+
+    def __init__(self, args):
+        self.args = args
+        self.base_url = f"http://{args.host}:{args.port}"
+        self.products = build_catalog(args.products, args.seed)
+        self.by_asin = {p["asin"]: p for p in self.products}
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.pins = []
+
+    def count(self, key):
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def roll(self, rate):
+        with self.lock:
+            return self.rng.random() < rate
+
+    def image_url(self, image_id, suffix="_SX679_"):
+        return f"{self.base_url}/images/I/{image_id}.{suffix}.jpg"
+
+def page_shell(title, body):
+    return f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title></head>{body}</html>"
+
+CAPTCHA_PAGE = page_shell("Amazon.in", """<body><div class="a-container">
+<h4>Enter the characters you see below</h4>
+<p>Sorry, we just need to make sure you're not a robot. For best results, please make sure your browser is accepting cookies.</p>
+<form method="get" action="/errors/validateCaptcha"><input type="text" name="field-keywords"><button type="submit">Continue shopping</button></form>
+</div></body>""")
+
+def render_search_page(state, query):
+    per_page = state.args.per_page
+    page_num = int(query.get("page", ["1"])[0])
+    last_page = max(1, -(-len(state.products) // per_page))
+    items = state.products[(page_num - 1) * per_page:page_num * per_page]
+    base_query = "&".join(f"{k}={v[0]}" for k, v in query.items() if k != "page")
+
+    results = []
+    for rank, product in enumerate(items, start=(page_num - 1) * per_page + 1):
+        if rank % 7 == 1:
+            # A sponsored slot in front of every seventh organic result
+            results.append(f"""<div data-component-type="s-search-result" data-asin="{product['asin']}"><h2 class="a-size-base-plus a-spacing-none a-color-base a-text-normal" aria-label="Sponsored Ad - {html.escape(product['name'])}"><span>{html.escape(product['name'])}</span></h2></div>""")
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", product["name"])[:60].strip("-")
+        href = f"/{slug}/dp/{product['asin']}/ref=sr_1_{rank}?dib=eyJ2IjoiMSJ9.{hashlib.sha1(product['asin'].encode()).hexdigest() * 6}&dib_tag=se&qid={int(time.time())}&sr=1-{rank}"
+        whole = f"{product['price']:,}"
+        results.append(f"""<div data-component-type="s-search-result" data-asin="{product['asin']}">
+<a class="a-link-normal s-no-outline" href="{html.escape(href)}"><img class="s-image" src="{state.image_url(product['images'][0], '_AC_UY218_')}"></a>
+<h2 class="a-size-base-plus a-spacing-none a-color-base a-text-normal" aria-label="{html.escape(product['name'])}"><span>{html.escape(product['name'])}</span></h2>
+<span class="a-price"><span class="a-price-whole">{whole}</span></span></div>""")
+
+    if items:
+        if page_num < last_page:
+            next_control = f'<a class="s-pagination-item s-pagination-next s-pagination-button s-pagination-separator" href="/s?{base_query}&page={page_num + 1}">Next</a>'
+        else:
+            next_control = '<span class="s-pagination-item s-pagination-next s-pagination-disabled " aria-disabled="true">Next</span>'
+        pagination = f'<div class="s-pagination-strip"><span class="s-pagination-item s-pagination-selected">{page_num}</span>{next_control}</div>'
+    else:
+        pagination = '<div class="s-no-outline"><span>No results for your search query.</span></div>'
+    return page_shell("Amazon.in : Mobiles", f'<body><div class="s-main-slot s-result-list s-search-results">{"".join(results)}</div>{pagination}</body>')
+
+def render_product_page(state, product):
+    tree = XPathTree()
+    gallery = "/div[2]/div/div/div[5]/div[3]/div[1]/div[1]/div/div/div[2]/div[1]/div[1]/ul"
+    for i, image_id in enumerate(product["images"], start=1):
+        tree.add(f"{gallery}/li[{i}]/span/span/div", ' class="imgTagWrapper"', f'<img src="{state.image_url(image_id)}">')
+    tree.add("/div[2]/div/div/div[5]/div[3]/div[1]/div[2]", ' id="imgTagWrapperId" class="imgTagWrapper"',
+             f'<img id="landingImage" src="{state.image_url(product["images"][0])}">')
+    thumbs = "".join(
+        f'<li class="a-spacing-small item"><span class="a-button-text"><img src="{state.image_url(image_id, "_SS40_")}" '
+        f'onclick="document.getElementById(\'landingImage\').src=\'{state.image_url(image_id)}\'"></span></li>'
+        for image_id in product["images"])
+    thumbs += "".join(f'<div class="ivThumbImage" style=\'background: url("{state.image_url(image_id)}")\'></div>' for image_id in product["images"])
+    tree.add("/div[2]/div/div/div[5]/div[3]/div[2]", ' id="altImages"', f'<ul>{thumbs}</ul>')
+    bullets = "".join(f"<li><span class=\"a-list-item\">{html.escape(b)}</span></li>" for b in product["bullets"])
+    tree.add("/div[2]/div/div/div[5]/div[4]/div[1]", ' id="titleSection"', f'<span id="productTitle">{html.escape(product["name"])}</span>')
+    tree.add("/div[2]/div/div/div[5]/div[4]/div[49]/div", ' id="feature-bullets"', f'<ul class="a-unordered-list a-vertical">{bullets}</ul>')
+    color_images = json.dumps({"initial": [{"hiRes": state.image_url(image_id, "_SL1500_"), "large": state.image_url(image_id, "_AC_")} for image_id in product["images"]]}, separators=(",", ":"))
+    tree.content += f"<script>var data = {{'colorImages': {color_images}}};</script>"
+    return page_shell(product["name"], tree.render())
+
+# Pin-builder page: the ids, data-test-ids and absolute XPaths post_pin.py looks for
+PIN_BUILDER_ROOT = "/div[1]/div[1]/div/div[3]/div/div/div/div[2]/div[2]/div/div/div/div/div/div/div/div/div"
+PIN_BUILDER_SCRIPT = """
+<script>
+function q(s){return document.querySelector(s);}
+function uploaded(input){
+  var n = input.files.length;
+  document.body.setAttribute('data-uploaded', n);
+  q('[data-test-id="upload-progress"]').textContent = 'done';
+  if (n > 1) { var d = q('#carousel-dialog'); d.style.display = 'block'; d.focus(); }
+}
+function closeDialog(){ q('#carousel-dialog').style.display = 'none'; }
+function openBoards(){ q('#board-picker').style.display = 'block'; }
+function pickBoard(el){ q('#selected-board').textContent = el.getAttribute('data-board'); q('#board-picker').style.display = 'none'; }
+function publish(){
+  var desc = q('[id^="pin-draft-description"]').textContent || q('#single-image-description').textContent;
+  var body = JSON.stringify({
+    title: q('[id^="pin-draft-title"]').value, description: desc,
+    alt_text: q('[id^="pin-draft-alttext"]').value, link: q('[id^="pin-draft-link"]').value,
+    board: q('#selected-board').textContent, images: parseInt(document.body.getAttribute('data-uploaded') || '0')
+  });
+  fetch('/__mock/pins', {method: 'POST', body: body}).then(r => r.json()).then(function(pin){
+    var toast = q('[data-test-id="pin-created-toast"]');
+    toast.innerHTML = 'Saved to ' + pin.board + ' <a href="/pin/' + pin.id + '/">See it now</a>';
+    toast.style.display = 'block';
+  });
+}
+</script>"""
+
+def render_pin_builder(state):
+    tree = XPathTree()
+    root = tree.add(PIN_BUILDER_ROOT)
+    right = "/div[2]/div/div[2]/div/div[1]/div[1]"
+    root.add("/div[1]/div/div[2]/div/div/div/div[1]/div", ' role="button" tabindex="0" data-test-id="board-dropdown-select-button" onclick="openBoards()" style="padding:4px"',
+             '<span id="selected-board">Choose a board</span>')
+    root.add("/div[1]/div/div[2]/div/div/div/div[2]", ' role="button" tabindex="0" data-test-id="board-dropdown-save-button" onclick="publish()" style="padding:4px"', 'Publish')
+    boards = "".join(f'<div data-test-id="board-row-{html.escape(b)}" data-board="{html.escape(b)}" role="button" onclick="pickBoard(this)" style="padding:4px"><div>{html.escape(b)}</div></div>'
+                     for b in state.args.boards)
+    root.add("/div[2]/div/div[1]", "", '<input type="file" multiple id="media-upload-input-0f3a" onchange="uploaded(this)"><span data-test-id="upload-progress"></span>')
+    root.add(f"{right}/div[1]", "", '<input type="text" id="pin-draft-title-0f3a" placeholder="Add a title">')
+    root.add(f"{right}/div[2]", "", '<div id="pin-draft-description-0f3a" contenteditable="true" style="min-height:20px"></div>')
+    root.add(f"{right}/div[3]/div/div[1]/div/div/div[1]/div/div/div/div/div/div/div[2]/div/div/div/div", ' id="single-image-description" contenteditable="true" style="min-height:20px"')
+    root.add(f"{right}/div[4]/div/button", ' type="button" data-test-id="pin-draft-alt-text-button"', 'Add alt text')
+    root.add(f"{right}/div[5]", "", '<input type="text" id="pin-draft-alttext-0f3a"><input type="text" id="pin-draft-link-0f3a">'
+                                   '<input type="checkbox" id="pin-draft-carousel-control">')
+    tree.content += (f'<div id="board-picker" style="display:none">{boards}</div>'
+                     '<div id="carousel-dialog" tabindex="-1" role="dialog" style="display:none">'
+                     '<button onclick="this.setAttribute(\'aria-pressed\',\'true\')">Carousel</button><button>Collage</button>'
+                     '<button data-test-id="carousel-confirm" onclick="closeDialog()">Next</button></div>'
+                     '<div data-test-id="pin-created-toast" style="display:none"></div>' + PIN_BUILDER_SCRIPT)
+    return page_shell("Pin builder", tree.render())
+
+def render_pinterest_home(logged_in):
+    tree = XPathTree()
+    if logged_in:
+        tree.add("/div[1]/div[1]/div/div[3]/div/div/div/div[1]/div[2]/div/div/div/div[1]/div/div[1]/div/div[2]/div[1]/div[1]/h1/a", ' href="/affdeals/"', "Aff Deals")
+        return page_shell("Pinterest", tree.render())
+    tree.add("/div[1]/div[1]/header/div[2]/nav/div[2]/div[2]/button", ' type="button" onclick="document.getElementById(\'login\').style.display=\'block\'"', "Log in")
+    form = tree.add("/div[1]/div[1]/div[2]/div/div/div/div/div/div[4]/div[1]/form", ' id="login" style="display:none" onsubmit="document.cookie=\'mock_session=1; path=/\'; location.href=\'/\'; return false;"')
+    form.add("/div[1]", "", '<input id="email" type="email">')
+    form.add("/div[2]", "", '<input id="password" type="password">')
+    form.add("/div[7]/button", ' type="submit"', "Log in")
+    return page_shell("Pinterest", tree.render())
+
+def gemini_reply(prompt):
+    """Fake generateContent: returns the prompt's payload trimmed to the requested length."""
+    payload = prompt.split("\n\n", 1)[-1]
+    limit = 60 if "maximum 60 characters" in prompt else 150
+    text = re.sub(r"[^\w\s,.\-!?]", "", payload).strip()[:limit]
+    return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}]}
+
+class MockHandler(BaseHTTPRequestHandler):
+    state = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.state.args.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _delay(self):
+        args = self.state.args
+        if args.latency_ms or args.jitter_ms:
+            time.sleep(max(0, args.latency_ms + random.uniform(-args.jitter_ms, args.jitter_ms)) / 1000)
+
+    def do_GET(self):
+        state = self.state
+        parts = urlsplit(self.path)
+        path, query = parts.path, parse_qs(parts.query)
+        self._delay()
+
+        if path == "/s":
+            state.count("search")
+            if state.roll(state.args.block_rate):
+                state.count("blocked")
+                return self._send(200, CAPTCHA_PAGE)
+            if state.roll(state.args.empty_rate):
+                state.count("transient")
+                return self._send(200, page_shell("Amazon.in", "<body><div class='s-main-slot'></div></body>"))
+            return self._send(200, render_search_page(state, query))
+
+        match = re.search(r"/dp/([A-Z0-9]{10})", path)
+        if match:
+            state.count("product")
+            product = state.by_asin.get(match.group(1))
+            if product is None:
+                return self._send(404, page_shell("Not found", "<body>Page not found</body>"))
+            if state.roll(state.args.block_rate):
+                state.count("blocked")
+                return self._send(200, CAPTCHA_PAGE)
+            return self._send(200, render_product_page(state, product))
+
+        match = re.match(r"/images/I/([^./]+)\.(?:_[A-Z]+(\d+)_)?", path)
+        if match:
+            state.count("image")
+            size = min(int(match.group(2) or 679), state.args.max_image_size)
+            return self._send(200, cached_image(size, match.group(1)), content_type="image/png",
+                              headers={"Cache-Control": "max-age=86400"})
+
+        if path == "/":
+            state.count("pinterest_home")
+            return self._send(200, render_pinterest_home("mock_session=1" in self.headers.get("Cookie", "")))
+        if path.startswith("/pin-builder"):
+            state.count("pin_builder")
+            return self._send(200, render_pin_builder(state))
+        if path.startswith("/pin/"):
+            return self._send(200, page_shell("Pin", f"<body><div data-test-id='closeup-body'>Pin {html.escape(path)}</div></body>"))
+        if path == "/__mock/stats":
+            with state.lock:
+                stats = {"requests": dict(state.counters), "pins": list(state.pins)}
+            return self._send(200, json.dumps(stats, indent=2), content_type="application/json")
+        self._send(404, page_shell("Not found", "<body>Page not found</body>"))
+
+    def do_POST(self):
+        state = self.state
+        path = urlsplit(self.path).path
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+        self._delay()
+
+        if path == "/__mock/pins":
+            pin = json.loads(body or b"{}")
+            with state.lock:
+                pin["id"] = str(len(state.pins) + 1)
+                state.pins.append(pin)
+            state.count("pin_created")
+            return self._send(200, json.dumps(pin), content_type="application/json")
+        if re.match(r"/v1(beta)?/models/[^:]+:generateContent", path):
+            state.count("gemini")
+            request = json.loads(body or b"{}")
+            prompt = " ".join(part.get("text", "") for content in request.get("contents", []) for part in content.get("parts", []))
+            return self._send(200, json.dumps(gemini_reply(prompt)), content_type="application/json")
+        self._send(404, json.dumps({"error": "not found"}), content_type="application/json")
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock Amazon/Pinterest/Gemini server for offline load testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--products", type=int, default=400, help="Organic products in the search results")
+    parser.add_argument("--per-page", type=int, default=16, help="Organic products per search page")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random +/- latency per request")
+    parser.add_argument("--block-rate", type=float, default=0.0, help="Fraction of Amazon pages served as a captcha")
+    parser.add_argument("--empty-rate", type=float, default=0.0, help="Fraction of search pages served without results")
+    parser.add_argument("--max-image-size", type=int, default=1500, help="Largest image edge served, in pixels")
+    parser.add_argument("--boards", nargs="*", default=["Mobiles"], help="Board names offered in the pin builder")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    MockHandler.state = MockState(args)
+    server = ThreadingHTTPServer((args.host, args.port), MockHandler)
+    server.daemon_threads = True
+    base = MockHandler.state.base_url
+    print(f"{COLOR_SUCCESS}Mock server listening on {base} ({args.products} products, {args.per_page}/page).{COLOR_RESET}", flush=True)
+    print(f"{COLOR_INFO}Point the stages at it with:{COLOR_RESET}", flush=True)
+    for service in ("AMAZON", "AMAZON_IMAGES", "PINTEREST", "PINTEREST_APP", "GEMINI"):
+        print(f"  export PINZON_{service}_URL={base}", flush=True)
+    print(f"{COLOR_INFO}Request counters and created pins: {base}/__mock/stats{COLOR_RESET}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
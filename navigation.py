@@ -0,0 +1,265 @@
+import statistics
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from settings import get_setting
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_WARNING = "\033[93m" # Yellow
+
+DEFAULTS = {
+    # "eager" returns from driver.get at DOMContentLoaded instead of waiting for every ad, image
+    # and tracker; "none" returns immediately and leaves all waiting to the content selector
+    "page_load_strategy": "eager",
+    "deadline_seconds": 15,  # Per navigation; loading is stopped with window.stop() once it passes
+    "deadlines": {},         # Per-label overrides, e.g. {"product_page": 20}
+    "prefetch_depth": 1,     # Product pages loaded ahead in background tabs (0 disables, at most MAX_PREFETCH_DEPTH)
+}
+MAX_PREFETCH_DEPTH = 2 # Each prefetched page is a renderer's worth of memory and a request made early
+
+# What each stage actually needs from a page, as CSS selectors. Interstitials and captchas are
+# included so they are handed to the caller's handling right away instead of waiting out the deadline.
+SEARCH_PAGE_READY = ("div[data-component-type='s-search-result'], .s-pagination-strip, "
+                     "form[action*='validateCaptcha'], a[href*='ref=cs_503_link']")
+PRODUCT_PAGE_READY = ("#productTitle, #imgTagWrapperId, #altImages, "
+                      "form[action*='validateCaptcha'], button[alt='Continue shopping']")
+
+# Marks the outgoing document, so a selector can't be satisfied by the page being navigated away from
+_PREPARE_SCRIPT = """
+window.__pinzonNavigating = true;
+const t = performance.timing;
+return [t.navigationStart, t.domContentLoadedEventEnd, t.loadEventEnd];
+"""
+_READY_SCRIPT = "return !window.__pinzonNavigating && !!document.querySelector(arguments[0]);"
+
+def navigation_settings():
+    config = dict(DEFAULTS)
+    config.update(get_setting("navigation", {}))
+    return config
+
+def apply_page_load_strategy(options):
+    """Sets the configured page-load strategy on ChromeOptions before the driver is created."""
+    options.page_load_strategy = navigation_settings()["page_load_strategy"]
+    return options
+
+class NavigationStats:
+    """
+    Timings of every navigation, by label (search_page, product_page, ...).
+    content_seconds is how long it took until the needed element was there, which is
+    what the scrapers wait for. dom_seconds and load_seconds come from the page's
+    Navigation Timing once the browser leaves it; load_seconds is missing for pages
+    that were left (or stopped) before their load event, which is the point.
+    """
+
+    def __init__(self):
+        self.samples = {} # label -> {"content": [], "dom": [], "load": [], "deadlines": 0}
+        self._last_label = {} # id(driver) -> label of the page it is on
+        self._lock = threading.Lock()
+
+    def _label(self, label):
+        return self.samples.setdefault(label, {"content": [], "dom": [], "load": [], "deadlines": 0})
+
+    def record_content(self, driver, label, seconds, deadline_hit):
+        with self._lock:
+            samples = self._label(label)
+            samples["content"].append(seconds)
+            samples["deadlines"] += deadline_hit
+            self._last_label[id(driver)] = label
+
+    def record_previous(self, driver, timing):
+        """Records the Navigation Timing of the page a driver is leaving."""
+        with self._lock:
+            label = self._last_label.pop(id(driver), None)
+            if label is None or not timing or not timing[0]:
+                return
+            samples = self._label(label)
+            start, dom_end, load_end = timing
+            if dom_end:
+                samples["dom"].append((dom_end - start) / 1000)
+            if load_end:
+                samples["load"].append((load_end - start) / 1000)
+
+    def metrics(self):
+        def median(values):
+            return round(statistics.median(values), 2) if values else None
+        with self._lock:
+            return {label: {"navigations": len(s["content"]),
+                            "median_content_seconds": median(s["content"]),
+                            "median_dom_seconds": median(s["dom"]),
+                            "median_load_seconds": median(s["load"]),
+                            "full_loads": len(s["load"]),
+                            "deadlines_hit": s["deadlines"]}
+                    for label, s in self.samples.items()}
+
+    def report(self):
+        def seconds(value):
+            return "n/a" if value is None else f"{value}s"
+        for label, m in self.metrics().items():
+            print(f"{COLOR_INFO}INFO: [{label}] {m['navigations']} navigations, content in {seconds(m['median_content_seconds'])} "
+                  f"(DOM {seconds(m['median_dom_seconds'])}, full load {seconds(m['median_load_seconds'])} on {m['full_loads']} pages), "
+                  f"{m['deadlines_hit']} stopped at the deadline.{COLOR_RESET}", flush=True)
+
+_stats = NavigationStats()
+
+def get_navigation_stats():
+    """Returns the process-wide NavigationStats."""
+    return _stats
+
+def navigate(driver, url, ready, label, deadline=None, required=False):
+    """
+    Loads url (or reloads the current page when url is None) and waits only until the
+    `ready` CSS selector matches on the new document. Whatever is still loading when the
+    deadline passes is stopped with window.stop(). Returns True if the content arrived
+    in time; with required=True a miss raises TimeoutException instead.
+    """
+    config = navigation_settings()
+    deadline = deadline or config["deadlines"].get(label, config["deadline_seconds"])
+    started = time.monotonic()
+    try:
+        _stats.record_previous(driver, driver.execute_script(_PREPARE_SCRIPT))
+    except Exception:
+        pass # No document yet (a fresh browser) or it is unresponsive; the navigation replaces it anyway
+    driver.set_page_load_timeout(deadline)
+    try:
+        if url:
+            driver.get(url)
+        else:
+            driver.refresh()
+    except TimeoutException:
+        pass # Even eager loading ran out of time; the selector check below decides
+    return wait_ready(driver, ready, label, deadline, started, required)
+
+def click_through(driver, element, ready, label, deadline=None):
+    """
+    Clicks an element that leads to another page (an interstitial's button) and waits,
+    as navigate does, only until `ready` matches on the document it opens.
+    """
+    config = navigation_settings()
+    deadline = deadline or config["deadlines"].get(label, config["deadline_seconds"])
+    started = time.monotonic()
+    try:
+        _stats.record_previous(driver, driver.execute_script(_PREPARE_SCRIPT))
+    except Exception:
+        pass
+    element.click()
+    return wait_ready(driver, ready, label, deadline, started)
+
+def wait_ready(driver, ready, label, deadline, started, required=False):
+    """
+    The waiting half of navigate: polls the current document for `ready` until `deadline`
+    seconds after `started` (a time.monotonic() value), then stops the page if it never came.
+    """
+    remaining = max(0.1, deadline - (time.monotonic() - started))
+    try:
+        WebDriverWait(driver, remaining, poll_frequency=0.1).until(lambda d: d.execute_script(_READY_SCRIPT, ready))
+        arrived = True
+    except TimeoutException:
+        arrived = False
+        try:
+            driver.execute_script("window.stop();")
+        except Exception:
+            pass
+        print(f"{COLOR_WARNING}WARNING: [{label}] Needed content not there after {deadline}s; stopped loading.{COLOR_RESET}", flush=True)
+    _stats.record_content(driver, label, time.monotonic() - started, not arrived)
+    if required and not arrived:
+        raise TimeoutException(f"{label}: '{ready}' did not appear within {deadline}s")
+    return arrived
+
+class TabPrefetcher:
+    """
+    Pipelines page loads for a worker that visits a known list of URLs: while the current
+    page is being extracted, the next `depth` URLs load in background tabs, and opening one
+    of them later just switches to its tab. Every prefetch takes a request slot from the
+    pacer like any other page, so the request rate doesn't change; only the waiting moves
+    behind extraction. Tabs belong to one browser, so a restarted driver starts over.
+    prepare_tab(driver) is run on each new tab before it navigates (e.g. to apply stealth).
+    """
+
+    def __init__(self, ready, label, pacer, depth=None, prepare_tab=None):
+        config = navigation_settings()
+        self.ready = ready
+        self.label = label
+        self.pacer = pacer
+        self.depth = max(0, min(MAX_PREFETCH_DEPTH, config["prefetch_depth"] if depth is None else depth))
+        self.deadline = config["deadlines"].get(label, config["deadline_seconds"])
+        self.prepare_tab = prepare_tab
+        self.driver = None
+        self.tabs = {} # url -> (window handle, time.monotonic() the load started)
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+
+    def _bind(self, driver):
+        if driver is not self.driver:
+            self.driver = driver
+            self.tabs = {}
+
+    def open(self, driver, url):
+        """
+        Makes url the current page: switches to its prefetched tab (closing the one being left)
+        or, if it wasn't prefetched, navigates to it in the next request slot. Returns True if
+        the needed content arrived, like navigate.
+        """
+        self._bind(driver)
+        tab = self.tabs.pop(url, None)
+        if tab is None:
+            self.misses += self.depth > 0
+            self.pacer.wait()
+            return navigate(driver, url, self.ready, self.label)
+        self.hits += 1
+        handle, started = tab
+        driver.close()
+        driver.switch_to.window(handle)
+        # Timed from the switch, so the stats show the wait that was left after hiding the load
+        remaining = max(1.0, self.deadline - (time.monotonic() - started))
+        if wait_ready(driver, self.ready, f"{self.label}_prefetched", remaining, time.monotonic()):
+            return True
+        self.pacer.wait() # The background load failed; load it again the normal way
+        return navigate(driver, url, self.ready, self.label)
+
+    def prefetch(self, driver, upcoming):
+        """Starts loading the first `depth` of the upcoming URLs in background tabs and drops tabs no longer needed."""
+        self._bind(driver)
+        wanted = [url for url in upcoming if url][:self.depth]
+        current = driver.current_window_handle
+        for url in [u for u in self.tabs if u not in wanted]:
+            self.wasted += 1
+            self._close_tab(driver, self.tabs.pop(url)[0])
+        for url in wanted:
+            if url in self.tabs:
+                continue
+            self.pacer.wait()
+            driver.switch_to.new_window('tab')
+            if self.prepare_tab:
+                self.prepare_tab(driver)
+            # Started after the script returns, so chromedriver doesn't wait for this load
+            driver.execute_script("const url = arguments[0]; setTimeout(() => { window.location.href = url; }, 0);", url)
+            self.tabs[url] = (driver.current_window_handle, time.monotonic())
+            driver.switch_to.window(current)
+
+    def _close_tab(self, driver, handle):
+        current = driver.current_window_handle
+        driver.switch_to.window(handle)
+        driver.close()
+        driver.switch_to.window(current)
+
+    def close(self):
+        """Closes every prefetched tab that was never opened."""
+        if self.driver is not None:
+            for handle, _ in self.tabs.values():
+                try:
+                    self._close_tab(self.driver, handle)
+                except Exception:
+                    pass # The browser is already gone
+            self.wasted += len(self.tabs)
+        self.tabs = {}
+
+    def report(self):
+        if self.depth and (self.hits or self.misses):
+            print(f"{COLOR_INFO}INFO: [{self.label}] Prefetch depth {self.depth}: {self.hits} pages opened preloaded, "
+                  f"{self.misses} loaded on demand, {self.wasted} prefetched for nothing.{COLOR_RESET}", flush=True)
@@ -0,0 +1,170 @@
+import json
+import os
+import random
+import threading
+import time
+
+from settings import get_setting
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_WARNING = "\033[93m" # Yellow
+
+PACING_STATE_FILE = "pacing_state.json"
+
+# Outcomes a caller reports after each request
+OUTCOME_OK = "ok"           # Page came back with the content we wanted
+OUTCOME_EMPTY = "empty"     # Page rendered but had nothing usable
+OUTCOME_BLOCKED = "blocked" # Captcha or interstitial
+
+DEFAULTS = {
+    "min_delay": 0.5,         # Fastest spacing between requests (seconds)
+    "max_delay": 30.0,        # Slowest spacing between requests (seconds)
+    "initial_delay": 3.0,     # Spacing used before any state has been learned
+    "increase_step": 0.05,    # Additive rate increase (requests/second) per clean page
+    "empty_factor": 0.8,      # Multiplicative rate decrease on an empty page
+    "blocked_factor": 0.5,    # Multiplicative rate decrease on a block
+    "blocked_cooldown": 15.0, # First pause after a block; doubles while blocks continue
+    "max_cooldown": 300.0,
+    "jitter": 0.2,            # +/- fraction of randomness on every delay
+    "ewma_alpha": 0.1,        # Weight of the newest outcome in the block/empty rate averages
+}
+
+class Pacer:
+    """
+    AIMD pacing for one target site, shared by every worker that talks to it.
+    The request rate grows additively while pages come back clean and is cut
+    multiplicatively when pages come back empty or blocked; consecutive blocks
+    also add an exponentially growing cooldown. Workers reserve evenly spaced
+    slots, so the rate holds across threads. The learned rate and the smoothed
+    block/empty rates are persisted so the next run starts where this one ended.
+    """
+
+    def __init__(self, name, state_file=PACING_STATE_FILE, **overrides):
+        self.name = name
+        self.state_file = state_file
+        self.config = dict(DEFAULTS)
+        self.config.update(get_setting("pacing", {}).get(name, {}))
+        self.config.update(overrides)
+        self.rate = 1.0 / self.config["initial_delay"]
+        self.block_rate = 0.0
+        self.empty_rate = 0.0
+        self.requests = 0
+        self.blocks = 0
+        self.consecutive_blocks = 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+        self._load_state()
+
+    @property
+    def min_rate(self):
+        return 1.0 / self.config["max_delay"]
+
+    @property
+    def max_rate(self):
+        return 1.0 / self.config["min_delay"]
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f).get(self.name, {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.rate = min(self.max_rate, max(self.min_rate, state.get("rate", self.rate)))
+        self.block_rate = state.get("block_rate", 0.0)
+        self.empty_rate = state.get("empty_rate", 0.0)
+
+    def save_state(self):
+        """Merges this pacer's learned state into the shared state file."""
+        with self._lock:
+            try:
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    all_state = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                all_state = {}
+            all_state[self.name] = {
+                "rate": round(self.rate, 4),
+                "block_rate": round(self.block_rate, 4),
+                "empty_rate": round(self.empty_rate, 4),
+                "updated_at": int(time.time()),
+            }
+            tmp_path = self.state_file + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(all_state, f, indent=4)
+            os.replace(tmp_path, self.state_file)
+
+    def current_delay(self):
+        return 1.0 / self.rate
+
+    def wait(self):
+        """Blocks until this caller's next request slot and returns how long it slept."""
+        with self._lock:
+            now = time.monotonic()
+            jitter = self.config["jitter"]
+            spacing = self.current_delay() * random.uniform(1 - jitter, 1 + jitter)
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + spacing
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def record(self, outcome):
+        """Feeds back the outcome of a request and adjusts the rate."""
+        with self._lock:
+            alpha = self.config["ewma_alpha"]
+            self.requests += 1
+            self.block_rate = (1 - alpha) * self.block_rate + alpha * (outcome == OUTCOME_BLOCKED)
+            self.empty_rate = (1 - alpha) * self.empty_rate + alpha * (outcome == OUTCOME_EMPTY)
+            if outcome == OUTCOME_OK:
+                self.consecutive_blocks = 0
+                self.rate = min(self.max_rate, self.rate + self.config["increase_step"])
+            elif outcome == OUTCOME_EMPTY:
+                self.rate = max(self.min_rate, self.rate * self.config["empty_factor"])
+            elif outcome == OUTCOME_BLOCKED:
+                self.blocks += 1
+                self.consecutive_blocks += 1
+                self.rate = max(self.min_rate, self.rate * self.config["blocked_factor"])
+                cooldown = min(self.config["max_cooldown"], self.config["blocked_cooldown"] * 2 ** (self.consecutive_blocks - 1))
+                self._next_slot = max(self._next_slot, time.monotonic() + cooldown)
+                print(f"{COLOR_WARNING}WARNING: [{self.name}] Blocked. Cooling down {cooldown:.0f}s, new pace {self.current_delay():.1f}s/request.{COLOR_RESET}", flush=True)
+
+    def metrics(self):
+        """Returns the current pace and smoothed block/empty rates."""
+        return {
+            "name": self.name,
+            "requests_per_minute": round(self.rate * 60, 2),
+            "delay_seconds": round(self.current_delay(), 2),
+            "block_rate": round(self.block_rate, 4),
+            "empty_rate": round(self.empty_rate, 4),
+            "requests": self.requests,
+            "blocks": self.blocks,
+        }
+
+    def report(self):
+        m = self.metrics()
+        print(f"{COLOR_INFO}INFO: [{self.name}] pace {m['requests_per_minute']} req/min ({m['delay_seconds']}s), "
+              f"block rate {m['block_rate']:.1%}, empty rate {m['empty_rate']:.1%}, "
+              f"{m['requests']} requests, {m['blocks']} blocks.{COLOR_RESET}", flush=True)
+
+_pacers = {}
+_pacers_lock = threading.Lock()
+
+def get_pacer(name):
+    """Returns the process-wide Pacer for a target, creating it on first use."""
+    with _pacers_lock:
+        if name not in _pacers:
+            _pacers[name] = Pacer(name)
+        return _pacers[name]
+
+if __name__ == "__main__":
+    try:
+        with open(PACING_STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = {}
+    if not state:
+        print(f"{COLOR_INFO}INFO: No pacing state recorded yet.{COLOR_RESET}")
+    for name in state:
+        Pacer(name).report()
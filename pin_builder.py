@@ -0,0 +1,253 @@
+import statistics
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from image_prep import upload_settle_seconds
+from settings import get_base_url, get_setting
+
+DEFAULTS = {
+    # Seconds each step may take to show its effect; "upload" also gets the expected
+    # processing time of the uploaded bytes (image_prep.upload_settle_seconds) on top
+    "deadlines": {
+        "open": 20,
+        "upload": 30,
+        "carousel": 8,   # How long to look for the carousel/collage dialog before going on without it
+        "field": 10,     # Each form field, the alt-text button and the carousel checkbox
+        "board": 10,
+        "publish": 30,
+    },
+    "poll_seconds": 0.1,
+}
+
+# Each element is found by its stable id/data-test-id first; the absolute XPaths
+# the flow used before are kept as fallbacks
+LOCATORS = {
+    "upload_input": "[id^='media-upload-input']",
+    "title": [(By.CSS_SELECTOR, "[id^='pin-draft-title']")],
+    "description": [(By.CSS_SELECTOR, "[id^='pin-draft-description']")],
+    # With a single image the description is a different editor
+    "description_single": [(By.XPATH, "/html/body/div[1]/div[1]/div/div[3]/div/div/div/div[2]/div[2]/div/div/div/div/div/div/div/div/div/div[2]/div/div[2]/div/div[1]/div[1]/div[3]/div/div[1]/div/div/div[1]/div/div/div/div/div/div/div[2]/div/div/div/div"),
+                           (By.CSS_SELECTOR, "[id^='pin-draft-description']")],
+    "alt_text_button": [(By.CSS_SELECTOR, "[data-test-id='pin-draft-alt-text-button']"),
+                        (By.XPATH, "/html/body/div[1]/div[1]/div/div[3]/div/div/div/div[2]/div[2]/div/div/div/div/div/div/div/div/div/div[2]/div/div[2]/div/div/div[1]/div[4]/div/button")],
+    "alt_text": [(By.CSS_SELECTOR, "[id^='pin-draft-alttext']")],
+    "link": [(By.CSS_SELECTOR, "[id^='pin-draft-link']")],
+    "carousel_control": [(By.ID, "pin-draft-carousel-control")],
+    "board_dropdown": [(By.CSS_SELECTOR, "[data-test-id='board-dropdown-select-button']"),
+                       (By.XPATH, "/html/body/div[1]/div[1]/div/div[3]/div/div/div/div[2]/div[2]/div/div/div/div/div/div/div/div/div/div[1]/div/div[2]/div/div/div/div[1]/div")],
+    "publish": [(By.CSS_SELECTOR, "[data-test-id='board-dropdown-save-button']"),
+                (By.XPATH, "/html/body/div[1]/div[1]/div/div[3]/div/div/div/div[2]/div[2]/div/div/div/div/div/div/div/div/div/div[1]/div/div[2]/div/div/div/div[2]")],
+}
+
+# Observable conditions, evaluated in the page
+_UPLOAD_DONE_SCRIPT = """
+const visible = el => !!el && el.getClientRects().length > 0;
+if (!document.querySelector("[id^='pin-draft-title']")) return false;
+if (Array.from(document.querySelectorAll("[role='progressbar']")).some(visible)) return false;
+return !document.querySelector("[data-test-id='upload-progress']:empty");
+"""
+_DIALOG_OPEN_SCRIPT = """
+return Array.from(document.querySelectorAll("[role='dialog']")).some(el => el.getClientRects().length > 0);
+"""
+_MARK_FOCUS_SCRIPT = "window.__pinzonFocused = document.activeElement;"
+_FOCUS_MOVED_SCRIPT = "return document.activeElement !== window.__pinzonFocused;"
+# The pin's URL once Pinterest confirms it, "toast" for a confirmation without a link, else null
+_PUBLISHED_SCRIPT = """
+const link = document.querySelector("[data-test-id*='toast'] a[href*='/pin/']");
+if (link) return link.href;
+if (location.pathname.startsWith('/pin/')) return location.href;
+const toast = document.querySelector("[data-test-id*='toast']");
+return toast && toast.getClientRects().length > 0 && toast.textContent.trim() ? "toast" : null;
+"""
+
+# States of the flow, in the order they normally run
+OPEN, UPLOAD, UPLOAD_DONE, CAROUSEL, TITLE, DESCRIPTION, ALT_TEXT, LINK, CAROUSEL_CONTROL, BOARD, PUBLISH, DONE = (
+    "open", "upload", "upload_done", "carousel", "title", "description", "alt_text", "link",
+    "carousel_control", "board", "publish", "done")
+
+def pin_builder_settings():
+    config = {key: (dict(value) if isinstance(value, dict) else value) for key, value in DEFAULTS.items()}
+    overrides = get_setting("pin_builder", {})
+    config["deadlines"].update(overrides.get("deadlines", {}))
+    config.update({key: value for key, value in overrides.items() if key != "deadlines"})
+    return config
+
+class PinBuilderStats:
+    """Seconds spent in each state of the pin-builder flow, over every pin this process published."""
+
+    def __init__(self):
+        self.samples = {} # state -> [seconds]
+        self.pins = 0
+        self._lock = threading.Lock()
+
+    def record(self, timings):
+        with self._lock:
+            self.pins += 1
+            for state, seconds in timings.items():
+                self.samples.setdefault(state, []).append(seconds)
+
+    def metrics(self):
+        with self._lock:
+            return {"pins": self.pins,
+                    "median_seconds": {state: round(statistics.median(s), 2) for state, s in self.samples.items()}}
+
+_stats = PinBuilderStats()
+
+def get_pin_builder_stats():
+    """Returns the process-wide PinBuilderStats."""
+    return _stats
+
+class PinBuilder:
+    """
+    The Pinterest pin-builder flow as a state machine. Each state does its action and
+    then waits for the condition that shows it took effect (the upload finished, the
+    dialog closed, the field holds the text, the confirmation appeared) under that step's
+    own deadline, instead of sleeping a fixed time; the state's handler returns the next
+    state. A condition that never comes raises TimeoutException naming the state.
+    Timings of every state are kept in .timings and the process-wide PinBuilderStats.
+    """
+
+    def __init__(self, driver, page, pin, board_name, link, config=None):
+        self.driver = driver
+        self.page = page # browser_backend backend for navigation, the upload and the in-page conditions
+        self.pin = pin
+        self.board_name = board_name
+        self.link = link
+        self.config = config or pin_builder_settings()
+        self.images = len(pin["image_paths"])
+        self.timings = {}
+        self.pin_url = None
+
+    def run(self):
+        """Runs the flow to the end and returns the published pin's URL ("toast" if Pinterest didn't link it)."""
+        handlers = {OPEN: self._open, UPLOAD: self._upload, UPLOAD_DONE: self._upload_done, CAROUSEL: self._carousel,
+                    TITLE: self._title, DESCRIPTION: self._description, ALT_TEXT: self._alt_text, LINK: self._link,
+                    CAROUSEL_CONTROL: self._carousel_control, BOARD: self._board, PUBLISH: self._publish}
+        state = OPEN
+        while state != DONE:
+            started = time.perf_counter()
+            next_state = handlers[state]()
+            self.timings[state] = round(time.perf_counter() - started, 2)
+            state = next_state
+        _stats.record(self.timings)
+        return self.pin_url
+
+    # --- Waiting ---
+
+    def _wait(self, condition, step, state):
+        """Polls condition(driver) until it returns something truthy, within the step's deadline."""
+        deadline = self.config["deadlines"][step]
+        if step == "upload":
+            deadline += upload_settle_seconds(self.pin["upload_bytes"])
+        try:
+            return WebDriverWait(self.driver, deadline, poll_frequency=self.config["poll_seconds"]).until(condition)
+        except TimeoutException:
+            raise TimeoutException(f"Pin builder stuck in '{state}' for {deadline:.0f}s")
+
+    def _find(self, name, state, clickable=False):
+        """The first of the element's locators to match, waited for within the field deadline."""
+        expected = EC.element_to_be_clickable if clickable else EC.presence_of_element_located
+        conditions = [expected(locator) for locator in LOCATORS[name]]
+        return self._wait(EC.any_of(*conditions), "field", state)
+
+    def _type(self, name, text, state):
+        """Types text into a field and waits until the field holds it."""
+        element = self._find(name, state)
+        element.send_keys(text)
+        self._wait(lambda d: text in (element.get_attribute("value") or element.text or ""), "field", state)
+
+    def _press(self, key, state):
+        """Sends a key to the focused element; a TAB waits until the focus has moved."""
+        self.page.evaluate(_MARK_FOCUS_SCRIPT)
+        self.driver.switch_to.active_element.send_keys(key)
+        if key == Keys.TAB:
+            self._wait(lambda d: self.page.evaluate(_FOCUS_MOVED_SCRIPT), "field", state)
+
+    # --- States ---
+
+    def _open(self):
+        print("\n\033[94m[STEP]\033[0m Navigating to Pinterest pin builder page...", flush=True)
+        self.page.navigate(f"{get_base_url('pinterest_app')}/pin-builder/", "[id*='media-upload-input']", "pin_builder",
+                           deadline=self.config["deadlines"]["open"], required=True)
+        return UPLOAD
+
+    def _upload(self):
+        print("\n\033[94m[STEP]\033[0m Uploading images...", flush=True)
+        # The input element for file upload is usually hidden, so its files are set by its ID pattern
+        self.page.upload_files(LOCATORS["upload_input"], self.pin["image_paths"]) # Upload in original order
+        return UPLOAD_DONE
+
+    def _upload_done(self):
+        self._wait(lambda d: self.page.evaluate(_UPLOAD_DONE_SCRIPT), "upload", UPLOAD_DONE)
+        print(f"\033[92m[SUCCESS]\033[0m Uploaded {self.images} images in original order ({self.pin['upload_bytes'] / 1024:.0f} KB).", flush=True)
+        return CAROUSEL if self.images > 1 else TITLE
+
+    def _carousel(self):
+        # Pinterest asks whether several images make a carousel or a collage
+        try:
+            self._wait(lambda d: self.page.evaluate(_DIALOG_OPEN_SCRIPT), "carousel", CAROUSEL)
+        except TimeoutException:
+            print("\033[93m[WARNING]\033[0m No carousel/collage pop-up appeared; continuing.", flush=True)
+            return TITLE
+        # TAB to the carousel option and select it, TAB twice to the confirmation button and confirm
+        self._press(Keys.TAB, CAROUSEL)
+        self._press(Keys.ENTER, CAROUSEL)
+        self._press(Keys.TAB, CAROUSEL)
+        self._press(Keys.TAB, CAROUSEL)
+        self._press(Keys.ENTER, CAROUSEL)
+        self._wait(lambda d: not self.page.evaluate(_DIALOG_OPEN_SCRIPT), "carousel", CAROUSEL)
+        print("\033[92m[SUCCESS]\033[0m Confirmed carousel selection via keyboard.", flush=True)
+        return TITLE
+
+    def _title(self):
+        self._type("title", self.pin["title"], TITLE)
+        print(f"\033[92m[SUCCESS]\033[0m Entered product title: \033[1m{self.pin['title']}\033[0m", flush=True)
+        return DESCRIPTION
+
+    def _description(self):
+        self._type("description_single" if self.images == 1 else "description", self.pin["description"], DESCRIPTION)
+        print(f"\033[92m[SUCCESS]\033[0m Entered product description: \033[1m{self.pin['description']}\033[0m", flush=True)
+        return ALT_TEXT
+
+    def _alt_text(self):
+        self._find("alt_text_button", ALT_TEXT, clickable=True).click()
+        self._type("alt_text", self.pin["title"], ALT_TEXT)
+        print(f"\033[92m[SUCCESS]\033[0m Entered rewritten product name in alt-text field: \033[1m{self.pin['title']}\033[0m", flush=True)
+        return LINK
+
+    def _link(self):
+        self._type("link", self.link, LINK)
+        print(f"\033[92m[SUCCESS]\033[0m Entered product URL with affiliate ID: \033[90m{self.link}\033[0m", flush=True)
+        return CAROUSEL_CONTROL if self.images > 1 else BOARD
+
+    def _carousel_control(self):
+        checkbox = self._find("carousel_control", CAROUSEL_CONTROL)
+        if not checkbox.is_selected():
+            checkbox.click()
+            self._wait(lambda d: checkbox.is_selected(), "field", CAROUSEL_CONTROL)
+            print("\033[92m[SUCCESS]\033[0m Carousel control checkbox checked.", flush=True)
+        return BOARD
+
+    def _board(self):
+        self._find("board_dropdown", BOARD, clickable=True).click()
+        row = (By.XPATH, f"//div[starts-with(@data-test-id, 'board-row')][.//*[normalize-space(text())='{self.board_name}']]")
+        self._wait(EC.element_to_be_clickable(row), "board", BOARD).click()
+        self._wait(EC.invisibility_of_element_located(row), "board", BOARD) # The dropdown closes once the board is taken
+        print(f"\033[92m[SUCCESS]\033[0m Selected '{self.board_name}' from dropdown.", flush=True)
+        return PUBLISH
+
+    def _publish(self):
+        self._find("publish", PUBLISH, clickable=True).click()
+        self.pin_url = self._wait(lambda d: self.page.evaluate(_PUBLISHED_SCRIPT), "publish", PUBLISH)
+        print(f"\033[92m[SUCCESS]\033[0m Published: \033[90m{self.pin_url}\033[0m", flush=True)
+        return DONE
+
+    def report(self):
+        steps = ", ".join(f"{state} {seconds}s" for state, seconds in self.timings.items())
+        print(f"\033[96m[INFO]\033[0m Pin builder took {sum(self.timings.values()):.1f}s: {steps}.", flush=True)
@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import threading
+
+from dotenv import load_dotenv
+from scheduler import load_categories
+from catalog import canonical_product_url
+from settings import get_setting, get_base_url
+
+# What a pin is made of besides the browser work: its board, the affiliate link, the ASINs
+# already pinned and the Gemini copy. Kept apart from post_pin so bulk_export can use them
+# without importing Selenium or the image pipeline.
+
+load_dotenv()
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+AFFILIATE_TAG = "affdealsplus-21"
+
+_genai = None
+_genai_lock = threading.Lock()
+
+def gemini():
+    """
+    Returns the configured google.generativeai module, importing it on first use.
+    It pulls in gRPC and absl, so only a run that actually calls Gemini pays for them.
+    """
+    global _genai
+    with _genai_lock:
+        if _genai is not None:
+            return _genai
+        # Suppress specific warnings from libraries
+        os.environ['GRPC_VERBOSITY'] = 'CRITICAL'
+        os.environ['GLOG_minloglevel'] = '2' # Suppress INFO and WARNING messages from C++ libraries
+        logging.getLogger('google.generativeai').setLevel(logging.ERROR)
+        logging.getLogger('urllib3').setLevel(logging.ERROR) # Suppress urllib3 warnings
+
+        # Suppress Abseil logging warnings
+        try:
+            import absl.logging
+            # Set absl logging to ERROR level
+            absl.logging.set_verbosity(absl.logging.ERROR)
+            # Optionally, redirect absl logs to a null handler if they still appear
+            absl.logging.get_absl_handler().setFormatter(logging.Formatter(''))
+            absl.logging.get_absl_handler().setLevel(logging.CRITICAL)
+        except ImportError:
+            pass # absl might not be installed or configured this way
+
+        import google.generativeai as genai
+        if get_base_url("gemini"):
+            # Talk REST to an alternative endpoint, e.g. the local mock server
+            genai.configure(api_key=GEMINI_API_KEY, transport="rest", client_options={"api_endpoint": get_base_url("gemini")})
+        else:
+            genai.configure(api_key=GEMINI_API_KEY)
+        _genai = genai
+        return _genai
+
+def sanitize_image_url(url):
+    """Sanitizes an image URL by replacing '_SX679_' with '_SL1500_'."""
+    return url.replace("_SX679_", "_SL1500_")
+
+def load_existing_asins():
+    """Loads existing ASINs from asin.json, handling empty or malformed files."""
+    asin_data = []
+    try:
+        if os.path.exists('asin.json') and os.path.getsize('asin.json') > 0:
+            with open('asin.json', 'r', encoding='utf-8') as f:
+                asin_data = json.load(f)
+        elif not os.path.exists('asin.json'):
+            # Create the file if it doesn't exist
+            with open('asin.json', 'w', encoding='utf-8') as f:
+                json.dump([], f) # Write an empty JSON array
+    except json.JSONDecodeError:
+        print(f"\033[93m[WARNING]\033[0m asin.json is malformed or empty. Initializing with an empty list.", flush=True)
+        asin_data = []
+    except Exception as e:
+        print(f"\033[91m[ERROR]\033[0m Error reading asin.json: {e}. Initializing with an empty list.", flush=True)
+        asin_data = []
+    return asin_data
+
+def load_category_boards():
+    """Maps every category in product_links.json to the Pinterest board its pins are posted to."""
+    boards = get_setting("boards", {})
+    return {category: boards.get(category, category.replace("_", " ").title()) for category in load_categories()}
+
+def summarize_product_details(text, fallback=None):
+    """Summarizes product details using the Gemini API; returns fallback (or the original text) if it can't."""
+    fallback = text if fallback is None else fallback
+    if not GEMINI_API_KEY:
+        return fallback # Return the fallback if API key is not set
+
+    try:
+        model = gemini().GenerativeModel('gemini-2.5-flash')
+        response = model.generate_content(
+            f"Concise the following product details into a professional, SEO-friendly summary of maximum 150 characters. "
+            f"Ensure it covers all important aspects and is production-ready, without using special characters like asterisks, pipes, or brackets, and without mentioning character counts:\n\n{text}"
+        )
+        summary = response.text.strip()
+        # Sanitize the summary to remove special characters
+        summary = "".join(char for char in summary if char.isalnum() or char.isspace() or char in (',', '.', '-', '!', '?'))
+        # Ensure the summary is within 150 characters
+        if len(summary) > 150:
+            summary = summary[:147] + "..." # Truncate and add ellipsis if still too long
+        return summary
+    except Exception as e:
+        print(f"\033[91m[ERROR]\033[0m Error summarizing with Gemini API: {e}. Using the fallback summary.", flush=True)
+        return fallback
+
+def rewrite_product_name_with_gemini(product_name, fallback=None):
+    """Rewrites the product name using the Gemini API for SEO-friendly title/alt text; returns fallback (or the original name) if it can't."""
+    fallback = product_name if fallback is None else fallback
+    if not GEMINI_API_KEY:
+        return fallback # Return the fallback if API key is not set
+
+    try:
+        model = gemini().GenerativeModel('gemini-2.5-flash')
+        response = model.generate_content(
+            f"Rewrite the following product name into a professional, SEO-friendly title/alt text of maximum 60 characters. "
+            f"Focus on keywords and clarity, without using special characters like asterisks, pipes, or brackets, and without mentioning character counts:\n\n{product_name}"
+        )
+        rewritten_name = response.text.strip()
+        # Sanitize the rewritten name to remove special characters
+        rewritten_name = "".join(char for char in rewritten_name if char.isalnum() or char.isspace() or char in (',', '.', '-', '!', '?'))
+        # Ensure the rewritten name is within 60 characters
+        if len(rewritten_name) > 60:
+            rewritten_name = rewritten_name[:57] + "..." # Truncate and add ellipsis if still too long
+        return rewritten_name
+    except Exception as e:
+        print(f"\033[91m[ERROR]\033[0m Error rewriting product name with Gemini API: {e}. Using the fallback title.", flush=True)
+        return fallback
+
+def affiliate_url(product_url):
+    """Returns the canonical /dp/ASIN product URL with our affiliate tag appended."""
+    if not product_url:
+        return "" # Or handle as appropriate if URL is missing
+    return f"{canonical_product_url(product_url)}?tag={AFFILIATE_TAG}"
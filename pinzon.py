@@ -0,0 +1,96 @@
+import argparse
+import importlib
+import statistics
+import subprocess
+import sys
+import time
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+COLOR_WARNING = "\033[93m" # Yellow
+
+# Subcommand -> (module, entry point, help). Modules are imported only when their command runs,
+# so `pinzon stats` never loads Selenium, gRPC or NumPy.
+COMMANDS = {
+    "crawl": ("scrape_products", "main", "Crawl the search results of every category into its catalog"),
+    "enrich": ("scrape_details", "scrape_product_details", "Scrape missing details and images of catalogued products"),
+    "post": ("post_pin", "main", "Publish the next product as a Pinterest pin"),
+    "stats": ("json_counter", "main", "Count products, details, images and published pins"),
+    "merge": ("sharding", "main", "Merge the partial outputs of sharded crawl/enrich runners into the catalogs"),
+    "export": ("bulk_export", "main", "Write every ready, unpublished product into Pinterest bulk-upload CSVs"),
+    "daemon": ("daemon", "main", "Run crawl, enrich and post on a schedule with warm browsers"),
+}
+BROWSER_COMMANDS = ("crawl", "enrich", "post")
+SHARDED_COMMANDS = ("crawl", "enrich")
+PASSTHROUGH_COMMANDS = ("merge", "export", "daemon") # Parse their own arguments, which pinzon passes on unread
+
+def load_command(name):
+    """Imports a subcommand's module and returns it with its entry point."""
+    module_name, entry_point, _ = COMMANDS[name]
+    module = importlib.import_module(module_name)
+    return module, getattr(module, entry_point)
+
+def import_times(runs=5):
+    """
+    Measures how long a fresh interpreter takes to get each subcommand ready to run
+    (importing pinzon plus the command's module), against a bare interpreter.
+    Returns {name: median milliseconds}.
+    """
+    def median_ms(code):
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.DEVNULL)
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
+
+    results = {"(interpreter)": median_ms("pass")}
+    for name in COMMANDS:
+        results[name] = median_ms(f"import pinzon; pinzon.load_command({name!r})")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pinzon", description="Amazon product catalog and Pinterest publishing.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (_, _, help_text) in COMMANDS.items():
+        # A pass-through command's --help and options are its own, so its subparser doesn't take them
+        subparser = subparsers.add_parser(name, help=help_text, add_help=name not in PASSTHROUGH_COMMANDS)
+        if name in BROWSER_COMMANDS:
+            subparser.add_argument("--headful", action="store_true", help="Show the browser window")
+        if name in SHARDED_COMMANDS:
+            subparser.add_argument("--shard", metavar="I/N", help="Only do runner I's share of the work out of N runners, into partials for `pinzon merge`")
+    bench_parser = subparsers.add_parser("import-times", help="Benchmark how fast each subcommand starts")
+    bench_parser.add_argument("--runs", type=int, default=5)
+    args, command_args = parser.parse_known_args(argv)
+    if command_args and args.command not in PASSTHROUGH_COMMANDS:
+        parser.error(f"unrecognized arguments: {' '.join(command_args)}")
+
+    if args.command == "import-times":
+        results = import_times(args.runs)
+        baseline = results.pop("(interpreter)")
+        print(f"{COLOR_INFO}INFO: Bare interpreter: {baseline:.0f} ms (median of {args.runs}).{COLOR_RESET}", flush=True)
+        for name, ms in results.items():
+            print(f"{COLOR_SUCCESS}{name:>8}{COLOR_RESET}  {ms:6.0f} ms  (+{ms - baseline:.0f} ms)", flush=True)
+        return
+
+    try:
+        module, entry_point = load_command(args.command)
+    except ImportError as e:
+        print(f"{COLOR_WARNING}WARNING: '{args.command}' needs a dependency that is not installed: {e}{COLOR_RESET}", flush=True)
+        sys.exit(1)
+    if getattr(args, "headful", False):
+        module.headless = False
+    if getattr(args, "shard", None):
+        from sharding import Shard
+        try:
+            module.shard = Shard.parse(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.command in PASSTHROUGH_COMMANDS:
+        sys.argv = [f"pinzon {args.command}", *command_args]
+    entry_point()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+from settings import get_setting
+from catalog import extract_asin, format_price
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+COLOR_WARNING = "\033[93m" # Yellow
+
+HISTORY_FOLDER = "price_history"
+ASINS_FILE = "asins.txt"            # One ASIN per line; the line number is its ID
+OBSERVATIONS_FILE = "observations.bin"
+DEFAULT_DOWNSAMPLE_AFTER_DAYS = 90
+
+# One fixed-size record per observation: 16 bytes instead of a JSON object per price
+OBSERVATION_DTYPE = np.dtype([("asin_id", "<u4"), ("observed_at", "<u4"), ("price_paise", "<i8")])
+
+class PriceHistory:
+    """
+    Append-only price history for every ASIN seen by the crawler.
+    ASINs are interned in asins.txt; observations.bin is a flat array of
+    (asin_id, observed_at, price_paise) records that every crawl appends to.
+    Queries load the whole file as NumPy columns, so they stay a handful of
+    array operations however many products and crawls there are. Old data is
+    downsampled to the last observation per ASIN per day by compact().
+    """
+
+    def __init__(self, root=HISTORY_FOLDER):
+        self.root = root
+        self.asin_ids = {}
+        self.asins = []
+        self._lock = threading.RLock() # compact() loads observations while holding it
+        os.makedirs(self.root, exist_ok=True)
+        if os.path.exists(self.asins_path):
+            with open(self.asins_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self._intern(line.strip())
+
+    @property
+    def asins_path(self):
+        return os.path.join(self.root, ASINS_FILE)
+
+    @property
+    def observations_path(self):
+        return os.path.join(self.root, OBSERVATIONS_FILE)
+
+    def _intern(self, asin):
+        if asin not in self.asin_ids:
+            self.asin_ids[asin] = len(self.asins)
+            self.asins.append(asin)
+        return self.asin_ids[asin]
+
+    def _drop_torn_record(self):
+        """
+        Truncates observations.bin to a whole number of records. An append interrupted by a
+        crash leaves a partial record at the end, and everything appended after it would be
+        read at the wrong offset. Call with the lock held.
+        """
+        if not os.path.exists(self.observations_path):
+            return 0
+        size = os.path.getsize(self.observations_path)
+        torn = size % OBSERVATION_DTYPE.itemsize
+        if torn:
+            with open(self.observations_path, 'r+b') as f:
+                f.truncate(size - torn)
+            print(f"{COLOR_WARNING}WARNING: Dropped a torn {torn}-byte record from the end of {self.observations_path}.{COLOR_RESET}", flush=True)
+        return torn
+
+    def record(self, products, observed_at=None):
+        """Appends one observation for every product with an ASIN and a parsed price; returns how many."""
+        rows = []
+        with self._lock:
+            new_asins = []
+            for p in products:
+                asin = extract_asin(p.get("product_url"))
+                if not asin or not p.get("price_paise"):
+                    continue
+                if asin not in self.asin_ids:
+                    new_asins.append(asin)
+                rows.append((self._intern(asin), int(observed_at or p.get("scraped_at") or time.time()), p["price_paise"]))
+            if not rows:
+                return 0
+            # ASINs first, so every ID in observations.bin always resolves
+            if new_asins:
+                with open(self.asins_path, 'a', encoding='utf-8') as f:
+                    f.write("".join(asin + "\n" for asin in new_asins))
+            self._drop_torn_record()
+            with open(self.observations_path, 'ab') as f:
+                np.array(rows, dtype=OBSERVATION_DTYPE).tofile(f)
+        return len(rows)
+
+    def observations(self):
+        """Returns every observation as a structured array ordered by (asin_id, observed_at)."""
+        with self._lock:
+            if not os.path.exists(self.observations_path):
+                return np.zeros(0, dtype=OBSERVATION_DTYPE)
+            self._drop_torn_record()
+            data = np.fromfile(self.observations_path, dtype=OBSERVATION_DTYPE)
+        return data[np.lexsort((data["observed_at"], data["asin_id"]))]
+
+    def series(self, asin):
+        """Returns (observed_at, price_paise) arrays for one ASIN, oldest first."""
+        data = self.observations()
+        if asin not in self.asin_ids:
+            return data["observed_at"][:0], data["price_paise"][:0]
+        rows = data[data["asin_id"] == self.asin_ids[asin]]
+        return rows["observed_at"], rows["price_paise"]
+
+    def biggest_drops(self, days=30, limit=20, min_drop=0.0, now=None):
+        """
+        Finds the ASINs whose latest price is furthest below their highest price in the last `days`.
+        Returns dicts with asin, current and reference price (paise), drop (fraction) and observed_at, biggest drop first.
+        """
+        data = self.observations()
+        now = time.time() if now is None else now
+        window = data[data["observed_at"] >= now - days * 86400]
+        if not len(window):
+            return []
+        # Rows are grouped by ASIN, so every group starts where the ID changes
+        starts = np.flatnonzero(np.r_[True, window["asin_id"][1:] != window["asin_id"][:-1]])
+        ends = np.r_[starts[1:], len(window)] - 1
+        reference = np.maximum.reduceat(window["price_paise"], starts)
+        current = window["price_paise"][ends]
+        drop = (reference - current) / np.maximum(reference, 1)
+
+        order = np.argsort(-drop, kind="stable")
+        results = []
+        for i in order[:limit]:
+            if drop[i] <= min_drop:
+                break
+            results.append({
+                "asin": self.asins[window["asin_id"][ends[i]]],
+                "current_paise": int(current[i]),
+                "reference_paise": int(reference[i]),
+                "drop": float(drop[i]),
+                "observed_at": int(window["observed_at"][ends[i]]),
+            })
+        return results
+
+    def compact(self, older_than_days=DEFAULT_DOWNSAMPLE_AFTER_DAYS, now=None):
+        """
+        Downsamples observations older than the cutoff to the last one per ASIN per day
+        and rewrites the file sorted. Returns (records before, records after).
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            data = self.observations()
+            cutoff = now - older_than_days * 86400
+            old, recent = data[data["observed_at"] < cutoff], data[data["observed_at"] >= cutoff]
+            if len(old):
+                day = old["observed_at"] // 86400
+                # Sorted by (asin_id, observed_at): keep the last row of every (asin_id, day) run
+                last_of_day = np.r_[(old["asin_id"][1:] != old["asin_id"][:-1]) | (day[1:] != day[:-1]), True]
+                old = old[last_of_day]
+            kept = np.concatenate([old, recent])
+            kept = kept[np.lexsort((kept["observed_at"], kept["asin_id"]))]
+            tmp_path = self.observations_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                kept.tofile(f)
+            os.replace(tmp_path, self.observations_path)
+        return len(data), len(kept)
+
+def open_price_history():
+    """Returns the PriceHistory at the path configured in config.json."""
+    return PriceHistory(root=get_setting("price_history", {}).get("path", HISTORY_FOLDER))
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and maintain the per-ASIN price history.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    drops_parser = subparsers.add_parser("drops", help="Show the biggest price drops")
+    drops_parser.add_argument("--days", type=float, default=30, help="Look-back window (default: 30)")
+    drops_parser.add_argument("--limit", type=int, default=20)
+    drops_parser.add_argument("--min-drop", type=float, default=5.0, help="Minimum drop in percent (default: 5)")
+    series_parser = subparsers.add_parser("series", help="Show the price history of one ASIN")
+    series_parser.add_argument("asin")
+    compact_parser = subparsers.add_parser("compact", help="Downsample old observations to one per day")
+    compact_parser.add_argument("--older-than-days", type=float, default=None)
+    args = parser.parse_args()
+
+    history = open_price_history()
+    if args.command == "drops":
+        drops = history.biggest_drops(days=args.days, limit=args.limit, min_drop=args.min_drop / 100)
+        if not drops:
+            print(f"{COLOR_INFO}INFO: No price drops of {args.min_drop:g}% or more in the last {args.days:g} days.{COLOR_RESET}", flush=True)
+        for d in drops:
+            print(f"{COLOR_SUCCESS}{d['drop']:6.1%}{COLOR_RESET}  {d['asin']}  Rs {format_price(d['reference_paise']):>10} -> Rs {format_price(d['current_paise']):>10}", flush=True)
+    elif args.command == "series":
+        observed_at, prices = history.series(args.asin)
+        if not len(prices):
+            print(f"{COLOR_WARNING}WARNING: No price history for {args.asin}.{COLOR_RESET}", flush=True)
+        for t, price in zip(observed_at, prices):
+            print(f"{time.strftime('%Y-%m-%d %H:%M', time.gmtime(int(t)))}  Rs {format_price(price)}", flush=True)
+    elif args.command == "compact":
+        older_than = args.older_than_days
+        if older_than is None:
+            older_than = get_setting("price_history", {}).get("downsample_after_days", DEFAULT_DOWNSAMPLE_AFTER_DAYS)
+        before, after = history.compact(older_than_days=older_than)
+        print(f"{COLOR_SUCCESS}SUCCESS: Compacted {before} observations to {after}.{COLOR_RESET}", flush=True)
+
+if __name__ == "__main__":
+    main()
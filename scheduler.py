@@ -0,0 +1,145 @@
+import json
+import queue
+import threading
+import time
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_WARNING = "\033[93m" # Yellow
+COLOR_ERROR = "\033[91m"   # Red
+COLOR_STEP = "\033[96m"    # Cyan
+
+PRODUCT_LINKS_FILE = "product_links.json"
+
+def load_categories(file_path=PRODUCT_LINKS_FILE):
+    """Loads every category -> search URL mapping from product_links.json, in file order."""
+    categories = {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for item in data:
+        for category, url in item.items():
+            categories[category] = url
+    return categories
+
+class CategoryBudget:
+    """The slice of the shared time budget a worker has for the category it is processing."""
+
+    def __init__(self, scheduler, deadline):
+        self.scheduler = scheduler
+        self.deadline = deadline
+        self.grace_period_active = False
+
+    def stopped(self):
+        """True once the whole run (run time + grace time) is over or the run was interrupted."""
+        return self.scheduler.stop_event.is_set()
+
+    def check(self):
+        """
+        Updates the budget state and returns True if work must stop right now.
+        Once the category's slice is used up the budget enters its grace period:
+        the caller should finish what it is doing but not start new work.
+        """
+        if self.scheduler.check_time_limit():
+            return True
+        if self.deadline is not None and time.monotonic() > self.deadline and not self.grace_period_active:
+            print(f"{COLOR_WARNING}Time slice for this category used up. Finishing current work before moving on.{COLOR_RESET}", flush=True)
+            self.grace_period_active = True
+        return False
+
+class CategoryScheduler:
+    """
+    Runs every configured category through a shared pool of browser workers.
+    Each worker owns one browser and pulls the next pending category from a queue.
+    When a time budget is set, a category picked up gets a fair share of whatever
+    time is left, so time a small category doesn't use rolls over to the rest.
+    """
+
+    def __init__(self, categories, workers=1, run_time_seconds=None, grace_time_seconds=0):
+        self.categories = dict(categories)
+        self.workers = max(1, min(int(workers), len(self.categories) or 1))
+        self.run_time_seconds = run_time_seconds
+        self.grace_time_seconds = grace_time_seconds
+        self.start_time = None
+        self.stop_event = threading.Event()
+        self.results = {}
+        self._pending = queue.Queue()
+        self._pending_count = 0
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return 0 if self.start_time is None else time.monotonic() - self.start_time
+
+    def check_time_limit(self):
+        """Sets the stop event and returns True once run time + grace time is exceeded."""
+        if self.run_time_seconds is None:
+            return self.stop_event.is_set()
+        if not self.stop_event.is_set() and self.elapsed() > self.run_time_seconds + self.grace_time_seconds:
+            print(f"{COLOR_ERROR}Total time (run_time + grace_time) exceeded. Stopping all workers.{COLOR_RESET}", flush=True)
+            self.stop_event.set()
+        return self.stop_event.is_set()
+
+    def _next_category(self):
+        """Pops the next pending category and returns it with its slice deadline (or None, None)."""
+        with self._lock:
+            try:
+                category = self._pending.get_nowait()
+            except queue.Empty:
+                return None, None
+            deadline = None
+            if self.run_time_seconds is not None:
+                remaining = max(0, self.run_time_seconds - self.elapsed())
+                # Categories still waiting share the remaining time with the workers available
+                share = remaining * self.workers / max(1, self._pending_count)
+                deadline = time.monotonic() + min(remaining, share)
+            self._pending_count -= 1
+            return category, deadline
+
+    def _worker(self, process_category, setup_worker, teardown_worker):
+        resource = None
+        try:
+            resource = setup_worker() if setup_worker else None
+            while not self.stop_event.is_set():
+                category, deadline = self._next_category()
+                if category is None:
+                    break
+                print(f"\n{COLOR_STEP}--- Category '{category}' ---{COLOR_RESET}", flush=True)
+                budget = CategoryBudget(self, deadline)
+                try:
+                    self.results[category] = process_category(resource, category, self.categories[category], budget)
+                except Exception as e:
+                    print(f"{COLOR_ERROR}ERR: Category '{category}' failed: {type(e).__name__}: {e}{COLOR_RESET}", flush=True)
+                    self.results[category] = None
+        except Exception as e:
+            print(f"{COLOR_ERROR}ERR: Worker could not start: {type(e).__name__}: {e}{COLOR_RESET}", flush=True)
+        finally:
+            if resource is not None and teardown_worker:
+                teardown_worker(resource)
+
+    def run(self, process_category, setup_worker=None, teardown_worker=None):
+        """
+        Processes every category with process_category(resource, category, url, budget).
+        setup_worker() creates the per-worker resource (a browser) and teardown_worker(resource)
+        releases it. Returns a dict of category -> process_category's return value.
+        """
+        for category in self.categories:
+            self._pending.put(category)
+        self._pending_count = len(self.categories)
+        self.start_time = time.monotonic()
+        print(f"{COLOR_INFO}INFO: Scheduling {len(self.categories)} categories on {self.workers} worker(s).{COLOR_RESET}", flush=True)
+
+        try:
+            if self.workers == 1:
+                self._worker(process_category, setup_worker, teardown_worker)
+            else:
+                threads = [threading.Thread(target=self._worker, args=(process_category, setup_worker, teardown_worker), daemon=True)
+                           for _ in range(self.workers)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    while thread.is_alive():
+                        thread.join(timeout=1)
+        except KeyboardInterrupt:
+            print(f"\n{COLOR_INFO}INFO: Interrupted by user (KeyboardInterrupt). Stopping all workers.{COLOR_RESET}", flush=True)
+            self.stop_event.set()
+        return self.results
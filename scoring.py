@@ -0,0 +1,180 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from settings import get_setting
+from catalog import extract_asin, category_file, load_products, recover_catalog, format_price
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+COLOR_WARNING = "\033[93m" # Yellow
+
+MAX_IMAGES = 5
+
+DEFAULTS = {
+    "rank_weight": 0.35,         # Earlier in Amazon's own result order is better
+    "completeness_weight": 0.30, # More images and scraped details make a better pin
+    "price_weight": 0.20,        # Cheaper than the category median is a better deal
+    "freshness_weight": 0.15,    # Recently scraped prices are more likely still valid
+    "half_life_days": 7.0,       # Age at which the freshness score halves
+}
+
+class CatalogColumns:
+    """
+    Columnar view of one or more category catalogs.
+    Every product becomes one row across parallel NumPy arrays, so scoring and
+    filtering run as array operations instead of a Python loop over dicts. The
+    product dicts themselves are kept in `products` for the rows that get picked.
+    """
+
+    def __init__(self, products_by_category):
+        self.categories = list(products_by_category)
+        self.products = []
+        category_codes, ranks, asins, prices = [], [], [], []
+        image_counts, has_details, scraped_at, published, duplicate, exported = [], [], [], [], [], []
+        for code, category in enumerate(self.categories):
+            for rank, p in enumerate(products_by_category[category]):
+                self.products.append(p)
+                category_codes.append(code)
+                ranks.append(rank)
+                asins.append(extract_asin(p.get("product_url")) or "")
+                prices.append(p.get("price_paise") or 0)
+                image_counts.append(sum(1 for i in range(1, MAX_IMAGES + 1) if p.get(f"image_url_{i}")))
+                has_details.append(bool(p.get("product_details")))
+                scraped_at.append(p.get("scraped_at") or 0)
+                published.append(p.get("published") == True)
+                duplicate.append(bool(p.get("duplicate_of")))
+                exported.append(bool(p.get("exported")))
+
+        self.category = np.array(category_codes, dtype=np.int32)
+        self.rank = np.array(ranks, dtype=np.int32)
+        self.asin = np.array(asins, dtype="U10")
+        self.price = np.array(prices, dtype=np.int64)           # Paise; 0 when unknown
+        self.image_count = np.array(image_counts, dtype=np.int8)
+        self.has_details = np.array(has_details, dtype=bool)
+        self.scraped_at = np.array(scraped_at, dtype=np.int64)  # Unix time; 0 when unknown
+        self.published = np.array(published, dtype=bool)
+        self.duplicate = np.array(duplicate, dtype=bool)       # Images match an already published pin
+        self.exported = np.array(exported, dtype=bool)         # Already written to a bulk-upload CSV
+
+    def __len__(self):
+        return len(self.products)
+
+    def category_code(self, category):
+        return self.categories.index(category)
+
+    def eligible(self, excluded_asins=()):
+        """Rows that can still be posted: unpublished, not exported, not already pinned, not a duplicate, and with at least one image."""
+        mask = ~self.published & ~self.exported & ~self.duplicate & (self.image_count > 0)
+        if excluded_asins:
+            mask &= ~np.isin(self.asin, np.array(list(excluded_asins), dtype="U10"))
+        return mask
+
+    def scores(self, now=None, **overrides):
+        """
+        Scores every row in one vectorized pass; higher is better.
+        Each component is scaled to 0..1 before weighting:
+        rank        1 for the first search result of a category, falling linearly to 0 for the last.
+        completeness share of the five image slots filled, plus a bonus for scraped details.
+        price       0.5 at the category median, 1 at half of it, 0 at double it (log scale).
+        freshness   halves every half_life_days since the listing was scraped.
+        """
+        config = dict(DEFAULTS)
+        config.update(get_setting("scoring", {}))
+        config.update(overrides)
+        now = time.time() if now is None else now
+        if not len(self):
+            return np.zeros(0)
+
+        category_sizes = np.bincount(self.category, minlength=len(self.categories))
+        rank_score = 1.0 - self.rank / np.maximum(category_sizes[self.category] - 1, 1)
+
+        completeness = 0.6 * (self.image_count / MAX_IMAGES) + 0.4 * self.has_details
+
+        known_price = self.price > 0
+        medians = np.ones(len(self.categories))
+        for code in np.unique(self.category[known_price]):
+            medians[code] = np.median(self.price[known_price & (self.category == code)])
+        ratio = np.where(known_price, self.price / medians[self.category], 1.0)
+        price_score = np.where(known_price, np.clip(0.5 - 0.5 * np.log2(ratio), 0.0, 1.0), 0.0)
+
+        age_days = (now - self.scraped_at) / 86400.0
+        freshness = np.where(self.scraped_at > 0, np.exp2(-np.maximum(age_days, 0.0) / config["half_life_days"]), 0.0)
+
+        return (config["rank_weight"] * rank_score
+                + config["completeness_weight"] * completeness
+                + config["price_weight"] * price_score
+                + config["freshness_weight"] * freshness)
+
+    def best(self, k=1, mask=None, scores=None):
+        """Returns the row indices of the k highest-scoring rows within the mask, best first."""
+        scores = self.scores() if scores is None else scores
+        candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(self))
+        if not len(candidates):
+            return []
+        k = min(k, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        return top[np.argsort(-scores[top], kind="stable")].tolist()
+
+def load_columns(categories):
+    """Loads the given categories' catalogs into one CatalogColumns view, skipping unreadable files."""
+    products_by_category = {}
+    for category in categories:
+        try:
+            recover_catalog(category_file(category))
+            products_by_category[category] = load_products(category_file(category))
+        except (FileNotFoundError, ValueError) as e:
+            print(f"{COLOR_WARNING}WARNING: Could not load {category_file(category)} ({type(e).__name__}). Skipping category.{COLOR_RESET}", flush=True)
+    return CatalogColumns(products_by_category)
+
+def _synthetic_catalog(size, categories=4):
+    """Random catalog of the given size for timing the scorer."""
+    rng = random.Random(0)
+    now = int(time.time())
+    per_category = {}
+    for i in range(size):
+        per_category.setdefault(f"category_{i % categories}", []).append({
+            "product_url": f"https://www.amazon.in/dp/B{i:09d}",
+            "price_paise": rng.randint(199, 150000) * 100,
+            "scraped_at": now - rng.randint(0, 30 * 86400),
+            "product_details": "x" if rng.random() < 0.8 else "",
+            **{f"image_url_{n}": "img" for n in range(1, rng.randint(1, MAX_IMAGES + 1))},
+            "published": rng.random() < 0.2,
+        })
+    return per_category
+
+def main():
+    parser = argparse.ArgumentParser(description="Score catalog products and show the best candidates to post next.")
+    parser.add_argument("categories", nargs="*", help="Categories to score (default: all)")
+    parser.add_argument("--top", type=int, default=10, help="How many candidates to show")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Time scoring on a synthetic catalog of N products instead")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        catalog = _synthetic_catalog(args.benchmark)
+        started = time.perf_counter()
+        columns = CatalogColumns(catalog)
+        built = time.perf_counter()
+        scores = columns.scores()
+        columns.best(args.top, mask=columns.eligible(), scores=scores)
+        scored = time.perf_counter()
+        print(f"{COLOR_INFO}INFO: {len(columns)} products: columns built in {(built - started) * 1000:.1f} ms, "
+              f"scored and ranked in {(scored - built) * 1000:.1f} ms.{COLOR_RESET}", flush=True)
+
+        return
+
+    from scheduler import load_categories
+    columns = load_columns(args.categories or list(load_categories()))
+    scores = columns.scores()
+    for row in columns.best(args.top, mask=columns.eligible(), scores=scores):
+        p = columns.products[row]
+        price = format_price(columns.price[row]) if columns.price[row] else "N/A"
+        print(f"{COLOR_SUCCESS}{scores[row]:.3f}{COLOR_RESET}  {columns.categories[columns.category[row]]:<16} "
+              f"{columns.asin[row]}  Rs {price:>10}  {p.get('product_name', 'N/A')[:60]}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchWindowException, TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 import time
 import traceback
@@ -12,21 +13,30 @@ import re
 import html
 from colorama import Fore, Style, init
 from selenium_stealth import stealth
-import datetime
-import threading
+from bs4 import BeautifulSoup
+from archive import open_archive
+from scheduler import CategoryScheduler, load_categories
+from catalog import canonical_image_url, category_file, extract_asin, load_products, product_key, recover_catalog, CatalogWriter, AMAZON_IMAGE_PREFIX, AMAZON_IMAGE_SUFFIX
+from variants import cluster_products, find_scraped_sibling, variant_settings
+from settings import get_setting, rebase_url
+from pacing import get_pacer, OUTCOME_OK, OUTCOME_EMPTY, OUTCOME_BLOCKED
+from browser_lifecycle import ManagedDriver
+from navigation import apply_page_load_strategy, click_through, get_navigation_stats, navigate, TabPrefetcher, PRODUCT_PAGE_READY
+from sharding import enrich_partial, PartialWriter, KIND_ENRICH
+from browser_backend import open_backend
+from freshness import mark_details_scraped, refresh_queue, refresh_reason, refresh_settings, stamp_legacy_details, DETAIL_KEYS, REASON_MISSING
 
 # Initialize colorama
 init(autoreset=True)
 
-product_file = "mobile_phones.json"
 headless = True
+shard = None # sharding.Shard this runner enriches (pinzon enrich --shard i/N); None enriches every product
 
 # Global variables for timing
 RUN_TIME_SECONDS = 0
 GRACE_TIME_SECONDS = 0
-start_time = None
-stop_scraping_event = threading.Event()
-grace_period_active = False
+
+page_archive = None # HtmlArchive for fetched product pages, set when enabled in config.json
 
 def load_config():
     global RUN_TIME_SECONDS, GRACE_TIME_SECONDS
@@ -53,84 +63,115 @@ def load_config():
         RUN_TIME_SECONDS = 15 * 60
         GRACE_TIME_SECONDS = 5 * 60
 
-def check_time_limit():
-    global grace_period_active
-    if start_time is None:
-        return False
-
-    elapsed_time = (datetime.datetime.now() - start_time).total_seconds()
-
-    if elapsed_time > (RUN_TIME_SECONDS + GRACE_TIME_SECONDS):
-        print(f"{Fore.RED}Total time (run_time + grace_time) exceeded. Stopping scraping.{Style.RESET_ALL}")
-        stop_scraping_event.set()
-        return True
-    elif elapsed_time > RUN_TIME_SECONDS and not grace_period_active:
-        print(f"{Fore.YELLOW}Run time exceeded. Entering grace period for {GRACE_TIME_SECONDS / 60} minutes.{Style.RESET_ALL}")
-        grace_period_active = True
-    
-    return False
-
-
-def get_main_image_element_safely(driver):
-    """Helper function to safely get the main image element."""
-    try:
-        return driver.find_element(By.CSS_SELECTOR, ".imgTagWrapper img, #landingImage, #imgTagWrapperId img")
-    except Exception:
-        return None
-
-def get_main_image_src_safely(driver):
-    """Helper function to safely get the src of the main image element."""
-    main_img = get_main_image_element_safely(driver)
-    return main_img.get_attribute("src") if main_img else None
-
-def extract_image_urls_from_page(driver, image_urls_set, allowed_endings):
+# Every image candidate extract_image_urls_from_page looks at, read in one script instead of a round trip per element
+_IMAGE_CANDIDATES_SCRIPT = """
+const byXPath = (xpath) => document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const main = document.querySelector(".imgTagWrapper img, #landingImage, #imgTagWrapperId img");
+const xpathMain = byXPath("//*[@id='imgTagWrapperId']/img");
+const items = [];
+for (let i = 1; i < 15; i++) {
+    const div = byXPath(`/html/body/div[2]/div/div/div[5]/div[3]/div[1]/div[1]/div/div/div[2]/div[1]/div[1]/ul/li[${i}]/span/span/div`);
+    const img = div && div.querySelector("img");
+    items.push(img ? img.getAttribute("src") : null);
+}
+return {
+    main: main ? main.getAttribute("src") : null,
+    thumbs: Array.from(document.querySelectorAll("div.ivThumbImage"), div => div.getAttribute("style")),
+    xpathMain: xpathMain ? xpathMain.getAttribute("src") : null,
+    items: items,
+};
+"""
+
+# The main image's current URL; clicking a thumbnail swaps it
+_MAIN_IMAGE_SCRIPT = """
+const main = document.querySelector(".imgTagWrapper img, #landingImage, #imgTagWrapperId img");
+return main ? main.getAttribute("src") : null;
+"""
+THUMBNAIL_SWAP_SECONDS = 2 # Longest wait for the main image to change after a thumbnail click
+
+# The feature bullets' text, up to the first missing list item
+_DETAIL_BULLETS_SCRIPT = """
+const texts = [];
+for (let i = 1; i < 20; i++) {
+    const xpath = `/html/body/div[2]/div/div/div[5]/div[4]/div[49]/div/ul/li[${i}]/span`;
+    const span = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (!span) break;
+    texts.push(span.innerText.trim());
+}
+return texts;
+"""
+
+def extract_image_urls_from_page(page, image_urls_set, allowed_endings):
     """Extracts image URLs from the current page using various selectors and XPaths."""
-    # Get the initial main image URL
+    def usable(src):
+        """The image's URL as catalogs store it, or None if it isn't a product image."""
+        src = canonical_image_url(src)
+        return src if src and src.startswith(AMAZON_IMAGE_PREFIX) and src.endswith(allowed_endings) else None
+
     try:
-        initial_src = get_main_image_src_safely(driver)
-        if initial_src and initial_src.startswith("https://m.media-amazon.com/images/I/") and initial_src.endswith(allowed_endings):
-            image_urls_set.add(initial_src)
+        candidates = page.evaluate(_IMAGE_CANDIDATES_SCRIPT)
     except Exception as e:
-        print(f"{Fore.YELLOW}Could not get initial main image: {Style.RESET_ALL}")
+        print(f"{Fore.YELLOW}Could not read the page's images: {Style.RESET_ALL}")
+        return
+
+    # The initial main image URL
+    if usable(candidates["main"]):
+        image_urls_set.add(usable(candidates["main"]))
 
     # Also look for image URLs in 'ivThumbImage' divs
-    iv_thumb_elements = driver.find_elements(By.CSS_SELECTOR, "div.ivThumbImage")
-    for thumb_div in iv_thumb_elements:
-        style_attr = thumb_div.get_attribute("style")
+    for style_attr in candidates["thumbs"]:
         if style_attr and "background: url" in style_attr:
             match = re.search(r'url\("([^"]+)"\)', style_attr)
-            if match:
-                bg_url = match.group(1)
-                if bg_url and bg_url.startswith("https://m.media-amazon.com/images/I/") and bg_url.endswith(allowed_endings):
-                    image_urls_set.add(bg_url)
-                    if len(image_urls_set) >= 5:
-                        break # Stop if we have enough URLs from this source
+            if match and usable(match.group(1)):
+                image_urls_set.add(usable(match.group(1)))
+                if len(image_urls_set) >= 5:
+                    break # Stop if we have enough URLs from this source
 
     # Also look for image URLs from the provided XPaths
     # Main/first image
-    try:
-        main_image_element = driver.find_element(By.XPATH, "//*[@id='imgTagWrapperId']/img")
-        main_image_src = main_image_element.get_attribute("src")
-        if main_image_src and main_image_src.startswith("https://m.media-amazon.com/images/I/") and main_image_src.endswith(allowed_endings):
-            image_urls_set.add(main_image_src)
-            print(f"{Fore.CYAN}  Found main image URL from XPath: {main_image_src}{Style.RESET_ALL}")
-    except Exception:
-        pass # Silently pass if an XPath element is not found
+    if usable(candidates["xpathMain"]):
+        image_urls_set.add(usable(candidates["xpathMain"]))
+        print(f"{Fore.CYAN}  Found main image URL from XPath: {candidates['xpathMain']}{Style.RESET_ALL}")
 
     # Other images with the new pattern
-    for i in range(1, 15): # Iterate from 1 to 14
+    for i, img_src in enumerate(candidates["items"], start=1):
         if len(image_urls_set) >= 5:
             break
-        try:
-            xpath = f"/html/body/div[2]/div/div/div[5]/div[3]/div[1]/div[1]/div/div/div[2]/div[1]/div[1]/ul/li[{i}]/span/span/div"
-            div_element = driver.find_element(By.XPATH, xpath)
-            img_element = div_element.find_element(By.XPATH, ".//img")
-            img_src = img_element.get_attribute("src")
-            if img_src and img_src.startswith("https://m.media-amazon.com/images/I/") and img_src.endswith(allowed_endings):
-                image_urls_set.add(img_src)
-                print(f"{Fore.CYAN}  Found image URL from XPath li[{i}]: {img_src}{Style.RESET_ALL}")
-        except Exception:
-            pass # Silently pass if an XPath element is not found
+        if usable(img_src):
+            image_urls_set.add(usable(img_src))
+            print(f"{Fore.CYAN}  Found image URL from XPath li[{i}]: {img_src}{Style.RESET_ALL}")
+
+def parse_product_page(html_content):
+    """
+    Extracts product details and image URLs from a saved product page without a browser.
+    Returns (product_details_str, image_urls) in the same format the live scraper stores.
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    details = []
+    for span in soup.select('#feature-bullets ul li span.a-list-item'):
+        detail_text = html.unescape(span.get_text(strip=True))
+        if detail_text:
+            details.append(f"<p>{detail_text}</p>")
+
+    # The gallery's full-size images are listed in the page's colorImages script, on whichever host served the page
+    image_urls = []
+    prefixes = "|".join(re.escape(p) for p in {AMAZON_IMAGE_PREFIX, rebase_url(AMAZON_IMAGE_PREFIX, "amazon_images")})
+    for image_id in re.findall(r'"(?:hiRes|large)":"(?:' + prefixes + r')([A-Za-z0-9%+\-]+)\.', html_content):
+        url = f"{AMAZON_IMAGE_PREFIX}{image_id}{AMAZON_IMAGE_SUFFIX}"
+        if url not in image_urls:
+            image_urls.append(url)
+        if len(image_urls) >= 5:
+            break
+    return "\n".join(details), image_urls
+
+def paced_get(driver, url=None):
+    """
+    Navigates to url (or refreshes the current page when url is None) in the next
+    request slot of the shared Amazon pacer, then waits only until the product's title
+    and image block are there instead of for the full page load.
+    """
+    get_pacer("amazon").wait()
+    navigate(driver, url, PRODUCT_PAGE_READY, "product_page") # Extraction below copes with a partially rendered page
 
 def check_and_click_continue_shopping(driver):
     """
@@ -143,14 +184,18 @@ def check_and_click_continue_shopping(driver):
             EC.element_to_be_clickable((By.CSS_SELECTOR, "span.a-button-primary.a-span12 button.a-button-text[alt='Continue shopping']"))
         )
         print(f"{Fore.BLUE}  'Continue shopping' button found. Clicking it...{Style.RESET_ALL}")
-        continue_button.click()
-        time.sleep(3) # Wait for the page to load after clicking
+        get_pacer("amazon").record(OUTCOME_BLOCKED) # The interstitial means we are going too fast
+        click_through(driver, continue_button, PRODUCT_PAGE_READY, "product_page") # Waits for the product page it leads back to
         return True
     except Exception:
         return False
 
-def _scrape_single_product_details(driver, product):
-    """Scrapes details for a single product, including images and product details."""
+def _scrape_single_product_details(driver, product, prefetcher=None, upcoming=()):
+    """
+    Scrapes details for a single product, including images and product details.
+    With a TabPrefetcher, the page may already be loaded in a background tab, and the
+    upcoming product URLs start loading while this one is extracted.
+    """
     # The check for grace_period_active and skipping new products is now handled in the main loop.
 
     product_url = product.get("product_url")
@@ -160,8 +205,18 @@ def _scrape_single_product_details(driver, product):
         return
 
     print(f"{Fore.GREEN}Navigating to: {Fore.YELLOW}{product_name}{Style.RESET_ALL}")
-    driver.get(product_url)
-    time.sleep(3) # Increased initial sleep time
+    if prefetcher:
+        prefetcher.open(driver, rebase_url(product_url, "amazon"))
+        prefetcher.prefetch(driver, upcoming)
+    else:
+        paced_get(driver, rebase_url(product_url, "amazon"))
+    with open_backend(driver) as page: # Page reads go over the configured backend; clicks stay on the driver
+        return _extract_product(driver, page, product, product_url, product_name)
+
+def _extract_product(driver, page, product, product_url, product_name):
+    """Extracts images and product details from the open product page into product."""
+    if page_archive:
+        page_archive.store(product_url, page.page_source(), kind="product")
 
     image_urls = set() # Use a set to store unique URLs
 
@@ -201,7 +256,6 @@ def _scrape_single_product_details(driver, product):
                 )
             except Exception as e:
                 print(f"{Fore.YELLOW}  Warning: Thumbnail elements not present after 'Continue shopping' click {Style.RESET_ALL}")
-            time.sleep(3)
             thumbnail_elements = driver.find_elements(By.CSS_SELECTOR, "#altImages .item, .image-block .a-list-item")
             if not thumbnail_elements:
                 thumbnail_elements = driver.find_elements(By.CSS_SELECTOR, "#altImages .item")
@@ -212,7 +266,7 @@ def _scrape_single_product_details(driver, product):
         image_urls.clear() # Clear previous attempts' URLs
         
         # Initial image extraction
-        extract_image_urls_from_page(driver, image_urls, allowed_endings)
+        extract_image_urls_from_page(page, image_urls, allowed_endings)
 
         for i, thumbnail in enumerate(thumbnail_elements):
             if len(image_urls) >= 5:
@@ -236,14 +290,24 @@ def _scrape_single_product_details(driver, product):
                 clickable_thumbnail = WebDriverWait(driver, 10).until(
                     EC.element_to_be_clickable(thumbnail)
                 )
+                shown = driver.execute_script(_MAIN_IMAGE_SCRIPT)
+                was_selected = "selected" in (clickable_thumbnail.get_attribute("class") or "")
                 try:
                     clickable_thumbnail.click()
                 except Exception:
                     driver.execute_script("arguments[0].click();", clickable_thumbnail)
-                
-                time.sleep(2)
 
-                extract_image_urls_from_page(driver, image_urls, allowed_endings)
+                # Wait for the main image to switch to this thumbnail's picture instead of a fixed pause;
+                # the thumbnail already on show (Amazon marks it selected) doesn't switch it
+                if not was_selected:
+                    try:
+                        WebDriverWait(driver, THUMBNAIL_SWAP_SECONDS, poll_frequency=0.1).until(
+                            lambda d: d.execute_script(_MAIN_IMAGE_SCRIPT) != shown
+                        )
+                    except TimeoutException:
+                        pass
+
+                extract_image_urls_from_page(page, image_urls, allowed_endings)
 
             except Exception: # Removed 'as e' to prevent printing the exception object
                 print(f"{Fore.YELLOW}  Error during thumbnail click or image extraction for thumbnail {i+1}.{Style.RESET_ALL}")
@@ -255,8 +319,7 @@ def _scrape_single_product_details(driver, product):
             break
         elif attempt < max_image_attempts - 1: # Only refresh if more attempts are allowed
             print(f"{Fore.YELLOW}  Only found {len(image_urls)} images on attempt {attempt + 1}. Refreshing page for images...{Style.RESET_ALL}")
-            driver.refresh()
-            time.sleep(5)
+            paced_get(driver)
         else: # Last attempt and still no images
             print(f"{Fore.YELLOW}  Could not scrape any images after {max_image_attempts} attempts for {product_name}. Found {len(image_urls)}.{Style.RESET_ALL}")
             break # Exit the image attempt loop
@@ -265,6 +328,7 @@ def _scrape_single_product_details(driver, product):
     # Removed redundant checks here.
 
     images_found = len(image_urls) > 0
+    get_pacer("amazon").record(OUTCOME_OK if images_found else OUTCOME_EMPTY)
     if not images_found:
         print(f"{Fore.RED}  No images found for {product_name} after {max_image_attempts} attempts. Skipping product details scraping.{Style.RESET_ALL}")
         return False, False # Return False for both product_details_found and images_found
@@ -276,36 +340,15 @@ def _scrape_single_product_details(driver, product):
         # Check for and click 'Continue shopping' button
         if check_and_click_continue_shopping(driver):
             print(f"{Fore.BLUE}  Retrying product details extraction after clicking 'Continue shopping'.{Style.RESET_ALL}")
-            driver.get(product_url) # Re-navigate to ensure fresh page state
-            time.sleep(3)
-
-
-    # Scrape product details with retry mechanism
-    details = []
-    product_details_str = ""
-    for attempt in range(5): # Retry up to 5 times
-        # Check for and click 'Continue shopping' button
-        if check_and_click_continue_shopping(driver):
-            print(f"{Fore.BLUE}  Retrying product details extraction after clicking 'Continue shopping'.{Style.RESET_ALL}")
-            driver.get(product_url) # Re-navigate to ensure fresh page state
-            time.sleep(3)
+            paced_get(driver, rebase_url(product_url, "amazon")) # Re-navigate to ensure fresh page state
 
         try:
             # Wait for the product details section to be present
             WebDriverWait(driver, 10).until(
                 EC.presence_of_element_located((By.XPATH, "/html/body/div[2]/div/div/div[5]/div[4]/div[49]/div/ul"))
             )
-            temp_details = []
-            for i in range(1, 20): # Iterate through potential list items
-                try:
-                    xpath = f"/html/body/div[2]/div/div/div[5]/div[4]/div[49]/div/ul/li[{i}]/span"
-                    detail_element = driver.find_element(By.XPATH, xpath)
-                    detail_text = html.unescape(detail_element.text.strip()) # Handle special characters
-                    if detail_text:
-                        temp_details.append(f"<p>{detail_text}</p>")
-                except Exception:
-                    # Break if no more list items are found
-                    break
+            # All list items in one script, up to the first missing one
+            temp_details = [f"<p>{html.unescape(text)}</p>" for text in page.evaluate(_DETAIL_BULLETS_SCRIPT) if text] # Handle special characters
             
             if temp_details:
                 details = temp_details
@@ -314,13 +357,11 @@ def _scrape_single_product_details(driver, product):
                 break # Break out of retry loop if successful
             else:
                 print(f"{Fore.YELLOW}  No product details found on attempt {attempt + 1} for {product_name}. Refreshing page...{Style.RESET_ALL}")
-                driver.refresh()
-                time.sleep(5) # Wait after refresh
+                paced_get(driver) # Refresh in the next pacing slot
         except Exception as e:
             print(f"{Fore.YELLOW}  Could not find product details section on attempt {attempt + 1}: {Style.RESET_ALL}")
             if attempt < 4: # Don't refresh on the last attempt if it failed
-                driver.refresh()
-                time.sleep(5) # Wait after refresh
+                paced_get(driver) # Refresh in the next pacing slot
     
     if not details:
         print(f"{Fore.YELLOW}  No product details found for {product_name} after multiple attempts.{Style.RESET_ALL}")
@@ -328,6 +369,8 @@ def _scrape_single_product_details(driver, product):
     # Create a new dictionary to reorder keys
     new_product = {}
     for key, value in product.items():
+        if key == "product_details" or key.startswith("image_url_"):
+            continue # Replaced by what was just scraped
         new_product[key] = value
         if key == "product_url":
             if product_details_str: # Only add if product_details_str is not empty
@@ -335,7 +378,6 @@ def _scrape_single_product_details(driver, product):
             # Add image_urls after product_details
             for i, url in enumerate(list(image_urls)[:5]): # Take up to 5 unique URLs
                 new_product[f"image_url_{i+1}"] = url
-            break # Stop after adding product_details and image_urls
 
     # Append remaining image_urls if not already added
     for i, url in enumerate(list(image_urls)[:5]):
@@ -351,23 +393,10 @@ def _scrape_single_product_details(driver, product):
     
     return product_details_found, images_found
 
-def scrape_product_details():
-    global start_time, grace_period_active
-    load_config() # Load run_time and grace_time from config.json
-
-    products_data = []
-    try:
-        with open(product_file, 'r', encoding='utf-8') as f:
-            products_data = json.load(f)
-    except FileNotFoundError:
-        print(f"{Fore.RED}Error: {product_file} not found. Please run scrape_products.py first.{Style.RESET_ALL}")
-        return
-    except json.JSONDecodeError:
-        print(f"{Fore.RED}Error: Could not decode JSON from {product_file}. File might be empty or corrupted.{Style.RESET_ALL}")
-        return
-
+def setup_driver(headless_mode):
+    """Sets up and returns a stealth Chrome WebDriver instance."""
     chrome_options = Options()
-    if headless:
+    if headless_mode:
         chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
@@ -376,11 +405,18 @@ def scrape_product_details():
     chrome_options.add_argument("--window-size=1920,1080") # Set a consistent window size
     chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
     chrome_options.add_argument("--start-maximized") # Maximize browser window
-    
+    chrome_options.add_argument("--disable-renderer-backgrounding") # Prefetch tabs keep loading in the background
+    chrome_options.add_argument("--disable-background-timer-throttling")
+    apply_page_load_strategy(chrome_options) # Don't block on ads and trackers
+
     # Setup Chrome driver
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=chrome_options)
-    
+    apply_stealth(driver)
+    return driver
+
+def apply_stealth(driver):
+    """Applies the stealth patches to the current tab; prefetch tabs need them too."""
     stealth(driver,
             languages=["en-US", "en"],
             vendor="Google Inc.",
@@ -390,65 +426,182 @@ def scrape_product_details():
             fix_hairline=True,
             )
 
-    start_time = datetime.datetime.now() # Record the start time of the scraping process
+def close_driver(driver):
+    driver.quit() # Close the browser after scraping all products
+    print(f"{Fore.CYAN}Browser closed.{Style.RESET_ALL}")
 
-    i = 0
+def enrich_category(browser, category, category_url, budget):
+    """
+    Scrapes missing details and images for every product in one category's file, and
+    refreshes those whose listing changed or whose details are older than the TTL.
+    browser is the worker's ManagedDriver, which restarts Chrome between (or, after a crash, during) products.
+    """
+    product_file = category_file(category)
+    products_data = []
+    recover_catalog(product_file) # Repairs a catalog left damaged by an interrupted run
     try:
-        while i < len(products_data):
-            if stop_scraping_event.is_set():
-                print(f"{Fore.RED}Stopping scraping due to time limit.{Style.RESET_ALL}")
+        products_data = load_products(product_file)
+    except FileNotFoundError:
+        print(f"{Fore.RED}Error: {product_file} not found. Please run scrape_products.py first.{Style.RESET_ALL}")
+        return
+    except ValueError:
+        print(f"{Fore.RED}Error: Could not decode JSON from {product_file}. File might be empty or corrupted.{Style.RESET_ALL}")
+        return
+
+    # Colour/storage variants share their details, so one scraped sibling can stand in for the rest
+    # of a cluster whose own images are already known
+    siblings = {}   # cluster label -> products in it
+    cluster_of = {} # id(product) -> cluster label
+    if variant_settings()["reuse_details"]:
+        for product, label in zip(products_data, cluster_products(products_data, with_details=False)):
+            siblings.setdefault(label, []).append(product)
+            cluster_of[id(product)] = label
+        print(f"{Fore.CYAN}Grouped {len(products_data)} products into {len(siblings)} variant clusters.{Style.RESET_ALL}")
+
+    # Progress is group-committed every few products instead of rewriting the file after each one.
+    # A sharded runner leaves the catalog alone and writes its products to a partial for `pinzon merge`.
+    removed = set() # Keys of products this shard dropped
+    if shard:
+        writer = PartialWriter(shard.partial_path(category, KIND_ENRICH), enrich_partial(shard, category))
+        print(f"{Fore.CYAN}Shard {shard}: enriching this shard's products into '{writer.file_path}'.{Style.RESET_ALL}")
+    else:
+        writer = CatalogWriter(product_file)
+    # Only products without details, with a changed listing or past their TTL are visited, stalest first
+    config = refresh_settings()
+    now = time.time()
+    stamped = stamp_legacy_details(products_data, now, config)
+    if stamped:
+        writer.update((products_data, removed) if shard else products_data, stamped)
+        print(f"{Fore.CYAN}Spread the detail timestamps of {stamped} products enriched before they were recorded over the {config['ttl_days']}-day TTL.{Style.RESET_ALL}")
+    queue = [p for p in refresh_queue(products_data, now, config) if not shard or shard.owns_product(p)]
+    reasons = {}
+    for product in queue:
+        reason = refresh_reason(product, now, config)
+        reasons[reason] = reasons.get(reason, 0) + 1
+    summary = ", ".join(f"{count} {reason.replace('_', ' ')}" for reason, count in sorted(reasons.items())) or "none"
+    print(f"{Fore.CYAN}{len(queue)} of {len(products_data)} products need details ({summary}); the rest are fresh.{Style.RESET_ALL}")
+
+    def fresh_sibling(product):
+        """A variant of product whose details are fresh enough to copy, or None."""
+        if not product.get("image_url_1"):
+            return None # Variants differ in their photos; a product without its own images needs its page
+        fresh = [s for s in siblings.get(cluster_of.get(id(product)), []) if refresh_reason(s, time.time(), config) is None]
+        return find_scraped_sibling(product, fresh)
+
+    # The next product pages load in background tabs while the current one is extracted
+    prefetcher = TabPrefetcher(PRODUCT_PAGE_READY, "product_page", get_pacer("amazon"), prepare_tab=apply_stealth)
+
+    def upcoming_urls(position):
+        """URLs of the queued products after position that will need a page load, as far as the prefetcher looks."""
+        urls, clusters = [], {cluster_of.get(id(queue[position - 1]))}
+        for later in queue[position:]:
+            if len(urls) >= prefetcher.depth:
                 break
+            label = cluster_of.get(id(later))
+            if (label is not None and label in clusters) or refresh_reason(later, time.time(), config) is None or fresh_sibling(later):
+                continue # Will be copied from a variant, possibly the one being scraped now
+            clusters.add(label)
+            urls.append(rebase_url(later.get("product_url") or "", "amazon"))
+        return urls
+
+    with writer:
+        try:
+            for position, product in enumerate(queue, start=1):
+                if budget.stopped():
+                    print(f"{Fore.RED}Stopping scraping due to time limit.{Style.RESET_ALL}")
+                    break
 
-            product = products_data[i]
-            print(f"\n{Fore.WHITE}--- Processing product {i+1}/{len(products_data)} ---{Style.RESET_ALL}")
-            
-            image_url_count = sum(1 for key in product if key.startswith("image_url_"))
-            
-            # Condition to determine if scraping is needed
-            # Scrape if product_details is missing/empty OR if there are no images.
-            # If product_details exists and is not empty AND at least 1 image exists, skip entirely.
-            has_product_details = "product_details" in product and product["product_details"]
-            has_at_least_one_image = image_url_count >= 1
-            
-            needs_scraping = not (has_product_details and has_at_least_one_image)
+                print(f"\n{Fore.WHITE}--- Processing {category} product {position}/{len(queue)} ---{Style.RESET_ALL}")
+                reason = refresh_reason(product, time.time(), config)
+                if reason is None:
+                    continue # Filled in from a variant scraped earlier in this run
 
-            if grace_period_active and needs_scraping:
-                print(f"{Fore.YELLOW}Grace period active. Stopping new product scraping and exiting.{Style.RESET_ALL}")
-                break # Exit the loop immediately if grace period is active and a new product needs scraping
+                # Only a sibling with fresh details can stand in for this one.
+                # Copying a variant needs no page load, so it is still allowed during the grace period
+                sibling = fresh_sibling(product)
 
-            if needs_scraping:
-                product_details_found, images_found = _scrape_single_product_details(driver, product)
-                
-                if not product_details_found or not images_found:
-                    print(f"{Fore.RED}  Removing product '{product.get('product_name', 'Unknown Product')}' due to missing product details ({product_details_found}) or images ({images_found}).{Style.RESET_ALL}")
-                    products_data.pop(i) # Remove the product, do not increment i
-                else:
-                    print(f"{Fore.GREEN}  Successfully scraped '{product.get('product_name', 'Unknown Product')}' with details and images.{Style.RESET_ALL}")
-                    i += 1 # Increment i only if product is kept
-            else:
-                print(f"{Fore.YELLOW}  Skipping '{product.get('product_name', 'Unknown Product')}' - already has product details and at least 1 image.{Style.RESET_ALL}")
-                i += 1 # Increment i for skipped products
-            
-            # Write the updated data back to the file after each product is processed (or removed)
-            with open(product_file, 'w', encoding='utf-8') as f:
-                json.dump(products_data, f, indent=4, ensure_ascii=False)
-            print(f"{Fore.GREEN}  Updated {product_file} with current state ({len(products_data)} products).{Style.RESET_ALL}")
+                if budget.grace_period_active and not sibling:
+                    print(f"{Fore.YELLOW}Grace period active. Stopping new product scraping for {category}.{Style.RESET_ALL}")
+                    break # Exit the loop immediately if grace period is active and a new product needs scraping
 
-            # Check time limit after processing each product
-            if check_time_limit():
-                break
+                if sibling:
+                    product["product_details"] = sibling["product_details"] # The product keeps its own images
+                    product["details_from"] = extract_asin(sibling.get("product_url"))
+                    mark_details_scraped(product, sibling["details_scraped_at"], fingerprint_fields=config["fingerprint_fields"])
+                    print(f"{Fore.GREEN}  Reused details of variant {product['details_from']} for '{product.get('product_name', 'Unknown Product')}'.{Style.RESET_ALL}")
+                else:
+                    # Scraped into a copy without the old details and images, so a failed refresh keeps them.
+                    # A browser crash restarts Chrome and retries this same product
+                    attempt = {k: v for k, v in product.items() if k not in DETAIL_KEYS and not k.startswith("image_url_")}
+                    product_details_found, images_found = browser.call(_scrape_single_product_details, attempt, prefetcher, upcoming_urls(position))
+
+                    if product_details_found and images_found:
+                        product.clear()
+                        product.update(attempt)
+                        mark_details_scraped(product, fingerprint_fields=config["fingerprint_fields"])
+                        print(f"{Fore.GREEN}  Successfully scraped '{product.get('product_name', 'Unknown Product')}' with details and images ({reason.replace('_', ' ')}).{Style.RESET_ALL}")
+                    elif reason == REASON_MISSING:
+                        print(f"{Fore.RED}  Removing product '{product.get('product_name', 'Unknown Product')}' due to missing product details ({product_details_found}) or images ({images_found}).{Style.RESET_ALL}")
+                        products_data.pop(next(i for i, p in enumerate(products_data) if p is product))
+                        removed.add(product_key(product))
+                    else:
+                        # Keep the old details; stamping them again waits a full TTL before the next try
+                        mark_details_scraped(product, fingerprint_fields=config["fingerprint_fields"])
+                        print(f"{Fore.YELLOW}  Could not refresh '{product.get('product_name', 'Unknown Product')}'; keeping its previous details and images.{Style.RESET_ALL}")
+
+                # Queue the change; the writer commits every few products and when the category ends
+                if writer.update((products_data, removed) if shard else products_data):
+                    print(f"{Fore.GREEN}  Updated {product_file} with current state ({len(products_data)} products).{Style.RESET_ALL}")
+
+                # Check time limit after processing each product
+                if budget.check():
+                    break
                 
-    except KeyboardInterrupt:
-        print(f"\n{Fore.RED}KeyboardInterrupt detected. Exiting gracefully...{Style.RESET_ALL}")
-    except webdriver.common.exceptions.NoSuchWindowException:
-        print(f"{Fore.RED}Browser window closed unexpectedly. Exiting gracefully...{Style.RESET_ALL}")
-    except Exception as e:
-        print(f"{Fore.RED}An unexpected error occurred: {Style.RESET_ALL}")
-        # traceback.print_exc() # Suppress stacktrace as requested
+        except NoSuchWindowException:
+            print(f"{Fore.RED}Browser window closed unexpectedly. Exiting gracefully...{Style.RESET_ALL}")
+            budget.scheduler.stop_event.set()
+        except Exception as e:
+            print(f"{Fore.RED}An unexpected error occurred: {Style.RESET_ALL}")
+            # traceback.print_exc() # Suppress stacktrace as requested
+        finally:
+            prefetcher.close()
+    prefetcher.report()
+    return len(products_data)
+
+def scrape_product_details(setup_worker=None, teardown_worker=None):
+    """
+    Enriches every category within the configured run time. setup_worker/teardown_worker
+    let a caller that keeps warm browsers (the daemon) lend them out.
+    """
+    global page_archive
+    load_config() # Load run_time and grace_time from config.json
+
+    categories = load_categories()
+    if not categories:
+        print(f"{Fore.RED}Error: No categories found in product_links.json.{Style.RESET_ALL}")
+        return
+
+    # One scheduler shares the browser workers and the run/grace time across all categories
+    scheduler = CategoryScheduler(categories,
+                                  workers=get_setting("workers", 1),
+                                  run_time_seconds=RUN_TIME_SECONDS,
+                                  grace_time_seconds=GRACE_TIME_SECONDS)
+    page_archive = open_archive()
+    launch = setup_worker or (lambda: setup_driver(headless))
+    release = teardown_worker or close_driver
+    # Replaced browsers are never handed back to a pool as healthy
+    recycle = (lambda driver: teardown_worker(driver, failed=True)) if teardown_worker else close_driver
+    try:
+        return scheduler.run(enrich_category,
+                             setup_worker=lambda: ManagedDriver(launch, release, recycle),
+                             teardown_worker=lambda browser: browser.close())
     finally:
-        if driver:
-            driver.quit() # Close the browser after scraping all products
-            print(f"{Fore.CYAN}Browser closed.{Style.RESET_ALL}")
+        if page_archive:
+            page_archive.close()
+        pacer = get_pacer("amazon")
+        pacer.report()
+        pacer.save_state()
+        get_navigation_stats().report()
 
 if __name__ == "__main__":
     scrape_product_details()
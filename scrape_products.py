@@ -8,10 +8,20 @@ from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import os
 import shutil # Import shutil for rmtree
+import re
 import time
-import random # Import random for random delays
 from selenium_stealth import stealth
 from webdriver_manager.chrome import ChromeDriverManager
+from scheduler import CategoryScheduler, load_categories
+from catalog import category_file, canonical_product_url, load_products, parse_price_paise, recover_catalog, save_products, CatalogWriter, AMAZON_BASE_URL
+from archive import open_archive
+from price_history import open_price_history, DEFAULT_DOWNSAMPLE_AFTER_DAYS
+from settings import get_setting, rebase_url
+from pacing import get_pacer, OUTCOME_OK, OUTCOME_EMPTY, OUTCOME_BLOCKED
+from navigation import apply_page_load_strategy, get_navigation_stats, navigate, SEARCH_PAGE_READY
+from sharding import crawl_partial, PartialWriter, KIND_CRAWL
+from browser_backend import open_backend
+from freshness import carry_over_details, index_by_key, listing_fingerprint, refresh_settings
 
 # --- ANSI Color Codes ---
 COLOR_RESET = "\033[0m"
@@ -23,15 +33,40 @@ COLOR_CRITICAL = "\033[41m\033[97m" # Red background, White text
 COLOR_STEP = "\033[96m"    # Cyan
 
 # --- Configuration Variables ---
-product = "mobile_phones"  # Manually set by developer, must match key in product_links.json
 headless = True           # Toggle for headless/headful browser mode
+shard = None              # sharding.Shard this runner crawls (pinzon crawl --shard i/N); None crawls every page
 
 # --- Constants ---
 PRODUCT_LINKS_FILE = "product_links.json"
 OUTPUT_FOLDER = "temp" # Folder to save downloaded HTML and scraped data
 
-# Ensure output folder exists
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+page_archive = None # HtmlArchive for fetched search pages, set in main() when enabled in config.json
+price_history = None # PriceHistory every crawled price is appended to, set in main()
+
+# --- Empty Page Classification ---
+PAGE_END_OF_RESULTS = "end_of_results" # Past the last page: stop the category
+PAGE_BLOCKED = "blocked"               # Captcha/interstitial: back off before retrying
+PAGE_TRANSIENT = "transient"           # Page didn't render properly: retry soon
+MAX_TRANSIENT_RETRIES = 3
+MAX_BLOCKED_RETRIES = 4
+MAX_CONSECUTIVE_EMPTY_PAGES = 2
+
+HOME_LINK_TEXT = "Go to the Amazon.in home page to continue shopping" # Amazon's interstitial in place of results
+
+BLOCKED_PAGE_MARKERS = (
+    "/errors/validateCaptcha",
+    "Enter the characters you see below",
+    "Sorry, we just need to make sure you're not a robot",
+    "To discuss automated access to Amazon data",
+    HOME_LINK_TEXT,
+    "api-services-support@amazon.com",
+)
+NO_RESULTS_MARKERS = (
+    "No results for",
+    "did not match any products",
+)
+NEXT_PAGE_DISABLED_PATTERN = re.compile(r'class="[^"]*s-pagination-next[^"]*s-pagination-disabled')
+NEXT_PAGE_LINK_PATTERN = re.compile(r'<a[^>]+class="[^"]*s-pagination-next')
 
 def clear_output_folder(folder_path):
     """Clears all contents of the specified folder."""
@@ -45,15 +80,6 @@ def clear_output_folder(folder_path):
         except Exception as e:
             print(f"{COLOR_ERROR}ERR: Failed to delete {file_path}. Reason: {e}{COLOR_RESET}", flush=True)
 
-def load_product_links(file_path, product_key):
-    """Loads product links from a JSON file and returns the URL for the specified product key."""
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-        for item in data:
-            if product_key in item:
-                return item[product_key]
-    return None
-
 def setup_driver(headless_mode):
     """Sets up and returns a Selenium WebDriver instance."""
     chrome_options = Options()
@@ -95,6 +121,7 @@ def setup_driver(headless_mode):
 
     if headless_mode:
         chrome_options.add_argument("--headless=new") # Use new headless mode
+    apply_page_load_strategy(chrome_options) # Don't block on ads and trackers
 
     # Setup Chrome driver
     service = Service(ChromeDriverManager().install())
@@ -153,16 +180,14 @@ def setup_driver(headless_mode):
 
 def handle_amazon_home_link(driver, current_page_num, base_url):
     """
-    Checks for the 'Go to the Amazon.in home page to continue shopping' link.
-    If found, clicks it, waits for the home page to load, and then
-    either restarts scraping from page 1 or navigates back to the current page.
+    Clicks the 'Go to the Amazon.in home page to continue shopping' link of the current page
+    (the caller checks the page's HTML for it first), waits for the home page to load, and
+    then either restarts scraping from page 1 or navigates back to the current page.
     Returns the page number to continue scraping from.
     """
     try:
-        # Look for the link by its text
-        home_link = WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.PARTIAL_LINK_TEXT, "Go to the Amazon.in home page to continue shopping"))
-        )
+        # The link is already in the loaded page, so there is nothing to wait for
+        home_link = driver.find_element(By.PARTIAL_LINK_TEXT, HOME_LINK_TEXT)
         
         print(f"{COLOR_INFO}INFO: Detected 'Go to Amazon.in home page' link. Clicking to proceed...{COLOR_RESET}", flush=True)
         home_link.click()
@@ -176,10 +201,8 @@ def handle_amazon_home_link(driver, current_page_num, base_url):
         # Now, navigate back to the correct product search page
         target_url = f"{base_url}&page={current_page_num}" if current_page_num > 1 else base_url
         print(f"{COLOR_INFO}INFO: Navigating back to product search page {current_page_num}. URL: {target_url}{COLOR_RESET}", flush=True)
-        driver.get(target_url)
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, 'body'))
-        )
+        get_pacer("amazon").wait()
+        navigate(driver, target_url, SEARCH_PAGE_READY, "search_page")
         print(f"{COLOR_INFO}INFO: Successfully returned to product search page {current_page_num}.{COLOR_RESET}", flush=True)
         return True # Indicate that the link was found and handled
             
@@ -188,20 +211,21 @@ def handle_amazon_home_link(driver, current_page_num, base_url):
         # print(f"Amazon home link not found or error during handling: {e}")
         return False # Indicate that the link was not found or an error occurred
 
-def scrape_page(driver, url):
-    """Navigates to a URL, waits for content, and returns page source."""
-    # Add a random delay before navigating to the URL to simulate human behavior
-    time.sleep(random.uniform(1, 3)) # Random delay between 1 and 3 seconds
-    driver.get(url)
-    # Wait for the page to load dynamically. Adjust the condition as needed.
-    # For example, wait for a specific element to be present.
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.TAG_NAME, 'body')) # Wait for the body tag to be present
-    )
-    return driver.page_source
-
-def parse_products(html_content):
-    """Parses HTML content to extract product details."""
+def scrape_page(page, url):
+    """Navigates to a URL through the browser backend, waits for content, and returns page source."""
+    # Wait for the next request slot; the pace adapts to how Amazon is responding
+    get_pacer("amazon").wait()
+    # Waits for the result cards (or a captcha/interstitial) only, not for the full load
+    page.navigate(url, SEARCH_PAGE_READY, "search_page")
+    return page.page_source()
+
+def parse_products(html_content, scraped_at=None):
+    """
+    Parses HTML content to extract product details.
+    scraped_at is the fetch time recorded on every product (defaults to now).
+    """
+    scraped_at = int(scraped_at if scraped_at is not None else time.time())
+    fingerprint_fields = refresh_settings()["fingerprint_fields"]
     soup = BeautifulSoup(html_content, 'html.parser')
     products_data = []
 
@@ -246,116 +270,213 @@ def parse_products(html_content):
 
         # Prepend base URL if product_url is relative
         if product_url and not product_url.startswith('http') and product_url != "N/A":
-            # Assuming the base URL is for amazon.in, we can construct the full URL
-            # This needs to be more robust if the domain changes.
-            product_url = f"https://www.amazon.in{product_url}"
+            # Relative links are resolved against the configured Amazon base URL
+            product_url = f"{AMAZON_BASE_URL}{product_url}"
+
+        # Store the canonical /dp/ASIN form instead of the ~400-byte tracking URL
+        if product_url != "N/A":
+            product_url = canonical_product_url(product_url)
+
+        # Integer paise for sorting and scoring; product_price keeps the displayed text
+        price_paise = parse_price_paise(product_price) if product_price != "N/A" else None
 
         if product_name != "N/A" and product_price != "N/A" and product_url != "N/A":
-            products_data.append({
+            product = {
                 "product_name": product_name,
                 "product_price": product_price,
-                "product_url": product_url
-            })
+                "price_paise": price_paise,
+                "product_url": product_url,
+                "scraped_at": scraped_at
+            }
+            # What the details were scraped for; scrape_details refreshes them when this changes
+            product["listing_fingerprint"] = listing_fingerprint(product, fingerprint_fields)
+            products_data.append(product)
     return products_data
 
-def save_to_json(data, filename):
-    """Saves data to a JSON file, appending if file exists."""
-    # Save directly to the root directory
-    file_path = filename
-    if os.path.exists(file_path):
-        with open(file_path, 'r+', encoding='utf-8') as f:
-            existing_data = json.load(f)
-            existing_data.extend(data)
-            f.seek(0)
-            json.dump(existing_data, f, indent=4, ensure_ascii=False)
-    else:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-
-def main():
-    # Clear the output folder at the beginning
-    print(f"\n{COLOR_STEP}--- STEP 1: Initializing Scraping Process ---{COLOR_RESET}", flush=True)
-    print(f"{COLOR_STEP}Clearing contents of '{OUTPUT_FOLDER}' folder...{COLOR_RESET}", flush=True)
-    clear_output_folder(OUTPUT_FOLDER)
-    print(f"{COLOR_STEP}Contents of '{OUTPUT_FOLDER}' cleared.{COLOR_RESET}\n", flush=True)
-
-    base_url = load_product_links(PRODUCT_LINKS_FILE, product)
+def is_last_results_page(html_content):
+    """True if the pagination control shows there is no next page."""
+    return bool(NEXT_PAGE_DISABLED_PATTERN.search(html_content))
 
-    if not base_url:
-        print(f"{COLOR_ERROR}ERR: Product '{product}' not found in {PRODUCT_LINKS_FILE}. Please check configuration.{COLOR_RESET}", flush=True)
-        return
-
-    # Clear the content of the product JSON file at the beginning
-    output_filename = f"{product}.json"
+def classify_empty_page(html_content):
+    """
+    Decides why a search page yielded no products:
+    PAGE_BLOCKED for captchas and interstitials, PAGE_END_OF_RESULTS when the
+    pagination control (or a no-results message) says we are past the last page,
+    and PAGE_TRANSIENT for anything else, e.g. a page that didn't finish rendering.
+    """
+    if any(marker in html_content for marker in BLOCKED_PAGE_MARKERS):
+        return PAGE_BLOCKED
+    if is_last_results_page(html_content) or any(marker in html_content for marker in NO_RESULTS_MARKERS):
+        return PAGE_END_OF_RESULTS
+    # A results page with a pagination strip but no next link is past the end too
+    if 's-pagination-strip' in html_content and not NEXT_PAGE_LINK_PATTERN.search(html_content):
+        return PAGE_END_OF_RESULTS
+    return PAGE_TRANSIENT
+
+def crawl_category(driver, category, base_url, budget):
+    """
+    Crawls every search results page of one category into its own output file.
+    A sharded runner crawls only its own pages into a partial that `pinzon merge` combines.
+    """
+    page_num, page_step = 1, 1
+    previous = {} # key -> products of the last crawl, whose details are carried over
     print(f"{COLOR_STEP}--- STEP 2: Preparing Output File ---{COLOR_RESET}", flush=True)
-    if os.path.exists(output_filename):
-        print(f"{COLOR_STEP}Clearing existing data in '{output_filename}'...{COLOR_RESET}", flush=True)
-        with open(output_filename, 'w', encoding='utf-8') as f:
-            json.dump([], f) # Write an empty JSON array
-        print(f"{COLOR_STEP}Output preparation complete. '{output_filename}' is now empty.{COLOR_RESET}\n", flush=True)
+    if shard:
+        output_filename = shard.partial_path(category, KIND_CRAWL)
+        writer = PartialWriter(output_filename, crawl_partial(shard, category))
+        page_num, page_step = shard.first_page, shard.count
+        print(f"{COLOR_STEP}Shard {shard}: crawling pages {page_num}, {page_num + page_step}, ... into '{output_filename}'.{COLOR_RESET}\n", flush=True)
     else:
-        print(f"{COLOR_STEP}Output file '{output_filename}' does not exist. It will be created.{COLOR_RESET}\n", flush=True)
-
-    page_num = 1
-    no_product_pages_count = 0 # Counter for consecutive pages with no non-sponsored products
-    driver = None
-
-    try:
-        driver = setup_driver(headless)
-        while True:
-            current_page_retry_count = 0
-            while current_page_retry_count < 5: # Retry up to 5 times for the current page
+        # Clear the content of the category's JSON file at the beginning
+        output_filename = category_file(category)
+        writer = CatalogWriter(output_filename)
+        if os.path.exists(output_filename):
+            # Details and images of products seen again are kept; scrape_details refreshes them when stale
+            recover_catalog(output_filename)
+            try:
+                previous = index_by_key(load_products(output_filename))
+            except ValueError:
+                print(f"{COLOR_WARNING}WARNING: Could not read '{output_filename}'; product details will be scraped again.{COLOR_RESET}", flush=True)
+            print(f"{COLOR_STEP}Clearing existing data in '{output_filename}'...{COLOR_RESET}", flush=True)
+            save_products([], output_filename) # Write an empty product list
+            print(f"{COLOR_STEP}Output preparation complete. '{output_filename}' is now empty.{COLOR_RESET}\n", flush=True)
+        else:
+            print(f"{COLOR_STEP}Output file '{output_filename}' does not exist. It will be created.{COLOR_RESET}\n", flush=True)
+
+    pacer = get_pacer("amazon")
+    no_product_pages_count = 0 # Counter for consecutive pages that stayed empty after retries
+    total_products = 0
+    end_of_results = False
+
+    # Pages are kept in memory and group-committed instead of re-reading and rewriting the file per page
+    category_products = []
+    pages = {} # page number -> products, what a shard's partial holds
+    with writer, open_backend(driver) as page:
+        while not budget.check():
+            transient_retries = 0
+            blocked_retries = 0
+            attempt = 1
+            while True:
                 current_url = f"{base_url}&page={page_num}" if page_num > 1 else base_url
-                print(f"{COLOR_STEP}--- STEP 3: Scraping Page {page_num} (Attempt {current_page_retry_count + 1}) ---{COLOR_RESET}", flush=True)
+                print(f"{COLOR_STEP}--- STEP 3: Scraping {category} Page {page_num} (Attempt {attempt}) ---{COLOR_RESET}", flush=True)
                 print(f"{COLOR_INFO}INFO: Navigating to URL: {current_url}{COLOR_RESET}", flush=True)
 
-                html_content = scrape_page(driver, current_url)
+                html_content = scrape_page(page, current_url)
+
+                # Only the interstitial has the home-page link; regular result pages go straight on
+                link_was_handled = HOME_LINK_TEXT in html_content and handle_amazon_home_link(driver, page_num, base_url)
 
-                link_was_handled = handle_amazon_home_link(driver, page_num, base_url)
-                
                 if link_was_handled:
                     print(f"{COLOR_INFO}INFO: Amazon home link successfully handled. Re-fetching HTML content from current driver state for page {page_num}...{COLOR_RESET}", flush=True)
-                    html_content = driver.page_source
-                    # Reset retry count if link was handled, as it's a fresh attempt on the page
-                    current_page_retry_count = 0
-                
+                    html_content = page.page_source()
+
+                if page_archive:
+                    page_archive.store(current_url, html_content, kind="search", category=category, page=page_num)
+
                 page_products = parse_products(html_content)
-                
-                if not page_products:
-                    current_page_retry_count += 1
-                    print(f"{COLOR_WARNING}WARNING: No non-sponsored products found on page {page_num} (Attempt {current_page_retry_count}).{COLOR_RESET}", flush=True)
-                    if current_page_retry_count < 5:
-                        print(f"{COLOR_INFO}INFO: Retrying page {page_num}...{COLOR_RESET}", flush=True)
-                        time.sleep(random.uniform(3, 7)) # Add a longer delay before retrying the same page
-                        continue # Retry the current page
-                    else:
-                        print(f"{COLOR_CRITICAL}CRITICAL: No non-sponsored products found on page {page_num} after 5 attempts. Moving to next page.{COLOR_RESET}", flush=True)
-                        no_product_pages_count += 1 # Increment global empty page counter
-                        break # Exit retry loop, proceed to next page
+
+                if page_products:
+                    pacer.record(OUTCOME_OK)
+                    no_product_pages_count = 0 # Reset empty page counter if products are found
+                    carry_over_details(page_products, previous)
+                    category_products.extend(page_products)
+                    pages[page_num] = page_products
+                    writer.update(pages if shard else category_products, changes=len(page_products))
+                    if price_history:
+                        price_history.record(page_products)
+                    total_products += len(page_products)
+                    print(f"{COLOR_SUCCESS}SUCCESS: Found {len(page_products)} products on page {page_num}. Data queued for {output_filename}.{COLOR_RESET}", flush=True)
+                    if is_last_results_page(html_content):
+                        print(f"{COLOR_INFO}INFO: Page {page_num} is the last results page for '{category}'.{COLOR_RESET}", flush=True)
+                        end_of_results = True
+                    break # Products found, proceed to next page
+
+                page_kind = classify_empty_page(html_content)
+                attempt += 1
+                pacer.record({PAGE_END_OF_RESULTS: OUTCOME_OK, PAGE_BLOCKED: OUTCOME_BLOCKED}.get(page_kind, OUTCOME_EMPTY))
+                if page_kind == PAGE_END_OF_RESULTS:
+                    print(f"{COLOR_INFO}INFO: Page {page_num} is past the last results page for '{category}'.{COLOR_RESET}", flush=True)
+                    end_of_results = True
+                    break
+                elif page_kind == PAGE_BLOCKED:
+                    blocked_retries += 1
+                    if blocked_retries > MAX_BLOCKED_RETRIES:
+                        print(f"{COLOR_CRITICAL}CRITICAL: Still blocked on page {page_num} after {MAX_BLOCKED_RETRIES} back-offs. Stopping category '{category}'.{COLOR_RESET}", flush=True)
+                        return total_products
+                    # The pacer has already slowed down and scheduled a cooldown before the next request
+                    print(f"{COLOR_WARNING}WARNING: Page {page_num} is a captcha/interstitial. Retrying after the pacer's cooldown ({blocked_retries}/{MAX_BLOCKED_RETRIES}).{COLOR_RESET}", flush=True)
                 else:
-                    no_product_pages_count = 0 # Reset global empty page counter if products are found
-                    current_page_retry_count = 0 # Reset current page retry counter
-                    output_filename = f"{product}.json"
-                    save_to_json(page_products, output_filename)
-                    print(f"{COLOR_SUCCESS}SUCCESS: Found {len(page_products)} products on page {page_num}. Data appended to {output_filename}.{COLOR_RESET}", flush=True)
-                    break # Exit retry loop, products found, proceed to next page
-
-            if no_product_pages_count >= 5: # Check global empty page counter after all retries for a page
-                print(f"{COLOR_CRITICAL}CRITICAL: No non-sponsored products found on 5 consecutive pages (including retries). Terminating scraping process.{COLOR_RESET}", flush=True)
+                    transient_retries += 1
+                    if transient_retries > MAX_TRANSIENT_RETRIES:
+                        print(f"{COLOR_CRITICAL}CRITICAL: No non-sponsored products found on page {page_num} after {MAX_TRANSIENT_RETRIES} retries. Moving to next page.{COLOR_RESET}", flush=True)
+                        no_product_pages_count += 1
+                        break
+                    print(f"{COLOR_WARNING}WARNING: Page {page_num} rendered without products. Retrying ({transient_retries}/{MAX_TRANSIENT_RETRIES})...{COLOR_RESET}", flush=True)
+
+            if end_of_results:
+                print(f"{COLOR_SUCCESS}SUCCESS: Reached the end of results for '{category}' after page {page_num}.{COLOR_RESET}", flush=True)
                 break
 
-            page_num += 1
-            time.sleep(random.uniform(2, 5)) # Be polite and avoid hammering the server, random delay
+            if no_product_pages_count >= MAX_CONSECUTIVE_EMPTY_PAGES:
+                print(f"{COLOR_CRITICAL}CRITICAL: No non-sponsored products found on {MAX_CONSECUTIVE_EMPTY_PAGES} consecutive pages (including retries). Finished category '{category}'.{COLOR_RESET}", flush=True)
+                break
 
-    except KeyboardInterrupt:
-        print(f"\n{COLOR_INFO}INFO: Scraping interrupted by user (KeyboardInterrupt). Saving progress and exiting.{COLOR_RESET}", flush=True)
-    except Exception as e:
-        print(f"{COLOR_ERROR}ERR: An unexpected error occurred: {e}{COLOR_RESET}", flush=True)
+            if budget.grace_period_active:
+                print(f"{COLOR_WARNING}WARNING: Time slice for '{category}' used up after page {page_num}. Moving on.{COLOR_RESET}", flush=True)
+                break
+
+            page_num += page_step # scrape_page waits for the pacer's next slot before navigating
+
+    return total_products
+
+def main(setup_worker=None, teardown_worker=None):
+    """
+    Crawls every category. setup_worker/teardown_worker let a caller that keeps warm
+    browsers (the daemon) lend them out; by default each worker launches and quits its own.
+    """
+    global page_archive, price_history
+    # Clear the output folder at the beginning
+    print(f"\n{COLOR_STEP}--- STEP 1: Initializing Scraping Process ---{COLOR_RESET}", flush=True)
+    print(f"{COLOR_STEP}Clearing contents of '{OUTPUT_FOLDER}' folder...{COLOR_RESET}", flush=True)
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    clear_output_folder(OUTPUT_FOLDER)
+    print(f"{COLOR_STEP}Contents of '{OUTPUT_FOLDER}' cleared.{COLOR_RESET}\n", flush=True)
+
+    # Point every category's search URL at the configured Amazon base URL (e.g. a local mock server)
+    categories = {category: rebase_url(url, "amazon") for category, url in load_categories(PRODUCT_LINKS_FILE).items()}
+
+    if not categories:
+        print(f"{COLOR_ERROR}ERR: No categories found in {PRODUCT_LINKS_FILE}. Please check configuration.{COLOR_RESET}", flush=True)
+        return
+
+    page_archive = open_archive()
+    if page_archive:
+        print(f"{COLOR_INFO}INFO: Archiving fetched search pages to '{page_archive.root}'.{COLOR_RESET}", flush=True)
+    # A shard's prices are recorded once, from the merged catalog
+    price_history = open_price_history() if not shard else None
+
+    # All categories share the configured browser workers; the crawl itself has no time limit
+    scheduler = CategoryScheduler(categories, workers=get_setting("workers", 1))
+    try:
+        results = scheduler.run(crawl_category,
+                                setup_worker=setup_worker or (lambda: setup_driver(headless)),
+                                teardown_worker=teardown_worker or (lambda driver: driver.quit()))
     finally:
-        if driver:
-            driver.quit()
-        
+        if page_archive:
+            page_archive.close()
+        if price_history:
+            before, after = price_history.compact(get_setting("price_history", {}).get("downsample_after_days", DEFAULT_DOWNSAMPLE_AFTER_DAYS))
+            print(f"{COLOR_INFO}INFO: Price history holds {after} observations for {len(price_history.asins)} ASINs ({before - after} old ones downsampled).{COLOR_RESET}", flush=True)
+        pacer = get_pacer("amazon")
+        pacer.report()
+        pacer.save_state()
+        get_navigation_stats().report()
+
+    for category, total in results.items():
+        saved_to = shard.partial_path(category, KIND_CRAWL) if shard else category_file(category)
+        print(f"{COLOR_INFO}INFO: '{category}': {total if total is not None else 'failed'} products saved to {saved_to}.{COLOR_RESET}", flush=True)
     print(f"\n{COLOR_INFO}INFO: Scraping process finished.{COLOR_RESET}", flush=True)
+    return results
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,45 @@
+import json
+import os
+from urllib.parse import urlsplit, urlunsplit
+
+CONFIG_FILE = "config.json"
+
+def load_settings(file_path=CONFIG_FILE):
+    """Loads config.json (a list of single-key objects) and flattens it into one dict."""
+    settings = {}
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            config_data = json.load(f)
+        for item in config_data:
+            if isinstance(item, dict):
+                settings.update(item)
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass # Callers fall back to their own defaults
+    return settings
+
+def get_setting(key, default=None, file_path=CONFIG_FILE):
+    """Returns a single setting from config.json, or the default if it is not set."""
+    return load_settings(file_path).get(key, default)
+
+# Real endpoints; override per service with PINZON_<SERVICE>_URL or "base_urls" in config.json
+DEFAULT_BASE_URLS = {
+    "amazon": "https://www.amazon.in",
+    "amazon_images": "https://m.media-amazon.com",
+    "pinterest": "https://www.pinterest.com",
+    "pinterest_app": "https://in.pinterest.com",
+    "gemini": None, # None means the google-generativeai default endpoint
+}
+
+def get_base_url(service):
+    """Returns the scheme://host base URL a stage should use for a service, without a trailing slash."""
+    url = os.getenv(f"PINZON_{service.upper()}_URL") or get_setting("base_urls", {}).get(service) or DEFAULT_BASE_URLS[service]
+    return url.rstrip("/") if url else url
+
+def rebase_url(url, service):
+    """Moves an absolute URL onto the configured base URL of a service, keeping path and query."""
+    base = get_base_url(service)
+    parts = urlsplit(url)
+    if not base or not parts.netloc:
+        return url
+    base_parts = urlsplit(base)
+    return urlunsplit((base_parts.scheme, base_parts.netloc, parts.path, parts.query, parts.fragment))
@@ -0,0 +1,219 @@
+import argparse
+import glob
+import json
+import os
+import time
+
+from catalog import CatalogWriter, category_file, load_products, product_key, save_products, shard_of, write_atomic
+from freshness import carry_over_details, index_by_key, DETAIL_KEYS, POSTING_KEYS
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+COLOR_WARNING = "\033[93m" # Yellow
+COLOR_ERROR = "\033[91m"   # Red
+
+PARTIALS_FOLDER = "partials"
+KIND_CRAWL = "crawl"
+KIND_ENRICH = "enrich"
+
+# Fields the enrichment stage owns; everything else on a product comes from the crawl
+DETAIL_FIELDS = DETAIL_KEYS
+
+class Shard:
+    """
+    One runner's slice of a crawl or enrichment pass split across `count` runners.
+    Search pages are dealt out round-robin (runner i takes pages i, i+N, i+2N, ...)
+    and products by a hash of their ASIN, so every runner knows its work without
+    coordinating and the slices never overlap. `index` is 1-based, as in "--shard 2/4".
+    """
+
+    def __init__(self, index, count):
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"Invalid shard {index}/{count}")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, text):
+        try:
+            index, count = (int(part) for part in text.split("/"))
+        except ValueError:
+            raise ValueError(f"Expected a shard like '2/4', got '{text}'")
+        return cls(index, count)
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
+
+    @property
+    def first_page(self):
+        return self.index
+
+    def owns_page(self, page_num):
+        return (page_num - 1) % self.count == self.index - 1
+
+    def owns_product(self, product):
+        return shard_of(product_key(product), self.count) == self.index - 1
+
+    def partial_path(self, category, kind):
+        return os.path.join(PARTIALS_FOLDER, f"{category}.{kind}.{self.index}-of-{self.count}.json")
+
+class PartialWriter(CatalogWriter):
+    """A CatalogWriter that group-commits a shard's partial output document instead of a catalog."""
+
+    def __init__(self, file_path, build):
+        super().__init__(file_path)
+        self.build = build
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    def flush(self):
+        if self.products is not None and self.pending:
+            write_atomic(self.file_path, json.dumps(self.build(self.products), ensure_ascii=False))
+            self.commits += 1
+        self.pending = 0
+        self.last_commit = time.monotonic()
+
+def crawl_partial(shard, category):
+    """Returns the build function for a crawl partial: {page number: products}."""
+    def build(pages):
+        return {"kind": KIND_CRAWL, "category": category, "shard": str(shard), "written_at": int(time.time()),
+                "pages": {str(page_num): products for page_num, products in pages.items()}}
+    return build
+
+def enrich_partial(shard, category):
+    """Returns the build function for an enrichment partial: this shard's products plus the keys it removed."""
+    def build(state):
+        products, removed = state
+        return {"kind": KIND_ENRICH, "category": category, "shard": str(shard), "written_at": int(time.time()),
+                "products": [p for p in products if shard.owns_product(p)], "removed": sorted(removed)}
+    return build
+
+def load_partials(category, kind):
+    """Returns every partial document of a category and kind, with the shard counts they were written for."""
+    documents = []
+    for path in sorted(glob.glob(os.path.join(PARTIALS_FOLDER, f"{category}.{kind}.*-of-*.json"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            documents.append(json.load(f))
+    return documents
+
+def check_complete(documents, category, kind):
+    """Returns the shard count if exactly one full set of partials is present, else None."""
+    counts = {Shard.parse(d["shard"]).count for d in documents}
+    if len(counts) != 1:
+        print(f"{COLOR_ERROR}ERR: '{category}' has {kind} partials from different shard counts {sorted(counts)}.{COLOR_RESET}", flush=True)
+        return None
+    count = counts.pop()
+    present = {Shard.parse(d["shard"]).index for d in documents}
+    missing = sorted(set(range(1, count + 1)) - present)
+    if missing:
+        print(f"{COLOR_ERROR}ERR: '{category}' is missing {kind} partials for shard(s) {missing} of {count}.{COLOR_RESET}", flush=True)
+        return None
+    return count
+
+def _fresher(a, b):
+    """The product whose listing was observed last; ties keep the first."""
+    return b if (b.get("scraped_at") or 0) > (a.get("scraped_at") or 0) else a
+
+def merge_crawl(documents):
+    """
+    Rebuilds a category's product list from crawl partials in page order.
+    A product seen by more than one runner (results shift between pages while they crawl)
+    keeps its freshest observation, at the position where that observation was made.
+    """
+    pages = {}
+    for document in documents:
+        for page_num, products in document["pages"].items():
+            pages[int(page_num)] = products
+    ordered = [p for page_num in sorted(pages) for p in pages[page_num]]
+    freshest = {}
+    for position, product in enumerate(ordered):
+        key = product_key(product)
+        if key not in freshest or _fresher(freshest[key][1], product) is product:
+            freshest[key] = (position, product)
+    return [product for _, product in sorted(freshest.values(), key=lambda item: item[0])]
+
+def merge_enrich(catalog, documents):
+    """
+    Applies enrichment partials to the catalog. Products are matched by key; a product's
+    details and images come from the partial, and its listing fields from whichever side
+    observed the listing last (a crawl may have refreshed prices since the partial was written).
+    Returns (products, updated, removed).
+    """
+    enriched, removed = {}, set()
+    for document in documents:
+        removed.update(document["removed"])
+        for product in document["products"]:
+            enriched[product_key(product)] = product
+    merged, updated, dropped = [], 0, 0
+    for product in catalog:
+        key = product_key(product)
+        if key in removed and key not in enriched:
+            dropped += 1
+            continue
+        partial = enriched.get(key)
+        if partial is None:
+            merged.append(product)
+            continue
+        if _fresher(partial, product) is product:
+            listing = {k: v for k, v in product.items() if k not in DETAIL_FIELDS and not k.startswith("image_url_")}
+            details = {k: v for k, v in partial.items() if k in DETAIL_FIELDS or k.startswith("image_url_")}
+            partial = {**listing, **details}
+        else:
+            # The partial was cut from the catalog as the enrich run started; marks made since stay
+            partial = {**partial, **{k: product[k] for k in POSTING_KEYS if k in product}}
+        if partial != product:
+            updated += 1
+        merged.append(partial)
+    return merged, updated, dropped
+
+def merge_category(category, kind, keep_partials=False):
+    """Merges one category's partials of one kind into its catalog; returns False if nothing was merged."""
+    documents = load_partials(category, kind)
+    if not documents:
+        return False
+    if check_complete(documents, category, kind) is None:
+        return False
+    file_path = category_file(category)
+    if kind == KIND_CRAWL:
+        products = merge_crawl(documents)
+        try:
+            carry_over_details(products, index_by_key(load_products(file_path))) # Keep the details and marks of products seen again
+        except (FileNotFoundError, ValueError):
+            pass
+        save_products(products, file_path)
+        from price_history import open_price_history # Shards don't record prices; the merged crawl does, once
+        open_price_history().record(products)
+        print(f"{COLOR_SUCCESS}SUCCESS: Merged {len(documents)} crawl partials into {len(products)} products in {file_path}.{COLOR_RESET}", flush=True)
+    else:
+        try:
+            catalog = load_products(file_path)
+        except FileNotFoundError:
+            print(f"{COLOR_ERROR}ERR: {file_path} not found; merge the crawl first.{COLOR_RESET}", flush=True)
+            return False
+        products, updated, dropped = merge_enrich(catalog, documents)
+        save_products(products, file_path)
+        print(f"{COLOR_SUCCESS}SUCCESS: Merged {len(documents)} enrichment partials into {file_path}: {updated} updated, {dropped} removed.{COLOR_RESET}", flush=True)
+    if not keep_partials:
+        for path in glob.glob(os.path.join(PARTIALS_FOLDER, f"{category}.{kind}.*-of-*.json")):
+            os.unlink(path)
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge the partial outputs of sharded crawl/enrich runners into the catalogs.")
+    parser.add_argument("categories", nargs="*", help="Categories to merge (default: all)")
+    parser.add_argument("--kind", choices=[KIND_CRAWL, KIND_ENRICH], default=None, help="Only merge this kind of partial (default: crawl, then enrich)")
+    parser.add_argument("--keep-partials", action="store_true", help="Don't delete partials after merging")
+    args = parser.parse_args()
+
+    from scheduler import load_categories
+    kinds = [args.kind] if args.kind else [KIND_CRAWL, KIND_ENRICH]
+    merged = 0
+    for category in args.categories or list(load_categories()):
+        for kind in kinds:
+            merged += merge_category(category, kind, keep_partials=args.keep_partials)
+    if not merged:
+        print(f"{COLOR_WARNING}WARNING: No complete set of partials found in '{PARTIALS_FOLDER}'.{COLOR_RESET}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# The scripts live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Runs every test in an empty folder, so config.json and the catalogs come from the test."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def make_product(asin, name="Samsung Galaxy A17 5G (Gray, 6GB RAM, 128GB Storage)", **fields):
+    product = {
+        "product_url": f"https://www.amazon.in/dp/{asin}",
+        "product_name": name,
+        "product_price": "12,999",
+        "price_paise": 1299900,
+        "scraped_at": 1_700_000_000,
+    }
+    product.update(fields)
+    return product
+
+def image(image_id):
+    return f"https://m.media-amazon.com/images/I/{image_id}._SX679_.jpg"
@@ -0,0 +1,51 @@
+import archive
+import scrape_details
+import scrape_products
+from archive import HtmlArchive
+from catalog import category_file, load_products, save_products
+from conftest import image, make_product
+
+def test_store_and_load():
+    store = HtmlArchive(root="archive")
+    sha = store.store("https://www.amazon.in/dp/B0DSKM9KXH", "<html>₹12,999</html>", kind="product")
+    assert store.load(sha) == "<html>₹12,999</html>"
+    assert HtmlArchive(root="archive").latest("product", key="asin")["B0DSKM9KXH"]["sha256"] == sha
+
+def test_eviction_frees_space_down_to_the_watermark():
+    store = HtmlArchive(root="archive", max_bytes=20000, max_age_days=None)
+    rewrites = []
+    write_index = store._write_index
+    store._write_index = lambda: rewrites.append(1) or write_index()
+    for i in range(300):
+        store.store(f"https://www.amazon.in/dp/B{i:09d}", f"{i:04d}".join(str(j * i) for j in range(200)), kind="product")
+    assert store.total_bytes() <= store.max_bytes
+    assert len(rewrites) < 100 # Not one rewrite per store once full
+
+def test_reparse_carries_details_and_marks_over(monkeypatch):
+    listing = [make_product("B0DSKM9KXH", scraped_at=None), make_product("B0FCMKSP7V", scraped_at=None), make_product("B0F1234567", scraped_at=None)]
+    monkeypatch.setattr(scrape_products, "parse_products", lambda html, scraped_at: [dict(p, scraped_at=scraped_at) for p in listing])
+    monkeypatch.setattr(scrape_details, "parse_product_page", lambda html: ("<p>" + html + "</p>", [image(html)]))
+    save_products([
+        make_product("B0DSKM9KXH", product_details="<p>old</p>", image_url_1=image("old1"), image_url_2=image("old2"),
+                     details_scraped_at=50, published=True),
+        make_product("B0FCMKSP7V", product_details="<p>newer</p>", image_url_1=image("newer"),
+                     details_scraped_at=500, exported="pinterest_bulk_001.csv", duplicate_of="B0F1234567"),
+    ], category_file("mobile_phones"))
+
+    store = HtmlArchive(root="archive")
+    store.store("https://www.amazon.in/s?k=phones&page=1", "search", kind="search", category="mobile_phones", page=1)
+    for asin in ("B0DSKM9KXH", "B0FCMKSP7V"):
+        store.store(f"https://www.amazon.in/dp/{asin}", asin, kind="product")
+    for entry in store.entries[1:]:
+        entry["fetched_at"] = 100 # Archived after the first product's details, before the second's
+
+    assert archive.reparse_category(store, "mobile_phones") == 3
+    first, second, third = load_products(category_file("mobile_phones"))
+    # An archived page newer than the details replaces them, and their images, and is timestamped with its fetch
+    assert first["product_details"] == "<p>B0DSKM9KXH</p>" and first["details_scraped_at"] == 100
+    assert first["image_url_1"] == image("B0DSKM9KXH") and "image_url_2" not in first
+    assert first["published"] is True
+    # Details newer than the archived page stay, with every posting mark
+    assert second["product_details"] == "<p>newer</p>" and second["details_scraped_at"] == 500
+    assert second["exported"] == "pinterest_bulk_001.csv" and second["duplicate_of"] == "B0F1234567"
+    assert "product_details" not in third and third["scraped_at"] == store.entries[0]["fetched_at"]
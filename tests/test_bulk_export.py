@@ -0,0 +1,34 @@
+import csv
+import os
+import subprocess
+import sys
+
+import bulk_export
+from bulk_export import write_chunks, CSV_COLUMNS
+
+def rows(count):
+    return [{"Title": f"Pin {i}", "Media URL": f"https://m.media-amazon.com/images/I/{i}._SL1500_.jpg",
+             "Pinterest board": "Mobile Phones", "Description": "Galaxy AI, 5000 mAh Battery.",
+             "Link": f"https://www.amazon.in/dp/B{i:09d}?tag=affdealsplus-21"} for i in range(count)]
+
+def test_write_chunks_splits_at_rows_per_file():
+    written = write_chunks(rows(450), "exports", 200, stamp="20261019-120000")
+    assert [len(chunk) for _, chunk in written] == [200, 200, 50]
+    assert [os.path.basename(path) for path, _ in written][-1] == "pinterest_bulk_20261019-120000_003.csv"
+    with open(written[-1][0], newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        assert tuple(reader.fieldnames) == CSV_COLUMNS
+        last = list(reader)
+    assert len(last) == 50 and last[0]["Title"] == "Pin 400" and last[0]["Keywords"] == ""
+
+def test_write_copy_uses_the_local_copy_without_a_key(monkeypatch):
+    monkeypatch.setattr(bulk_export, "GEMINI_API_KEY", None)
+    copies = bulk_export.write_copy([{"product_name": "Redmi A5 (Just Black, 3GB RAM, 64GB Storage)",
+                                      "product_details": "<p>Big Display - 6.88 inch</p>\n<p>Big Battery - 5200 mAh</p>"}])
+    assert copies == [("Redmi A5, 3GB RAM, 64GB, Just Black", "Big Display, Big Battery.")]
+
+def test_bulk_export_does_not_import_selenium():
+    code = "import sys, bulk_export; print(any(m.split('.')[0] in ('selenium', 'post_pin', 'image_prep') for m in sys.modules))"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
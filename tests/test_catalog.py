@@ -0,0 +1,56 @@
+import json
+import os
+
+import pytest
+
+import catalog
+from catalog import load_products, recover_catalog, save_products
+from conftest import image, make_product
+
+PRODUCTS = [
+    make_product("B0DSKM9KXH", image_url_1=image("71abcDEF12L"), image_url_2=image("61xyz-3_4L"),
+                 product_details="<p>6.7 inch display</p>\n<p>5000 mAh battery</p>", published=True),
+    make_product("B0FCMKSP7V", name="OnePlus Nord 5 | Snapdragon 8s Gen 3", exported="pinterest_bulk_001.csv"),
+    make_product("B0F1234567", name="Redmi A5 (Just Black, 3GB RAM, 64GB Storage) — ₹6,499"),
+]
+
+FORMATS = [
+    "pretty",
+    "compact",
+    pytest.param("msgpack", marks=pytest.mark.skipif(catalog.msgpack is None, reason="msgpack is not installed")),
+    "sharded",
+]
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_round_trip(fmt):
+    path = catalog.category_file("mobile_phones", fmt)
+    save_products(PRODUCTS, path, fmt=fmt)
+    assert load_products(path) == PRODUCTS
+
+def test_compact_stores_image_ids():
+    save_products(PRODUCTS, "mobile_phones.json", fmt="compact")
+    with open("mobile_phones.json", encoding="utf-8") as f:
+        stored = json.load(f)
+    assert stored[0]["image_url_1"] == "71abcDEF12L"
+
+def test_sharded_rewrites_only_changed_shards():
+    save_products(PRODUCTS, "mobile_phones.shards", fmt="sharded")
+    files = sorted(os.listdir("mobile_phones.shards"))
+    changed = [dict(p) for p in PRODUCTS]
+    changed[1]["price_paise"] = 2999900
+    assert catalog._save_sharded(changed, "mobile_phones.shards") == 1 # Same keys in the same order: the manifest stays
+    assert load_products("mobile_phones.shards") == changed
+    assert sorted(os.listdir("mobile_phones.shards")) == files
+
+def test_load_falls_back_to_the_old_format():
+    save_products(PRODUCTS, "mobile_phones.json", fmt="compact")
+    assert load_products("mobile_phones.shards") == PRODUCTS
+
+def test_recover_keeps_complete_lines():
+    save_products(PRODUCTS, "mobile_phones.json", fmt="compact")
+    with open("mobile_phones.json", encoding="utf-8") as f:
+        text = f.read()
+    with open("mobile_phones.json", "w", encoding="utf-8") as f:
+        f.write(text[:text.rindex('{"product_url"') + 30]) # Torn inside the last product
+    assert recover_catalog("mobile_phones.json") == 2
+    assert load_products("mobile_phones.json") == PRODUCTS[:2]
@@ -0,0 +1,23 @@
+from copywriter import local_copy, parse_specs, TITLE_MAX_CHARS, SUMMARY_MAX_CHARS
+
+DETAILS = ("<p>Galaxy AI - Welcome to the era of mobile AI with Circle to Search.</p>\n"
+           "<p>Super AMOLED Display: 6.7 inch FHD+ at 120Hz for smooth scrolling.</p>\n"
+           "<p>5000 mAh Battery — lasts all day with 25W fast charging.</p>")
+
+def test_parse_specs():
+    specs = parse_specs("iQOO Z10R 5G (Aquamarine, 8GB RAM, 128GB Storage) | 32MP 4K Selfie Camera")
+    assert specs == {"brand": "iQOO", "model": "iQOO Z10R 5G", "ram": "8GB", "storage": "128GB", "colour": "Aquamarine"}
+    assert parse_specs("Apple iPhone 15 (128 GB) - Black")["colour"] == "Black"
+
+def test_local_copy_fits_pinterest_limits():
+    copy = local_copy("Samsung Galaxy A17 5G (Gray, 6GB RAM, 128GB Storage) | with Travel Adapter | 50 MP No Shake Camera",
+                      DETAILS, {"min_summary_bullets": 2})
+    assert copy["title"] == "Samsung Galaxy A17 5G, 6GB RAM, 128GB, Gray"
+    assert copy["summary"] == "Galaxy AI, Super AMOLED Display, 5000 mAh Battery."
+    assert copy["title_ok"] and copy["summary_ok"]
+    assert len(copy["title"]) <= TITLE_MAX_CHARS and len(copy["summary"]) <= SUMMARY_MAX_CHARS
+
+def test_local_copy_flags_what_needs_the_llm():
+    copy = local_copy("Nokia 105", "<p>" + "Long battery life " * 20 + "</p>", {"min_summary_bullets": 2})
+    assert not copy["title_ok"] # Nothing tells it apart from its variants
+    assert not copy["summary_ok"] and len(copy["summary"]) <= SUMMARY_MAX_CHARS
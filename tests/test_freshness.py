@@ -0,0 +1,44 @@
+from freshness import (carry_over_details, index_by_key, mark_details_scraped, refresh_queue, refresh_reason,
+                       stamp_legacy_details, DEFAULTS, REASON_EXPIRED, REASON_LISTING_CHANGED, REASON_MISSING)
+from conftest import image, make_product
+
+DAY = 86400
+NOW = 1_800_000_000
+
+def enriched(asin, scraped_at=NOW, **fields):
+    product = make_product(asin, product_details="<p>5000 mAh battery</p>", image_url_1=image("71abcDEF12L"), **fields)
+    mark_details_scraped(product, scraped_at)
+    return product
+
+def test_refresh_reason():
+    assert refresh_reason(make_product("B0DSKM9KXH"), NOW) == REASON_MISSING
+    assert refresh_reason(enriched("B0DSKM9KXH"), NOW) is None
+    assert refresh_reason(enriched("B0DSKM9KXH", scraped_at=NOW - 31 * DAY), NOW) == REASON_EXPIRED
+    renamed = enriched("B0DSKM9KXH")
+    renamed["product_name"] = "Samsung Galaxy A17 5G (Black, 8GB RAM, 256GB Storage)"
+    assert refresh_reason(renamed, NOW) == REASON_LISTING_CHANGED
+
+def test_refresh_queue_order():
+    fresh, stale, missing = enriched("B0000000A1"), enriched("B0000000A2", scraped_at=NOW - 40 * DAY), make_product("B0000000A3")
+    assert refresh_queue([fresh, stale, missing], NOW) == [missing, stale]
+
+def test_carry_over_on_recrawl():
+    previous = [
+        enriched("B0DSKM9KXH", published=True, image_url_2=image("61xyz-3_4L")),
+        enriched("B0FCMKSP7V", exported="pinterest_bulk_001.csv", duplicate_of="B0DSKM9KXH"),
+    ]
+    crawled = [make_product("B0FCMKSP7V", price_paise=999900), make_product("B0DSKM9KXH"), make_product("B0F1234567")]
+    assert carry_over_details(crawled, index_by_key(previous)) == 2
+    assert crawled[0]["price_paise"] == 999900 # Listing fields come from the crawl
+    assert crawled[0]["exported"] == "pinterest_bulk_001.csv" and crawled[0]["duplicate_of"] == "B0DSKM9KXH"
+    assert crawled[1]["published"] is True and crawled[1]["image_url_2"] == image("61xyz-3_4L")
+    assert crawled[1]["details_scraped_at"] == previous[0]["details_scraped_at"]
+    assert "product_details" not in crawled[2]
+
+def test_stamp_legacy_details_spreads_over_the_ttl():
+    products = [make_product(f"B0{i:08d}", product_details="<p>x</p>", image_url_1=image("71abcDEF12L")) for i in range(500)]
+    assert stamp_legacy_details(products, NOW) == 500
+    ages = [(NOW - p["details_scraped_at"]) / DAY for p in products]
+    assert 0 <= min(ages) and max(ages) < DEFAULTS["ttl_days"]
+    assert max(sum(1 for age in ages if day <= age < day + 1) for day in range(30)) < 40 # No day gets them all
+    assert stamp_legacy_details(products, NOW) == 0
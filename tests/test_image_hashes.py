@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from image_hashes import dedupe_images, hamming, hash_images, PublishedImageIndex
+
+Image = pytest.importorskip("PIL.Image")
+
+def save_image(path, seed, noise=0):
+    rng = np.random.default_rng(seed)
+    pixels = np.kron(rng.integers(0, 256, size=(8, 8)), np.ones((32, 32))) # Coarse blocks survive resizing
+    pixels = np.clip(pixels + np.random.default_rng(seed + 1).normal(0, noise, pixels.shape), 0, 255)
+    Image.fromarray(pixels.astype(np.uint8)).save(path)
+    return str(path)
+
+def test_near_duplicates_are_dropped(tmp_path):
+    paths = [save_image(tmp_path / "a.png", 1), save_image(tmp_path / "a_noisy.png", 1, noise=4), save_image(tmp_path / "b.png", 2)]
+    hashes = hash_images(paths, algorithm="phash", workers=1)
+    assert hamming(hashes[0], hashes[1]) <= 6 < hamming(hashes[0], hashes[2])
+    kept, kept_hashes = dedupe_images(paths, hashes, max_distance=6)
+    assert kept == [paths[0], paths[2]] and kept_hashes == [hashes[0], hashes[2]]
+
+def test_published_index_finds_a_pin_sharing_most_images():
+    index = PublishedImageIndex("image_hashes.json")
+    index.add_pin("B0DSKM9KXH", [0x0F0F0F0F0F0F0F0F, 0x1234567812345678])
+    index.save()
+    reopened = PublishedImageIndex("image_hashes.json")
+    assert reopened.find_matching_pin([0x0F0F0F0F0F0F0F0E, 0x1234567812345679], 2, 0.5) == "B0DSKM9KXH"
+    assert reopened.find_matching_pin([0xFFFF000000000000], 2, 0.5) is None
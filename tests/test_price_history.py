@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+
+from price_history import PriceHistory, OBSERVATION_DTYPE
+from conftest import make_product
+
+def test_record_and_series():
+    history = PriceHistory(root="history")
+    assert history.record([make_product("B0DSKM9KXH", price_paise=1299900)], observed_at=1000) == 1
+    assert history.record([make_product("B0DSKM9KXH", price_paise=1199900), make_product("B0F1234567")], observed_at=2000) == 2
+    observed_at, prices = history.series("B0DSKM9KXH")
+    assert observed_at.tolist() == [1000, 2000]
+    assert prices.tolist() == [1299900, 1199900]
+    assert PriceHistory(root="history").asins == ["B0DSKM9KXH", "B0F1234567"] # IDs survive a reopen
+
+def test_torn_record_is_dropped_before_appending():
+    history = PriceHistory(root="history")
+    history.record([make_product("B0DSKM9KXH")], observed_at=1000)
+    with open(history.observations_path, "ab") as f:
+        f.write(b"\x01\x02\x03\x04\x05") # A crash in the middle of the next append
+    history.record([make_product("B0DSKM9KXH", price_paise=999900)], observed_at=2000)
+    assert os.path.getsize(history.observations_path) == 2 * OBSERVATION_DTYPE.itemsize
+    assert history.series("B0DSKM9KXH")[1].tolist() == [1299900, 999900]
+
+def test_torn_record_is_dropped_on_read():
+    history = PriceHistory(root="history")
+    history.record([make_product("B0DSKM9KXH")], observed_at=1000)
+    with open(history.observations_path, "ab") as f:
+        f.write(b"\x01\x02\x03")
+    assert len(history.observations()) == 1
+    assert os.path.getsize(history.observations_path) == OBSERVATION_DTYPE.itemsize
+
+def test_biggest_drops():
+    history = PriceHistory(root="history")
+    history.record([make_product("B0DSKM9KXH", price_paise=2000000), make_product("B0F1234567", price_paise=500000)], observed_at=1000)
+    history.record([make_product("B0DSKM9KXH", price_paise=1500000), make_product("B0F1234567", price_paise=500000)], observed_at=2000)
+    drops = history.biggest_drops(days=1, now=3000)
+    assert [d["asin"] for d in drops] == ["B0DSKM9KXH"]
+    assert drops[0]["drop"] == 0.25
+
+def test_compact_keeps_the_last_observation_per_day():
+    history = PriceHistory(root="history")
+    for hour, price in enumerate([300, 200, 100]):
+        history.record([make_product("B0DSKM9KXH", price_paise=price)], observed_at=86400 + hour * 3600)
+    history.record([make_product("B0DSKM9KXH", price_paise=50)], observed_at=200 * 86400)
+    assert history.compact(older_than_days=90, now=200 * 86400) == (4, 2)
+    assert history.series("B0DSKM9KXH")[1].tolist() == [100, 50]
+    assert np.all(np.diff(history.observations()["observed_at"]) > 0)
@@ -0,0 +1,42 @@
+from sharding import merge_crawl, merge_enrich
+from conftest import image, make_product
+
+def partial(products, removed=()):
+    return {"products": products, "removed": list(removed)}
+
+def test_merge_enrich_keeps_marks_made_after_the_partial_was_cut():
+    catalog = [
+        make_product("B0DSKM9KXH", published=True),
+        make_product("B0FCMKSP7V", exported="pinterest_bulk_001.csv", duplicate_of="B0DSKM9KXH"),
+        make_product("B0F1234567"),
+    ]
+    documents = [partial([
+        make_product("B0DSKM9KXH", product_details="<p>a</p>", image_url_1=image("71abcDEF12L")),
+        make_product("B0FCMKSP7V", product_details="<p>b</p>", image_url_1=image("61xyz-3_4L")),
+    ])]
+    merged, updated, dropped = merge_enrich(catalog, documents)
+    assert (updated, dropped) == (2, 0)
+    assert merged[0]["published"] is True and merged[0]["product_details"] == "<p>a</p>"
+    assert merged[1]["exported"] == "pinterest_bulk_001.csv" and merged[1]["duplicate_of"] == "B0DSKM9KXH"
+    assert merged[2] == catalog[2]
+
+def test_merge_enrich_keeps_a_fresher_listing():
+    catalog = [make_product("B0DSKM9KXH", price_paise=999900, scraped_at=2_000_000_000, published=True)]
+    documents = [partial([make_product("B0DSKM9KXH", product_details="<p>a</p>", image_url_1=image("71abcDEF12L"))])]
+    merged, _, _ = merge_enrich(catalog, documents)
+    assert merged[0]["price_paise"] == 999900 and merged[0]["published"] is True
+    assert merged[0]["product_details"] == "<p>a</p>" and merged[0]["image_url_1"] == image("71abcDEF12L")
+
+def test_merge_enrich_drops_removed_products():
+    catalog = [make_product("B0DSKM9KXH"), make_product("B0FCMKSP7V")]
+    merged, _, dropped = merge_enrich(catalog, [partial([], removed=["B0FCMKSP7V"])])
+    assert dropped == 1 and [p["product_url"] for p in merged] == [catalog[0]["product_url"]]
+
+def test_merge_crawl_keeps_the_freshest_observation():
+    documents = [
+        {"pages": {"1": [make_product("B0DSKM9KXH"), make_product("B0FCMKSP7V")]}},
+        {"pages": {"2": [make_product("B0FCMKSP7V", price_paise=1, scraped_at=1_700_000_100), make_product("B0F1234567")]}},
+    ]
+    merged = merge_crawl(documents)
+    assert [p["product_url"][-10:] for p in merged] == ["B0DSKM9KXH", "B0FCMKSP7V", "B0F1234567"]
+    assert merged[1]["price_paise"] == 1
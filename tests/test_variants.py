@@ -0,0 +1,34 @@
+from variants import cluster_products, model_numbers, normalize, MinHashIndex
+from conftest import make_product
+
+A17 = ("Samsung Galaxy A17 5G (Gray, 6GB RAM, 128GB Storage) | with Travel Adapter | 50 MP No Shake Camera | "
+       "Gemini Live | Circle to Search | Super AMOLED | Corning Gorilla Glass Victus | 7.5mm Sleek | AI")
+
+def test_model_numbers_ignore_capacities():
+    assert model_numbers(A17) == {"a17", "5g"}
+    assert model_numbers("realme 15 Pro 5G Smartphone 12+512GB Silver") == {"15", "5g"}
+
+def test_colour_and_storage_variants_share_a_cluster():
+    products = [
+        make_product("B0000000A1", name=A17),
+        make_product("B0000000A2", name=A17.replace("Gray, 6GB", "Blue, 8GB")),
+        make_product("B0000000A3", name="OnePlus Nord 5 | Snapdragon 8s Gen 3 | Stable 144FPS Gaming"),
+    ]
+    labels = cluster_products(products, with_details=False)
+    assert labels[0] == labels[1] != labels[2]
+
+def test_models_that_differ_in_one_token_stay_apart():
+    a27 = A17.replace("A17", "A27")
+    index = MinHashIndex()
+    index.add(normalize(A17))
+    index.add(normalize(a27))
+    assert index.clusters() == [0, 0] # The names alone are nearly identical...
+    labels = cluster_products([make_product("B0000000A1", name=A17), make_product("B0000000A2", name=a27)], with_details=False)
+    assert labels == [0, 1] # ...but the model numbers differ
+
+def test_minhash_similarity_tracks_jaccard():
+    index = MinHashIndex()
+    for text in (A17, A17.replace("Gray", "Blue"), "Nokia 105 Dual SIM Keypad Phone with Long Battery Life"):
+        index.add(normalize(text))
+    assert index.similarity(0, 1) > 0.8 > 0.2 > index.similarity(0, 2)
+    assert index.candidates(0) == {1}
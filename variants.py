@@ -0,0 +1,201 @@
+import argparse
+import re
+import zlib
+
+import numpy as np
+
+from settings import get_setting
+from catalog import extract_asin
+from copywriter import parse_specs
+
+# --- ANSI Color Codes ---
+COLOR_RESET = "\033[0m"
+COLOR_INFO = "\033[94m"    # Blue
+COLOR_SUCCESS = "\033[92m" # Green
+
+# Largest prime below 2^32: with a, b and x all under it, a * x + b stays below 2^64 and
+# the (a * x + b) mod p permutations are computed exactly in uint64
+HASH_PRIME = 4294967291
+
+DEFAULTS = {
+    "num_perm": 128,          # MinHash signature length
+    "bands": 16,              # LSH bands; with 128 permutations that's 8 rows per band
+    "shingle_size": 5,        # Character n-grams
+    "name_threshold": 0.8,    # Estimated Jaccard for names alone (before details are scraped)
+    "detail_threshold": 0.7,  # Estimated Jaccard for name plus details
+    "reuse_details": True,    # scrape_details copies a scraped sibling's details instead of fetching the page
+    "one_pin_per_cluster": True, # post_pin skips variants of anything already pinned
+}
+
+_DIGIT = re.compile(r"\d")
+_CAPACITY_TOKEN = re.compile(r"\d\s*(?:gb|tb)|gb\d|\d+\+\d+", re.I) # "128gb", "gold128gb6gb", "8+256"
+
+def variant_settings():
+    config = dict(DEFAULTS)
+    config.update(get_setting("variants", {}))
+    return config
+
+def normalize(text):
+    return re.sub(r"[^a-z0-9]+", " ", (text or "").lower()).strip()
+
+def shingles(text, size):
+    """Returns the set of character n-grams of a normalized text, hashed to 32 bits."""
+    text = normalize(text)
+    if len(text) <= size:
+        return {zlib.crc32(text.encode('utf-8'))} if text else set()
+    return {zlib.crc32(text[i:i + size].encode('utf-8')) for i in range(len(text) - size + 1)}
+
+class MinHashIndex:
+    """
+    MinHash signatures with banded LSH for near-duplicate lookup.
+    Each text becomes a fixed-length signature whose per-position agreement
+    estimates the Jaccard similarity of the texts' shingle sets. Signatures are
+    cut into bands and bucketed, so only texts that share a bucket are ever
+    compared, which keeps clustering close to linear in the number of products.
+    """
+
+    def __init__(self, num_perm=128, bands=16, shingle_size=5, threshold=0.7, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, HASH_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, HASH_PRIME, size=num_perm, dtype=np.uint64)
+        self.signatures = []
+        self.buckets = {}
+
+    def signature(self, text):
+        hashes = np.fromiter(shingles(text, self.shingle_size), dtype=np.uint64) % np.uint64(HASH_PRIME)
+        if not len(hashes):
+            return np.full(self.num_perm, HASH_PRIME, dtype=np.uint64)
+        # (a * x + b) mod p for every permutation and shingle, then the minimum per permutation
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % np.uint64(HASH_PRIME)).min(axis=1)
+
+    def add(self, text):
+        """Adds a text and returns its row number."""
+        row = len(self.signatures)
+        signature = self.signature(text)
+        self.signatures.append(signature)
+        for band in range(self.bands):
+            key = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            self.buckets.setdefault(key, []).append(row)
+        return row
+
+    def similarity(self, i, j):
+        return float(np.mean(self.signatures[i] == self.signatures[j]))
+
+    def candidates(self, row):
+        """Rows sharing at least one LSH bucket with the given row."""
+        signature = self.signatures[row]
+        found = set()
+        for band in range(self.bands):
+            found.update(self.buckets[(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())])
+        found.discard(row)
+        return found
+
+    def clusters(self, keys=None):
+        """
+        Returns a cluster label per row: the row number of the cluster's leader.
+        Rows are visited in order and join the most similar earlier leader above the
+        threshold, or lead a new cluster. Comparing against leaders only (rather than
+        any member) keeps chains of pairwise-similar names from merging distinct models.
+        With keys (one per row), a row only joins a leader with the same key.
+        """
+        labels = []
+        for row in range(len(self.signatures)):
+            best, best_similarity = row, self.threshold
+            for other in self.candidates(row):
+                if other < row and labels[other] == other and (keys is None or keys[other] == keys[row]):
+                    similarity = self.similarity(row, other)
+                    if similarity >= best_similarity:
+                        best, best_similarity = other, similarity
+            labels.append(best)
+        return labels
+
+def product_text(product, with_details=True):
+    text = product.get("product_name", "")
+    if with_details and product.get("product_details"):
+        text += " " + product["product_details"]
+    return text
+
+def model_numbers(product_name):
+    """
+    The tokens of a listing's model name that contain a digit, capacities aside ('Lava O3 Pro' -> {'o3'}).
+    Listings that differ only in them (O3 and Yuva 4, JioBharat V3 and V4) are different phones
+    however similar the rest of their text is.
+    """
+    model = parse_specs(product_name)["model"] or ""
+    return frozenset(t for t in normalize(model).split() if _DIGIT.search(t) and not _CAPACITY_TOKEN.search(t))
+
+def cluster_products(products, with_details=True):
+    """
+    Groups colour/storage variants of the same model.
+    Returns one cluster label per product (the index of the cluster's leader).
+    Without details, only names are compared and the stricter name_threshold applies.
+    Either way, products only share a cluster if their model numbers match.
+    """
+    config = variant_settings()
+    index = MinHashIndex(num_perm=config["num_perm"], bands=config["bands"], shingle_size=config["shingle_size"],
+                         threshold=config["detail_threshold"] if with_details else config["name_threshold"])
+    for p in products:
+        index.add(product_text(p, with_details))
+    return index.clusters([model_numbers(p.get("product_name", "")) for p in products])
+
+def jaccard(a, b, size):
+    """Exact Jaccard similarity of two texts' shingle sets."""
+    a, b = shingles(a, size), shingles(b, size)
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+def estimate_errors(texts, index):
+    """
+    How far the index's MinHash estimates are from the exact Jaccard similarity, over every
+    LSH candidate pair of the texts (the pairs clustering actually compares). Returns
+    (mean, max) absolute error and the number of pairs.
+    """
+    errors = [abs(index.similarity(i, j) - jaccard(texts[i], texts[j], index.shingle_size))
+              for i in range(len(texts)) for j in index.candidates(i) if j < i]
+    return (float(np.mean(errors)), float(np.max(errors)), len(errors)) if errors else (0.0, 0.0, 0)
+
+def find_scraped_sibling(product, siblings):
+    """Returns a sibling that already has details and images, or None."""
+    for sibling in siblings:
+        if sibling is not product and sibling.get("product_details") and sibling.get("image_url_1"):
+            return sibling
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Show near-duplicate product clusters (colour/storage variants).")
+    parser.add_argument("categories", nargs="*", help="Categories to cluster (default: all)")
+    parser.add_argument("--names-only", action="store_true", help="Cluster on names alone, as scrape_details does")
+    parser.add_argument("--show", type=int, default=10, help="How many of the largest clusters to print")
+    parser.add_argument("--check", action="store_true", help="Compare the MinHash estimates with the exact Jaccard similarity of the names")
+    args = parser.parse_args()
+
+    from scheduler import load_categories
+    from catalog import category_file, load_products
+    for category in args.categories or list(load_categories()):
+        products = load_products(category_file(category))
+        if args.check:
+            config = variant_settings()
+            index = MinHashIndex(num_perm=config["num_perm"], bands=config["bands"], shingle_size=config["shingle_size"])
+            names = [p.get("product_name", "") for p in products]
+            for name in names:
+                index.add(name)
+            mean, worst, pairs = estimate_errors(names, index)
+            print(f"{COLOR_INFO}INFO: '{category}': MinHash vs exact Jaccard over {pairs} candidate name pairs: mean error {mean:.3f}, max {worst:.3f}.{COLOR_RESET}", flush=True)
+        labels = cluster_products(products, with_details=not args.names_only)
+        groups = {}
+        for product, label in zip(products, labels):
+            groups.setdefault(label, []).append(product)
+        print(f"{COLOR_INFO}INFO: '{category}': {len(products)} products in {len(groups)} clusters.{COLOR_RESET}", flush=True)
+        for members in sorted(groups.values(), key=len, reverse=True)[:args.show]:
+            print(f"{COLOR_SUCCESS}{len(members):4d}{COLOR_RESET}  {members[0].get('product_name', 'N/A')[:70]}", flush=True)
+            for member in members[1:4]:
+                print(f"        {extract_asin(member.get('product_url'))}  {member.get('product_name', 'N/A')[:62]}", flush=True)
+
+if __name__ == "__main__":
+    main()